@@ -0,0 +1,54 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:35
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_search_configuration'),
+        ('circuits', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='passenger',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='passenger',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='passengers_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='passenger',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['document_number'], name='passengers_docnum_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(
+            sql="""
+                CREATE FUNCTION passengers_search_vector_update() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector :=
+                        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.first_name, '')), 'A') ||
+                        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.last_name, '')), 'A') ||
+                        setweight(to_tsvector('simple', coalesce(NEW.document_number, '')), 'A') ||
+                        setweight(to_tsvector('simple', coalesce(NEW.email, '')), 'B');
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql;
+
+                CREATE TRIGGER passengers_search_vector_trigger
+                    BEFORE INSERT OR UPDATE OF first_name, last_name, document_number, email
+                    ON passengers FOR EACH ROW
+                    EXECUTE FUNCTION passengers_search_vector_update();
+
+                UPDATE passengers SET first_name = first_name;
+            """,
+            reverse_sql="""
+                DROP TRIGGER IF EXISTS passengers_search_vector_trigger ON passengers;
+                DROP FUNCTION IF EXISTS passengers_search_vector_update();
+            """,
+        ),
+    ]
@@ -2,6 +2,8 @@
 Circuit Management models: Programs, Groups, Passengers, Itineraries, Flights.
 """
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from core.common.models import TimeStampedModel
 from apps.authentication.models import User
@@ -159,6 +161,9 @@ class Passenger(TimeStampedModel):
     special_requirements = models.TextField(blank=True)
     dietary_restrictions = models.TextField(blank=True)
     
+    # Full-text search (maintained by a database trigger)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'passengers'
         verbose_name = 'Passenger'
@@ -168,6 +173,12 @@ class Passenger(TimeStampedModel):
             models.Index(fields=['group', 'status']),
             models.Index(fields=['document_type', 'document_number']),
             models.Index(fields=['email']),
+            GinIndex(fields=['search_vector'], name='passengers_search_gin'),
+            GinIndex(
+                fields=['document_number'],
+                name='passengers_docnum_trgm',
+                opclasses=['gin_trgm_ops']
+            ),
         ]
         unique_together = ['group', 'document_type', 'document_number']
     
@@ -220,3 +220,9 @@ class ImportPassengersSerializer(serializers.Serializer):
         if not Group.objects.filter(id=value).exists():
             raise serializers.ValidationError('Group does not exist')
         return value
+
+
+class ExportPassengersSerializer(serializers.Serializer):
+    """Query parameters of the passenger CSV export."""
+
+    group = serializers.UUIDField(required=True)
@@ -0,0 +1,43 @@
+"""
+Celery tasks for circuits app.
+"""
+import csv
+import io
+import tempfile
+
+from celery import shared_task
+from django.core.files import File
+
+from core.common.jobs import JobTask
+from .models import Group, Passenger
+
+EXPORT_FIELDS = [
+    'last_name', 'first_name', 'document_type', 'document_number',
+    'nationality', 'date_of_birth', 'gender', 'email', 'phone',
+    'status', 'is_leader', 'total_price', 'currency',
+    'special_requirements', 'dietary_restrictions',
+]
+
+
+@shared_task(bind=True, base=JobTask)
+def export_passengers_csv(self, job_id, group_id):
+    """Export a group's passengers to a CSV result file."""
+    group = Group.objects.get(pk=group_id)
+    passengers = Passenger.objects.filter(group=group).order_by(
+        'last_name', 'first_name').values_list(*EXPORT_FIELDS)
+    total = passengers.count()
+
+    with tempfile.SpooledTemporaryFile(max_size=5 * 1024 * 1024) as tmp:
+        text = io.TextIOWrapper(tmp, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        writer.writerow(EXPORT_FIELDS)
+        for index, row in enumerate(passengers.iterator(chunk_size=1000), start=1):
+            writer.writerow(row)
+            if index % 500 == 0:
+                self.update_progress(index, total, 'Exporting passengers')
+        text.flush()
+        text.detach()
+        tmp.seek(0)
+        self.save_result_file(f'passengers-{group.code}.csv', File(tmp))
+
+    return {'group': group.code, 'rows': total}
@@ -0,0 +1,165 @@
+"""
+Group operations timeline.
+
+Itinerary days, flights, hotel stays, transfers, special services and staff
+assignments of a group are read with one query per source, each already
+ordered by time, and merged with a heap-based k-way merge. The merged list
+is cached under a version built from MAX(updated_at) and COUNT(*) of every
+source (counts catch deletions), computed in a single query.
+"""
+import hashlib
+import heapq
+from datetime import datetime, time
+
+from django.core.cache import cache
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.operations.models import Hotel, SpecialService, StaffAssignment, Transportation
+from .models import Flight, Group, Itinerary
+
+CACHE_KEY = 'groups:timeline:{}:{}'
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Default times for date-only events
+HOTEL_CHECK_IN_TIME = time(15, 0)
+HOTEL_CHECK_OUT_TIME = time(11, 0)
+DAY_START = time(0, 0)
+
+# Source tables of the cache version
+SOURCES = {
+    'itinerary_items': Itinerary,
+    'flights': Flight,
+    'hotels': Hotel,
+    'transportations': Transportation,
+    'special_services': SpecialService,
+    'staff_assignments': StaffAssignment,
+}
+
+
+def _at(day, at_time=None):
+    """Aware datetime for a local date and optional time."""
+    return timezone.make_aware(datetime.combine(day, at_time or DAY_START))
+
+
+def _event(at, kind, title, source, pk, location='', **extra):
+    return {'at': at, 'type': kind, 'title': title, 'location': location,
+            'source': source, 'id': str(pk), **extra}
+
+
+def timeline_version(group_id):
+    """Version of a group's timeline: MAX(updated_at) and COUNT(*) per source."""
+    annotations = {}
+    for name, model in SOURCES.items():
+        rows = model.objects.filter(group=OuterRef('pk')).order_by().values('group')
+        annotations[f'{name}_max'] = Subquery(rows.annotate(value=Max('updated_at')).values('value'))
+        annotations[f'{name}_count'] = Coalesce(
+            Subquery(rows.annotate(value=Count('pk')).values('value')), 0)
+    values = Group.objects.filter(pk=group_id).annotate(**annotations).values(
+        'updated_at', *annotations).first()
+    if values is None:
+        return None
+    raw = '|'.join(str(values[key]) for key in sorted(values))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _streams(group_id):
+    """One time-ordered event iterator per source."""
+    itinerary = Itinerary.objects.filter(group_id=group_id).order_by(
+        'date', F('start_time').asc(nulls_first=True))
+    yield (
+        _event(_at(item.date, item.start_time), 'itinerary', item.title, 'itinerary',
+               item.pk, item.location, day_number=item.day_number)
+        for item in itinerary
+    )
+
+    flights = list(Flight.objects.filter(group_id=group_id).order_by('departure_datetime'))
+    yield (
+        _event(flight.departure_datetime, 'flight_departure',
+               f'{flight.airline} {flight.flight_number} to {flight.arrival_city}',
+               'flight', flight.pk, flight.departure_airport)
+        for flight in flights
+    )
+    yield (
+        _event(flight.arrival_datetime, 'flight_arrival',
+               f'{flight.airline} {flight.flight_number} from {flight.departure_city}',
+               'flight', flight.pk, flight.arrival_airport)
+        for flight in sorted(flights, key=lambda flight: flight.arrival_datetime)
+    )
+
+    hotels = list(Hotel.objects.filter(group_id=group_id).exclude(
+        status='cancelled').order_by('check_in_date'))
+    yield (
+        _event(_at(hotel.check_in_date, HOTEL_CHECK_IN_TIME), 'hotel_check_in',
+               hotel.hotel_name, 'hotel', hotel.pk, hotel.city)
+        for hotel in hotels
+    )
+    yield (
+        _event(_at(hotel.check_out_date, HOTEL_CHECK_OUT_TIME), 'hotel_check_out',
+               hotel.hotel_name, 'hotel', hotel.pk, hotel.city)
+        for hotel in sorted(hotels, key=lambda hotel: hotel.check_out_date)
+    )
+
+    transfers = list(Transportation.objects.filter(group_id=group_id).exclude(
+        status='cancelled').order_by('pickup_datetime'))
+    yield (
+        _event(transfer.pickup_datetime, 'pickup',
+               f'{transfer.get_transport_type_display()} to {transfer.destination}',
+               'transportation', transfer.pk, transfer.origin)
+        for transfer in transfers
+    )
+    yield (
+        _event(transfer.dropoff_datetime, 'dropoff',
+               f'{transfer.get_transport_type_display()} at {transfer.destination}',
+               'transportation', transfer.pk, transfer.destination)
+        for transfer in sorted(
+            (transfer for transfer in transfers if transfer.dropoff_datetime),
+            key=lambda transfer: transfer.dropoff_datetime)
+    )
+
+    services = SpecialService.objects.filter(group_id=group_id).exclude(
+        status='cancelled').order_by(
+        'service_date', F('start_time').asc(nulls_first=True))
+    yield (
+        _event(_at(service.service_date, service.start_time), 'service', service.name,
+               'special_service', service.pk, service.location)
+        for service in services
+    )
+
+    assignments = list(StaffAssignment.objects.filter(group_id=group_id).exclude(
+        payment_status='cancelled').select_related('staff').order_by('start_date'))
+    yield (
+        _event(_at(assignment.start_date), 'staff_start',
+               f'{assignment.role}: {assignment.staff.full_name}', 'staff_assignment',
+               assignment.pk)
+        for assignment in assignments
+    )
+    yield (
+        _event(_at(assignment.end_date, time.max), 'staff_end',
+               f'{assignment.role}: {assignment.staff.full_name}', 'staff_assignment',
+               assignment.pk)
+        for assignment in sorted(assignments, key=lambda assignment: assignment.end_date)
+    )
+
+
+def build_timeline(group_id):
+    """Merge every source into one chronological list."""
+    events = heapq.merge(*_streams(group_id), key=lambda event: event['at'])
+    return [
+        {**event, 'at': timezone.localtime(event['at']).isoformat()}
+        for event in events
+    ]
+
+
+def get_timeline(group_id):
+    """Cached timeline of a group."""
+    version = timeline_version(group_id)
+    if version is None:
+        return None
+    key = CACHE_KEY.format(group_id, version)
+    events = cache.get(key)
+    if events is None:
+        events = build_timeline(group_id)
+        cache.set(key, events, CACHE_TIMEOUT)
+    return events
@@ -12,10 +12,17 @@ from .models import Program, Group, Passenger, Itinerary, Flight
 from .serializers import (
     ProgramSerializer, GroupListSerializer, GroupDetailSerializer,
     GroupCreateSerializer, PassengerSerializer, PassengerCreateSerializer,
-    ItinerarySerializer, FlightSerializer, ImportPassengersSerializer
+    ItinerarySerializer, FlightSerializer, ImportPassengersSerializer,
+    ExportPassengersSerializer
 )
+from .tasks import export_passengers_csv
+from .timeline import get_timeline
+from apps.financial.models import AccountBalance
+from apps.financial.serializers import AccountBalanceSerializer
+from core.common.jobs import enqueue_job, job_accepted_response
 from core.common.permissions import IsAdmin, IsOperationsManager
 from core.common.pagination import StandardPagination
+from core.common.search import FullTextSearchFilter
 
 
 class ProgramViewSet(viewsets.ModelViewSet):
@@ -101,6 +108,15 @@ class GroupViewSet(viewsets.ModelViewSet):
         serializer = FlightSerializer(flights, many=True)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Get the group's merged schedule (itinerary, flights, hotels, transfers...)."""
+        group = self.get_object()
+        return Response({
+            'group': str(group.pk),
+            'events': get_timeline(group.pk),
+        })
+    
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         """Update group status."""
@@ -132,9 +148,11 @@ class PassengerViewSet(viewsets.ModelViewSet):
     queryset = Passenger.objects.select_related('group').all()
     permission_classes = [IsAuthenticated, IsOperationsManager]
     pagination_class = StandardPagination
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['group', 'status', 'nationality']
     search_fields = ['first_name', 'last_name', 'email', 'document_number']
+    search_vector_field = 'search_vector'
+    search_prefix_fields = ['document_number']
     ordering_fields = ['last_name', 'created_at']
     ordering = ['last_name', 'first_name']
     
@@ -144,6 +162,16 @@ class PassengerViewSet(viewsets.ModelViewSet):
             return PassengerCreateSerializer
         return PassengerSerializer
     
+    @action(detail=True, methods=['get'])
+    def balance(self, request, pk=None):
+        """Get the passenger's materialized balance per currency."""
+        passenger = self.get_object()
+        balances = AccountBalance.objects.filter(passenger=passenger).order_by('currency')
+        return Response({
+            'passenger': passenger.pk,
+            'balances': AccountBalanceSerializer(balances, many=True).data
+        })
+    
     def perform_create(self, serializer):
         """Create passenger and update group count."""
         passenger = serializer.save()
@@ -181,21 +209,23 @@ class PassengerViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def export_passengers(self, request):
         """Export passengers to CSV."""
-        group_id = request.query_params.get('group')
+        serializer = ExportPassengersSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        group_id = str(serializer.validated_data['group'])
         
-        if not group_id:
+        if not Group.objects.filter(id=group_id).exists():
             return Response(
-                {'error': 'Group ID is required'},
-                status=status.HTTP_400_BAD_REQUEST
+                {'error': 'Group does not exist'},
+                status=status.HTTP_404_NOT_FOUND
             )
         
-        # TODO: Implement CSV export logic
-        # This would generate a CSV file with passenger data
-        
-        return Response({
-            'message': 'Export feature coming soon',
-            'group_id': group_id
-        })
+        job = enqueue_job(
+            export_passengers_csv,
+            'export_passengers',
+            user=request.user,
+            params={'group_id': group_id}
+        )
+        return job_accepted_response(job)
 
 
 class ItineraryViewSet(viewsets.ModelViewSet):
@@ -0,0 +1,16 @@
+"""
+Dashboard admin configuration.
+"""
+from django.contrib import admin
+from .models import DashboardKPI
+
+
+@admin.register(DashboardKPI)
+class DashboardKPIAdmin(admin.ModelAdmin):
+    """DashboardKPI admin (read-only)."""
+
+    list_display = ['key', 'refreshed_at']
+    readonly_fields = ['key', 'data', 'refreshed_at']
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,169 @@
+"""
+Dashboard KPI computation and caching.
+
+Each KPI is computed by one function into a JSON payload stored in
+DashboardKPI. Writes to the source tables mark the affected KPIs dirty and
+schedule a debounced partial refresh; a beat task refreshes everything
+periodically (which also rolls date-based KPIs over at midnight). The
+endpoint reads a single cache entry rebuilt after every refresh.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from apps.circuits.models import Group, Passenger
+from apps.financial.models import BankDeposit, GroupCost
+from .models import DashboardKPI
+
+CACHE_KEY = 'dashboard:kpis'
+CACHE_TIMEOUT = 60 * 15
+DIRTY_KEY = 'dashboard:dirty:{}'
+REFRESH_SCHEDULED_KEY = 'dashboard:refresh-scheduled'
+REFRESH_DEBOUNCE_SECONDS = 5
+
+ACTIVE_GROUP_STATUSES = ['confirmed', 'in_progress']
+UPCOMING_DAYS = 14
+UPCOMING_LIMIT = 10
+
+
+def _money_by_currency(queryset, amount_field):
+    return {
+        row['currency']: {'count': row['count'], 'total': str(row['total'] or 0)}
+        for row in queryset.order_by().values('currency').annotate(
+            count=Count('id'), total=Sum(amount_field))
+    }
+
+
+def active_groups(today):
+    rows = Group.objects.filter(
+        status__in=ACTIVE_GROUP_STATUSES, end_date__gte=today
+    ).order_by().values('status').annotate(count=Count('id'))
+    by_status = {row['status']: row['count'] for row in rows}
+    return {'count': sum(by_status.values()), 'by_status': by_status}
+
+
+def passengers_traveling(today):
+    passengers = Passenger.objects.filter(
+        status='confirmed',
+        group__status__in=ACTIVE_GROUP_STATUSES,
+        group__start_date__lte=today,
+        group__end_date__gte=today,
+    )
+    return {
+        'count': passengers.count(),
+        'groups': passengers.values('group_id').distinct().count(),
+    }
+
+
+def pending_deposits(today):
+    return {'by_currency': _money_by_currency(
+        BankDeposit.objects.filter(status='pending'), 'amount')}
+
+
+def unpaid_costs(today):
+    return {'by_currency': _money_by_currency(
+        GroupCost.objects.filter(paid=False), 'total_amount')}
+
+
+def upcoming_departures(today):
+    groups = Group.objects.filter(
+        start_date__gte=today,
+        start_date__lte=today + timedelta(days=UPCOMING_DAYS),
+    ).exclude(status='cancelled').order_by('start_date', 'code').values(
+        'id', 'code', 'name', 'start_date', 'status', 'current_passengers', 'max_passengers'
+    )[:UPCOMING_LIMIT]
+    return {
+        'days': UPCOMING_DAYS,
+        'groups': [
+            {**group, 'id': str(group['id']), 'start_date': group['start_date'].isoformat()}
+            for group in groups
+        ],
+    }
+
+
+KPIS = {
+    'active_groups': active_groups,
+    'passengers_traveling': passengers_traveling,
+    'pending_deposits': pending_deposits,
+    'unpaid_costs': unpaid_costs,
+    'upcoming_departures': upcoming_departures,
+}
+
+# Money totals, shown to finance roles only (see IsFinanceManager)
+FINANCIAL_KPIS = ['pending_deposits', 'unpaid_costs']
+
+# Source model -> KPIs its writes can change
+MODEL_KPIS = {
+    Group: ['active_groups', 'passengers_traveling', 'upcoming_departures'],
+    Passenger: ['passengers_traveling'],
+    BankDeposit: ['pending_deposits'],
+    GroupCost: ['unpaid_costs'],
+}
+
+
+def refresh(keys=None):
+    """
+    Recompute KPIs into DashboardKPI and rebuild the cached payload.
+
+    Args:
+        keys: KPI keys to refresh (default: all)
+    """
+    today = timezone.localdate()
+    now = timezone.now()
+    rows = [
+        DashboardKPI(key=key, data=KPIS[key](today), refreshed_at=now)
+        for key in (keys or KPIS)
+    ]
+    DashboardKPI.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['key'],
+        update_fields=['data', 'refreshed_at'],
+    )
+    return cache_payload()
+
+
+def cache_payload():
+    """Build the endpoint payload from DashboardKPI and cache it."""
+    kpis = {}
+    refreshed_at = None
+    for key, data, kpi_refreshed_at in DashboardKPI.objects.values_list('key', 'data', 'refreshed_at'):
+        kpis[key] = data
+        refreshed_at = max(refreshed_at, kpi_refreshed_at) if refreshed_at else kpi_refreshed_at
+
+    payload = {
+        'kpis': kpis,
+        'refreshed_at': refreshed_at.isoformat() if refreshed_at else None,
+    }
+    cache.set(CACHE_KEY, payload, CACHE_TIMEOUT)
+    return payload
+
+
+def get_payload():
+    """Cached payload, falling back to the summary table."""
+    payload = cache.get(CACHE_KEY)
+    if payload is None:
+        payload = cache_payload()
+    return payload
+
+
+def mark_dirty(keys):
+    """
+    Flag KPIs touched by a write and claim the next debounced refresh.
+
+    Returns:
+        True if the caller should schedule the refresh
+    """
+    cache.set_many({DIRTY_KEY.format(key): True for key in keys}, CACHE_TIMEOUT)
+    return cache.add(REFRESH_SCHEDULED_KEY, True, REFRESH_DEBOUNCE_SECONDS * 2)
+
+
+def pop_dirty():
+    """Take the dirty KPI keys and allow the next refresh to be scheduled."""
+    # Release the schedule first: writes from now on schedule a new refresh
+    cache.delete(REFRESH_SCHEDULED_KEY)
+    flags = cache.get_many([DIRTY_KEY.format(key) for key in KPIS])
+    cache.delete_many(list(flags))
+    return [key for key in KPIS if DIRTY_KEY.format(key) in flags]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardKPI',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(choices=[('active_groups', 'Active Groups'), ('passengers_traveling', 'Passengers Traveling Today'), ('pending_deposits', 'Pending Deposits'), ('unpaid_costs', 'Unpaid Supplier Costs'), ('upcoming_departures', 'Upcoming Departures')], max_length=50, unique=True)),
+                ('data', models.JSONField(default=dict)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Dashboard KPI',
+                'verbose_name_plural': 'Dashboard KPIs',
+                'db_table': 'dashboard_kpis',
+                'ordering': ['key'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+"""
+Dashboard models: DashboardKPI.
+"""
+from django.db import models
+
+
+class DashboardKPI(models.Model):
+    """
+    Precomputed dashboard indicator.
+
+    One row per KPI key holding the JSON payload served to the frontend.
+    Rows are refreshed by apps.dashboard.kpis, never edited by hand.
+    """
+
+    KEY_CHOICES = [
+        ('active_groups', 'Active Groups'),
+        ('passengers_traveling', 'Passengers Traveling Today'),
+        ('pending_deposits', 'Pending Deposits'),
+        ('unpaid_costs', 'Unpaid Supplier Costs'),
+        ('upcoming_departures', 'Upcoming Departures'),
+    ]
+
+    key = models.CharField(max_length=50, choices=KEY_CHOICES, unique=True)
+    data = models.JSONField(default=dict)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'dashboard_kpis'
+        verbose_name = 'Dashboard KPI'
+        verbose_name_plural = 'Dashboard KPIs'
+        ordering = ['key']
+
+    def __str__(self):
+        return f"{self.key} ({self.refreshed_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,36 @@
+"""
+Signal handlers that schedule partial KPI refreshes on writes.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .kpis import MODEL_KPIS, REFRESH_DEBOUNCE_SECONDS, mark_dirty
+
+
+def schedule_refresh(model):
+    """
+    Refresh the KPIs of `model` after commit; for bulk writes, which skip
+    post_save.
+    """
+    keys = MODEL_KPIS[model]
+
+    def schedule():
+        from .tasks import refresh_dirty_dashboard_kpis
+
+        if mark_dirty(keys):
+            refresh_dirty_dashboard_kpis.apply_async(countdown=REFRESH_DEBOUNCE_SECONDS)
+
+    transaction.on_commit(schedule)
+
+
+def _on_change(sender, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_refresh(sender)
+
+
+for model in MODEL_KPIS:
+    post_save.connect(_on_change, sender=model,
+                      dispatch_uid=f'dashboard_save_{model._meta.label}')
+    post_delete.connect(_on_change, sender=model,
+                        dispatch_uid=f'dashboard_delete_{model._meta.label}')
@@ -0,0 +1,21 @@
+"""
+Celery tasks for dashboard app.
+"""
+from celery import shared_task
+
+from .kpis import pop_dirty, refresh
+
+
+@shared_task
+def refresh_dashboard_kpis():
+    """Refresh every KPI (beat schedule)."""
+    refresh()
+
+
+@shared_task
+def refresh_dirty_dashboard_kpis():
+    """Refresh only the KPIs touched by recent writes."""
+    keys = pop_dirty()
+    if keys:
+        refresh(keys)
+    return keys
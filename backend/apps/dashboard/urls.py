@@ -0,0 +1,9 @@
+"""
+Dashboard URL configuration.
+"""
+from django.urls import path
+from .views import DashboardView
+
+urlpatterns = [
+    path('', DashboardView.as_view(), name='dashboard'),
+]
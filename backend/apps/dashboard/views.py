@@ -0,0 +1,28 @@
+"""
+Dashboard views.
+"""
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.common.permissions import IsAuthenticated, IsFinanceManager
+from .kpis import FINANCIAL_KPIS, get_payload
+
+
+class DashboardView(APIView):
+    """
+    Dashboard KPIs: active groups, passengers traveling today, pending
+    deposits, unpaid supplier costs and upcoming departures.
+
+    Served from a single cache entry; values may lag writes by a few seconds.
+    The money KPIs are left out for users without finance access.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        payload = get_payload()
+        if not IsFinanceManager().has_permission(request, self):
+            payload = {**payload, 'kpis': {
+                key: data for key, data in payload['kpis'].items() if key not in FINANCIAL_KPIS
+            }}
+        return Response(payload)
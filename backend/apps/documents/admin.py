@@ -2,7 +2,7 @@
 Documents admin configuration.
 """
 from django.contrib import admin
-from .models import Document
+from .models import Document, DocumentAlert, DocumentBlob, UploadSession
 
 
 @admin.register(Document)
@@ -25,7 +25,7 @@ class DocumentAdmin(admin.ModelAdmin):
         'passenger__last_name', 'supplier__name'
     ]
     readonly_fields = [
-        'file_size', 'mime_type', 'uploaded_by',
+        'file_size', 'mime_type', 'blob', 'uploaded_by',
         'file_url', 'is_expired', 'created_at', 'updated_at'
     ]
     date_hierarchy = 'created_at'
@@ -35,7 +35,7 @@ class DocumentAdmin(admin.ModelAdmin):
             'fields': ('name', 'description', 'document_type')
         }),
         ('File', {
-            'fields': ('file', 'file_url', 'file_size', 'mime_type')
+            'fields': ('file', 'file_url', 'file_size', 'mime_type', 'blob')
         }),
         ('Related To', {
             'fields': ('related_to', 'group', 'passenger', 'supplier')
@@ -73,5 +73,51 @@ class DocumentAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         """Optimize queryset with select_related."""
         return super().get_queryset(request).select_related(
-            'group', 'passenger', 'supplier', 'uploaded_by'
+            'group', 'passenger', 'supplier', 'uploaded_by', 'blob'
         )
+
+
+@admin.register(DocumentBlob)
+class DocumentBlobAdmin(admin.ModelAdmin):
+    """Stored document content."""
+
+    list_display = ['sha256', 'mime_type', 'size', 'processing_status', 'created_at']
+    list_filter = ['mime_type', 'processing_status']
+    search_fields = ['sha256']
+    readonly_fields = [
+        'sha256', 'file', 'size', 'mime_type', 'thumbnail', 'preview',
+        'processing_status', 'processing_error', 'created_at', 'updated_at'
+    ]
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    """Direct upload sessions."""
+
+    list_display = ['filename', 'size', 'backend', 'received', 'status',
+                    'created_by', 'expires_at', 'created_at']
+    list_filter = ['backend', 'status']
+    search_fields = ['filename', 'created_by__email']
+    readonly_fields = [
+        'filename', 'size', 'content_type', 'backend', 'storage_name', 's3_upload_id',
+        'received', 'status', 'error', 'expires_at', 'metadata', 'document',
+        'created_by', 'created_at', 'updated_at'
+    ]
+
+
+@admin.register(DocumentAlert)
+class DocumentAlertAdmin(admin.ModelAdmin):
+    """Document expiry alerts."""
+
+    list_display = ['document', 'alert_type', 'expires_at', 'required_until',
+                    'group', 'passenger', 'notified_at']
+    list_filter = ['alert_type', 'expires_at', 'notified_at']
+    search_fields = ['document__name', 'group__code', 'passenger__last_name']
+    readonly_fields = [
+        'document', 'alert_type', 'expires_at', 'required_until', 'group', 'passenger',
+        'scanned_at', 'notified_at', 'created_at', 'updated_at'
+    ]
+
+    def get_queryset(self, request):
+        """Optimize queryset with select_related."""
+        return super().get_queryset(request).select_related('document', 'group', 'passenger')
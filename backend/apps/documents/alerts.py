@@ -0,0 +1,209 @@
+"""
+Document expiry alerts.
+
+A daily scan walks non-archived documents by (expires_at, id) in keyset
+batches over the documents_expiry_scan index, up to the furthest date any
+rule can reach, and upserts DocumentAlert rows:
+
+- expired: expires_at is past
+- expiring: expires_at within EXPIRY_WARNING_DAYS
+- passport_validity: a passport of a running or upcoming group expires
+  before the group's end date + PASSPORT_VALIDITY_MONTHS
+
+Rows the scan did not touch no longer apply (renewed, archived, deleted)
+and are removed. Digests of alerts not notified yet are mailed in one batch,
+grouped by group and passenger: operations managers get every alert, tour
+conductors those of their groups.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Count, DateField, F, Func, Max, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.authentication.models import User
+from apps.circuits.models import Group
+from .models import Document, DocumentAlert
+
+EXPIRY_WARNING_DAYS = 30
+PASSPORT_VALIDITY_MONTHS = 6
+SCAN_BATCH_SIZE = 1000
+ALERT_GROUP_STATUSES = ['planning', 'confirmed', 'in_progress']
+
+
+class AddMonths(Func):
+    """date + N months (Postgres interval arithmetic)."""
+
+    template = "(%(expressions)s + interval '%(months)s months')::date"
+    output_field = DateField()
+
+    def __init__(self, expression, months, **extra):
+        super().__init__(expression, months=int(months), **extra)
+
+
+def scan_horizon(today):
+    """Furthest expiry date any rule can flag."""
+    horizon = today + timedelta(days=EXPIRY_WARNING_DAYS)
+    latest = Group.objects.filter(
+        status__in=ALERT_GROUP_STATUSES, end_date__gte=today
+    ).aggregate(value=Max(AddMonths('end_date', PASSPORT_VALIDITY_MONTHS)))['value']
+    return max(horizon, latest) if latest else horizon
+
+
+def _batches(horizon):
+    """Documents expiring up to horizon, in keyset batches of (expires_at, id)."""
+    rows = Document.objects.filter(
+        is_archived=False, expires_at__isnull=False, expires_at__lte=horizon
+    ).annotate(
+        alert_group=Coalesce(F('group_id'), F('passenger__group_id')),
+        alert_group_status=Coalesce(F('group__status'), F('passenger__group__status')),
+        alert_group_end=Coalesce(F('group__end_date'), F('passenger__group__end_date')),
+    ).values(
+        'pk', 'document_type', 'expires_at', 'passenger_id',
+        'alert_group', 'alert_group_status', 'alert_group_end',
+    ).order_by('expires_at', 'pk')
+
+    last = None
+    while True:
+        page = rows
+        if last is not None:
+            page = page.filter(
+                Q(expires_at__gt=last[0]) | Q(expires_at=last[0], pk__gt=last[1]))
+        batch = list(page[:SCAN_BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last = (batch[-1]['expires_at'], batch[-1]['pk'])
+
+
+def _month_offset(day, months):
+    """day + months, clamped to the end of shorter months."""
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    for candidate in (day.day, 30, 29, 28):
+        try:
+            return day.replace(year=year, month=month, day=candidate)
+        except ValueError:
+            continue
+
+
+def alerts_for(row, today, now):
+    """DocumentAlert rows raised by one scanned document."""
+    common = {
+        'document_id': row['pk'], 'expires_at': row['expires_at'],
+        'group_id': row['alert_group'], 'passenger_id': row['passenger_id'],
+        'scanned_at': now,
+    }
+    alerts = []
+    if row['expires_at'] < today:
+        alerts.append(DocumentAlert(alert_type='expired', **common))
+    elif row['expires_at'] <= today + timedelta(days=EXPIRY_WARNING_DAYS):
+        alerts.append(DocumentAlert(alert_type='expiring', **common))
+
+    if row['document_type'] == 'passport' and row['alert_group_end'] \
+            and row['alert_group_status'] in ALERT_GROUP_STATUSES \
+            and row['alert_group_end'] >= today:
+        required_until = _month_offset(row['alert_group_end'], PASSPORT_VALIDITY_MONTHS)
+        if row['expires_at'] < required_until:
+            alerts.append(DocumentAlert(
+                alert_type='passport_validity', required_until=required_until, **common))
+    return alerts
+
+
+def scan_expiries(today=None):
+    """
+    Refresh the alerts table.
+
+    Returns:
+        Dict with the scanned documents and current alerts per type
+    """
+    today = today or timezone.localdate()
+    started = timezone.now()
+    scanned = 0
+    for batch in _batches(scan_horizon(today)):
+        scanned += len(batch)
+        alerts = [alert for row in batch for alert in alerts_for(row, today, started)]
+        DocumentAlert.objects.bulk_create(
+            alerts,
+            update_conflicts=True,
+            unique_fields=['document', 'alert_type', 'expires_at'],
+            update_fields=['required_until', 'group', 'passenger', 'scanned_at', 'updated_at'],
+        )
+
+    removed, _ = DocumentAlert.objects.filter(scanned_at__lt=started).delete()
+    counts = dict(DocumentAlert.objects.order_by().values('alert_type').annotate(
+        count=Count('pk')).values_list('alert_type', 'count'))
+    return {'scanned': scanned, 'removed': removed, 'alerts': counts}
+
+
+def _describe(alert):
+    document = alert.document
+    text = f"{document.get_document_type_display()} \"{document.name}\" "
+    if alert.alert_type == 'expired':
+        text += f"expired on {alert.expires_at}"
+    elif alert.alert_type == 'expiring':
+        text += f"expires on {alert.expires_at}"
+    else:
+        text += f"expires on {alert.expires_at}, must be valid until {alert.required_until}"
+    return text
+
+
+def _digest_body(alerts):
+    lines = []
+    for group, group_alerts in groupby(alerts, key=lambda alert: alert.group):
+        lines.append(f"{group.code} - {group.name} ({group.start_date} - {group.end_date})"
+                     if group else 'Documents without group')
+        for passenger, passenger_alerts in groupby(group_alerts, key=lambda alert: alert.passenger):
+            indent = '  '
+            if passenger:
+                lines.append(f"  {passenger.full_name}")
+                indent = '    '
+            lines.extend(f"{indent}- {_describe(alert)}" for alert in passenger_alerts)
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def send_digests():
+    """
+    Mail the alerts not notified yet, one digest per recipient.
+
+    Returns:
+        Dict with the digests sent and alerts notified
+    """
+    alerts = list(DocumentAlert.objects.filter(notified_at__isnull=True).select_related(
+        'document', 'group', 'group__tour_conductor', 'passenger'
+    ).order_by('group__code', 'group_id', 'passenger__last_name', 'passenger__first_name',
+               'passenger_id', 'alert_type', 'expires_at'))
+    if not alerts:
+        return {'digests': 0, 'alerts': 0}
+
+    recipients = {}
+    managers = list(User.objects.filter(
+        is_active=True, role='operations_manager').exclude(email='').values_list('email', flat=True))
+    for email in managers:
+        recipients[email] = alerts
+    for alert in alerts:
+        conductor = alert.group.tour_conductor if alert.group else None
+        if conductor and conductor.is_active and conductor.email and conductor.email not in managers:
+            recipients.setdefault(conductor.email, []).append(alert)
+
+    today = timezone.localdate()
+    messages = [
+        EmailMessage(
+            subject=f"Document expiry alerts - {today} ({len(recipient_alerts)})",
+            body=_digest_body(recipient_alerts),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email],
+        )
+        for email, recipient_alerts in recipients.items()
+    ]
+    if not messages:
+        return {'digests': 0, 'alerts': 0}
+
+    get_connection().send_messages(messages)
+    notified = {alert.pk for recipient_alerts in recipients.values() for alert in recipient_alerts}
+    DocumentAlert.objects.filter(pk__in=notified).update(notified_at=timezone.now())
+    return {'digests': len(messages), 'alerts': len(notified)}
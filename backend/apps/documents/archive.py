@@ -0,0 +1,130 @@
+"""
+Streaming ZIP export of documents.
+
+zipfile writes to an unseekable sink (sizes and CRCs go to data
+descriptors after each entry), and the sink is drained after every chunk,
+so neither the archive nor a whole document is held in memory or on disk.
+Entries larger than 4 GB, archives past 4 GB and more than 65535 entries use
+ZIP64 records. Files already compressed (images, PDFs, Office files, ZIPs)
+are stored, the rest deflated.
+"""
+import io
+import os
+import zipfile
+
+from botocore.exceptions import ClientError
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .direct_uploads import uses_s3
+
+CHUNK_SIZE = 1024 * 1024
+STORED_EXTENSIONS = {
+    'jpg', 'jpeg', 'png', 'gif', 'pdf', 'zip', 'docx', 'xlsx',
+}
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable write target collecting the bytes written since the last drain."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def read_chunks(name):
+    """Chunks of a stored file, streamed from S3 without a local copy."""
+    if uses_s3():
+        body = default_storage.connection.meta.client.get_object(
+            Bucket=default_storage.bucket_name,
+            Key=default_storage._normalize_name(name))['Body']
+        try:
+            yield from body.iter_chunks(CHUNK_SIZE)
+        finally:
+            body.close()
+        return
+
+    with default_storage.open(name, 'rb') as handle:
+        yield from handle.chunks(CHUNK_SIZE)
+
+
+def _arcname(document, taken):
+    """Unique archive path: <document type>/[<passenger>/]<name><ext>."""
+    extension = os.path.splitext(document.file.name)[1].lower()
+    base = get_valid_filename(document.name) or 'document'
+    if base.lower().endswith(extension):
+        base = base[:-len(extension)]
+    folder = document.document_type
+    if document.passenger_id:
+        folder = f'{folder}/{get_valid_filename(document.passenger.full_name)}'
+
+    arcname = f'{folder}/{base}{extension}'
+    counter = 2
+    while arcname in taken:
+        arcname = f'{folder}/{base} ({counter}){extension}'
+        counter += 1
+    taken.add(arcname)
+    return arcname
+
+
+def _zip_info(document, arcname):
+    modified = timezone.localtime(document.updated_at)
+    # ZIP timestamps start in 1980
+    info = zipfile.ZipInfo(arcname, date_time=max(modified.timetuple()[:6], (1980, 1, 1, 0, 0, 0)))
+    info.external_attr = 0o644 << 16
+    extension = os.path.splitext(arcname)[1].lstrip('.')
+    info.compress_type = (
+        zipfile.ZIP_STORED if extension in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED)
+    if document.file_size is not None:
+        # Lets zipfile pick ZIP64 headers only for entries that need them
+        info.file_size = document.file_size
+    return info
+
+
+def iter_documents_zip(documents):
+    """
+    Yield a ZIP archive of documents chunk by chunk.
+
+    Args:
+        documents: Iterable of Document (passenger selected if related)
+    """
+    sink = _Sink()
+    missing = []
+    taken = set()
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as archive:
+        for document in documents:
+            if not document.file:
+                continue
+            arcname = _arcname(document, taken)
+            try:
+                chunks = read_chunks(document.file.name)
+                first = next(chunks, b'')
+            except (OSError, ClientError):
+                missing.append(arcname)
+                continue
+
+            info = _zip_info(document, arcname)
+            with archive.open(info, 'w', force_zip64=document.file_size is None) as entry:
+                entry.write(first)
+                for chunk in chunks:
+                    yield sink.drain()
+                    entry.write(chunk)
+            yield sink.drain()
+
+        if missing:
+            archive.writestr(
+                'MISSING.txt', 'Files not found in storage:\n' + '\n'.join(missing) + '\n')
+    yield sink.drain()
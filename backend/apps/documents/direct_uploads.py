@@ -0,0 +1,300 @@
+"""
+Direct and resumable document uploads.
+
+Large files do not go through a multipart form post. The client opens an
+UploadSession and then sends the bytes:
+
+- S3 storage: the file goes straight to the bucket as an S3 multipart
+  upload. Each part is PUT to a presigned URL, so the web workers never see
+  the bytes, and parts can be retried or resumed after a dropped connection.
+- Local storage (MEDIA_ROOT): the file is PUT in chunks carrying a
+  `Content-Range: bytes start-end/total` header and written at that offset
+  into a partial file. The session's `received` offset tells a client
+  where to resume.
+
+Finalizing completes the upload and queues a job that runs the regular
+pipeline (MIME sniffing, SHA-256 dedup, previews) and creates the Document.
+Set AWS_S3_ENDPOINT_URL to point the S3 backend at MinIO or another
+S3-compatible server locally.
+"""
+import math
+import os
+import re
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from .models import UploadSession
+from .uploads import UploadRejected, inspect_upload, store_blob
+
+PART_SIZE = 8 * 1024 * 1024
+SESSION_TTL = timedelta(hours=24)
+# A finalization job taking longer than this is assumed dead
+FINALIZE_TIMEOUT = timedelta(hours=6)
+URL_EXPIRES = 60 * 60
+# Document.file_size is a 32-bit integer
+MAX_UPLOAD_SIZE = 2 ** 31 - 1
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    """The request does not fit the upload session."""
+
+
+class OffsetMismatch(UploadError):
+    """A chunk does not start where the partial file ends."""
+
+    def __init__(self, received):
+        super().__init__(f'Expected a chunk starting at byte {received}')
+        self.received = received
+
+
+def uses_s3():
+    """Whether media files are stored in S3 (django-storages)."""
+    return hasattr(default_storage, 'bucket_name')
+
+
+def _client():
+    return default_storage.connection.meta.client
+
+
+def _key(session):
+    """Object key of an S3 session, with the storage location prefix."""
+    return default_storage._normalize_name(session.storage_name)
+
+
+def part_count(size):
+    """Number of PART_SIZE parts of an upload."""
+    return max(1, math.ceil(size / PART_SIZE))
+
+
+def start_session(user, filename, size, content_type=''):
+    """Open an upload session on the configured storage."""
+    session = UploadSession(
+        filename=get_valid_filename(os.path.basename(filename)),
+        size=size,
+        content_type=content_type,
+        created_by=user,
+        expires_at=timezone.now() + SESSION_TTL,
+    )
+    session.storage_name = f'uploads/{session.pk}/{session.filename}'
+    if uses_s3():
+        session.backend = 's3'
+        response = _client().create_multipart_upload(
+            Bucket=default_storage.bucket_name, Key=_key(session),
+            ContentType=content_type or 'application/octet-stream')
+        session.s3_upload_id = response['UploadId']
+    else:
+        session.backend = 'local'
+        path = default_storage.path(session.storage_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as handle:
+            handle.truncate(size)
+    session.save()
+    return session
+
+
+def _uploaded_parts(session):
+    parts = []
+    paginator = _client().get_paginator('list_parts')
+    for page in paginator.paginate(Bucket=default_storage.bucket_name, Key=_key(session),
+                                   UploadId=session.s3_upload_id):
+        parts.extend(page.get('Parts', []))
+    return parts
+
+
+def upload_instructions(session):
+    """
+    What the client still has to send.
+
+    S3: presigned URLs of the parts not uploaded yet. Local: the offset to
+    resume from.
+    """
+    if session.backend == 'local':
+        return {
+            'method': 'PUT',
+            'chunk_size': PART_SIZE,
+            'received': session.received,
+        }
+
+    done = {part['PartNumber'] for part in _uploaded_parts(session)}
+    client = _client()
+    return {
+        'method': 'PUT',
+        'part_size': PART_SIZE,
+        'uploaded_parts': sorted(done),
+        'parts': [
+            {
+                'part_number': number,
+                'url': client.generate_presigned_url(
+                    'upload_part',
+                    Params={'Bucket': default_storage.bucket_name, 'Key': _key(session),
+                            'UploadId': session.s3_upload_id, 'PartNumber': number},
+                    ExpiresIn=URL_EXPIRES),
+            }
+            for number in range(1, part_count(session.size) + 1)
+            if number not in done
+        ],
+    }
+
+
+def write_chunk(session, content_range, data):
+    """
+    Write one chunk of a local upload at its offset.
+
+    Returns:
+        Bytes received so far
+    """
+    if session.backend != 'local':
+        raise UploadError('Chunks are only accepted by local uploads')
+    if session.status != 'uploading':
+        raise UploadError(f'Upload is {session.status}')
+
+    match = CONTENT_RANGE_RE.match(content_range or '')
+    if not match:
+        raise UploadError('Content-Range header "bytes start-end/total" is required')
+    start, end, total = (int(value) for value in match.groups())
+    if total != session.size or end - start + 1 != len(data) or end >= total:
+        raise UploadError('Content-Range does not match the upload or the body')
+    if len(data) > PART_SIZE:
+        raise UploadError(f'Chunks are at most {PART_SIZE} bytes')
+    if start != session.received:
+        raise OffsetMismatch(session.received)
+
+    fd = os.open(default_storage.path(session.storage_name), os.O_WRONLY)
+    try:
+        os.pwrite(fd, data, start)
+    finally:
+        os.close(fd)
+
+    # Another request may have written the same range meanwhile
+    received = end + 1
+    if not UploadSession.objects.filter(
+        pk=session.pk, status='uploading', received=start
+    ).update(received=received, updated_at=timezone.now()):
+        session.refresh_from_db(fields=['received'])
+        raise OffsetMismatch(session.received)
+    session.received = received
+    return received
+
+
+def complete_upload(session, parts=None):
+    """
+    Close the byte transfer of a session and move it to `finalizing`.
+
+    The status flips with a conditional UPDATE first, so of two concurrent
+    calls only one completes the upload; on failure the session goes back
+    to `uploading` and can be completed again.
+
+    Args:
+        parts: S3 parts as [{'part_number', 'etag'}]; listed from S3 if omitted
+    """
+    claimed = UploadSession.objects.filter(pk=session.pk, status='uploading').update(
+        status='finalizing', updated_at=timezone.now())
+    if not claimed:
+        session.refresh_from_db(fields=['status'])
+        raise UploadError(f'Upload is {session.status}')
+
+    try:
+        _complete_transfer(session, parts)
+    except Exception:
+        UploadSession.objects.filter(pk=session.pk, status='finalizing').update(
+            status='uploading', updated_at=timezone.now())
+        raise
+    session.status = 'finalizing'
+
+
+def _complete_transfer(session, parts):
+    if session.backend == 'local':
+        if session.received != session.size:
+            raise UploadError(f'{session.received} of {session.size} bytes received')
+        return
+
+    if parts:
+        parts = [{'PartNumber': int(part['part_number']), 'ETag': part['etag']}
+                 for part in parts]
+    else:
+        parts = [{'PartNumber': part['PartNumber'], 'ETag': part['ETag']}
+                 for part in _uploaded_parts(session)]
+    if len(parts) != part_count(session.size):
+        raise UploadError(f'{len(parts)} of {part_count(session.size)} parts uploaded')
+
+    client = _client()
+    client.complete_multipart_upload(
+        Bucket=default_storage.bucket_name, Key=_key(session),
+        UploadId=session.s3_upload_id,
+        MultipartUpload={'Parts': sorted(parts, key=lambda part: part['PartNumber'])})
+    head = client.head_object(Bucket=default_storage.bucket_name, Key=_key(session))
+    if head['ContentLength'] != session.size:
+        raise UploadError(f"{head['ContentLength']} of {session.size} bytes uploaded")
+
+
+def discard(session):
+    """Drop the bytes of a session (aborted, expired or finalized)."""
+    if session.backend == 's3' and session.status == 'uploading':
+        _client().abort_multipart_upload(
+            Bucket=default_storage.bucket_name, Key=_key(session),
+            UploadId=session.s3_upload_id)
+    else:
+        default_storage.delete(session.storage_name)
+
+
+def abort_session(session, status='aborted'):
+    """Discard a session's bytes and close it."""
+    discard(session)
+    UploadSession.objects.filter(pk=session.pk).update(
+        status=status, updated_at=timezone.now())
+    session.status = status
+
+
+def finalize_session(session, build_document):
+    """
+    Run the upload pipeline on a completed session and create its Document.
+
+    On any failure the session is marked failed and its bytes are dropped.
+
+    Args:
+        build_document: Callable (blob) -> saved Document
+
+    Returns:
+        (Document, blob_created)
+    """
+    try:
+        with default_storage.open(session.storage_name, 'rb') as handle:
+            uploaded = File(handle, name=session.filename)
+            mime_type = inspect_upload(uploaded)
+            blob, created = store_blob(uploaded, mime_type)
+
+        with transaction.atomic():
+            document = build_document(blob)
+            finished = UploadSession.objects.filter(pk=session.pk, status='finalizing').update(
+                status='completed', document=document, updated_at=timezone.now())
+            if not finished:
+                raise UploadError('Upload was closed while it was being finalized')
+    except Exception as exc:
+        error = str(exc) if isinstance(exc, UploadRejected) else f"{type(exc).__name__}: {exc}"
+        UploadSession.objects.filter(pk=session.pk, status='finalizing').update(
+            status='failed', error=error, updated_at=timezone.now())
+        default_storage.delete(session.storage_name)
+        raise
+
+    default_storage.delete(session.storage_name)
+    return document, created
+
+
+def expired_sessions():
+    """
+    Sessions to clean up: uploads not finished in time, and finalizations
+    whose worker died (still `finalizing` after FINALIZE_TIMEOUT).
+    """
+    now = timezone.now()
+    return UploadSession.objects.filter(
+        Q(status='uploading', expires_at__lt=now)
+        | Q(status='finalizing', updated_at__lt=now - FINALIZE_TIMEOUT)
+    )
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:35
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_search_configuration'),
+        ('circuits', '0002_passenger_search_vector'),
+        ('documents', '0001_initial'),
+        ('suppliers', '0002_supplier_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='documents_search_gin'),
+        ),
+        migrations.RunSQL(
+            sql="""
+                CREATE FUNCTION documents_search_vector_update() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector :=
+                        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.name, '')), 'A') ||
+                        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.tags::text, '')), 'B') ||
+                        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.description, '')), 'C') ||
+                        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.notes, '')), 'D');
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql;
+
+                CREATE TRIGGER documents_search_vector_trigger
+                    BEFORE INSERT OR UPDATE OF name, description, tags, notes
+                    ON documents FOR EACH ROW
+                    EXECUTE FUNCTION documents_search_vector_update();
+
+                UPDATE documents SET name = name;
+            """,
+            reverse_sql="""
+                DROP TRIGGER IF EXISTS documents_search_vector_trigger ON documents;
+                DROP FUNCTION IF EXISTS documents_search_vector_update();
+            """,
+        ),
+    ]
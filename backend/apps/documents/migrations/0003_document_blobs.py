@@ -0,0 +1,42 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:12
+
+import apps.documents.models
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_document_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentBlob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(max_length=255, upload_to=apps.documents.models.blob_upload_to)),
+                ('size', models.BigIntegerField(help_text='File size in bytes')),
+                ('mime_type', models.CharField(max_length=100)),
+                ('thumbnail', models.FileField(blank=True, max_length=255, upload_to='blobs/thumbnails/')),
+                ('preview', models.FileField(blank=True, max_length=255, upload_to='blobs/previews/')),
+                ('processing_status', models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('processing_error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Document Blob',
+                'verbose_name_plural': 'Document Blobs',
+                'db_table': 'document_blobs',
+            },
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='documents', to='documents.documentblob'),
+        ),
+    ]
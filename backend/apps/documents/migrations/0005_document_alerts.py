@@ -0,0 +1,73 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:17
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circuits', '0002_passenger_search_vector'),
+        ('documents', '0004_upload_sessions'),
+        ('suppliers', '0002_supplier_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentAlert',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('alert_type', models.CharField(choices=[('expired', 'Expired'), ('expiring', 'Expiring Soon'), ('passport_validity', 'Passport Validity')], max_length=20)),
+                ('expires_at', models.DateField()),
+                ('required_until', models.DateField(blank=True, null=True)),
+                ('scanned_at', models.DateTimeField()),
+                ('notified_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Document Alert',
+                'verbose_name_plural': 'Document Alerts',
+                'db_table': 'document_alerts',
+                'ordering': ['expires_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False), ('is_archived', False)), fields=['expires_at', 'id'], name='documents_expiry_scan'),
+        ),
+        migrations.AddField(
+            model_name='documentalert',
+            name='document',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='documents.document'),
+        ),
+        migrations.AddField(
+            model_name='documentalert',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='document_alerts', to='circuits.group'),
+        ),
+        migrations.AddField(
+            model_name='documentalert',
+            name='passenger',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='document_alerts', to='circuits.passenger'),
+        ),
+        migrations.AddIndex(
+            model_name='documentalert',
+            index=models.Index(fields=['alert_type', 'expires_at'], name='document_al_alert_t_7eff35_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentalert',
+            index=models.Index(fields=['scanned_at'], name='document_al_scanned_18c3d4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentalert',
+            index=models.Index(condition=models.Q(('notified_at__isnull', True)), fields=['group', 'passenger'], name='document_alerts_pending'),
+        ),
+        migrations.AddConstraint(
+            model_name='documentalert',
+            constraint=models.UniqueConstraint(fields=('document', 'alert_type', 'expires_at'), name='document_alerts_unique'),
+        ),
+    ]
@@ -1,13 +1,56 @@
 """
 Documents models.
 """
+import os
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import FileExtensionValidator
 from core.common.models import TimeStampedModel
 from apps.circuits.models import Group, Passenger
 from apps.suppliers.models import Supplier
 
 
+def blob_upload_to(instance, filename):
+    """Content-addressed path: blobs/ab/cd/<sha256><ext>."""
+    extension = os.path.splitext(filename)[1].lower()
+    sha = instance.sha256
+    return f'blobs/{sha[:2]}/{sha[2:4]}/{sha}{extension}'
+
+
+class DocumentBlob(TimeStampedModel):
+    """Stored file content, shared by every document with the same SHA-256."""
+
+    PROCESSING_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ready', 'Ready'),
+        ('skipped', 'Skipped'),
+        ('failed', 'Failed'),
+    ]
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to=blob_upload_to, max_length=255)
+    size = models.BigIntegerField(help_text='File size in bytes')
+    mime_type = models.CharField(max_length=100)
+
+    # Generated in the background for images
+    thumbnail = models.FileField(upload_to='blobs/thumbnails/', max_length=255, blank=True)
+    preview = models.FileField(upload_to='blobs/previews/', max_length=255, blank=True)
+    processing_status = models.CharField(
+        max_length=20, choices=PROCESSING_STATUS_CHOICES, default='pending')
+    processing_error = models.TextField(blank=True)
+
+    class Meta:
+        db_table = 'document_blobs'
+        verbose_name = 'Document Blob'
+        verbose_name_plural = 'Document Blobs'
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.mime_type})"
+
+
 class Document(TimeStampedModel):
     """Documents storage (contracts, invoices, travel docs, etc.)."""
     
@@ -53,6 +96,13 @@ class Document(TimeStampedModel):
     )
     file_size = models.IntegerField(help_text='File size in bytes', null=True, blank=True)
     mime_type = models.CharField(max_length=100, blank=True)
+    blob = models.ForeignKey(
+        DocumentBlob,
+        on_delete=models.PROTECT,
+        related_name='documents',
+        null=True,
+        blank=True
+    )
     
     # Related to
     related_to = models.CharField(max_length=20, choices=RELATED_TO_CHOICES)
@@ -97,6 +147,9 @@ class Document(TimeStampedModel):
     # Notes
     notes = models.TextField(blank=True)
     
+    # Full-text search (maintained by a database trigger)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     class Meta:
         db_table = 'documents'
         verbose_name = 'Document'
@@ -109,6 +162,11 @@ class Document(TimeStampedModel):
             models.Index(fields=['supplier', 'document_type']),
             models.Index(fields=['is_archived', 'created_at']),
             models.Index(fields=['expires_at']),
+            # Keyset scan of the expiry alerts
+            models.Index(
+                fields=['expires_at', 'id'], name='documents_expiry_scan',
+                condition=models.Q(is_archived=False, expires_at__isnull=False)),
+            GinIndex(fields=['search_vector'], name='documents_search_gin'),
         ]
     
     def __str__(self):
@@ -116,8 +174,11 @@ class Document(TimeStampedModel):
     
     def save(self, *args, **kwargs):
         """Set file size and validate related_to."""
-        if self.file:
+        if self.file and not self.file._committed:
+            # Fresh upload: size of the local file, no storage round-trip
             self.file_size = self.file.size
+        elif self.blob_id and self.file_size is None:
+            self.file_size = self.blob.size
         
         # Validate related_to matches the foreign key
         if self.related_to == 'group' and not self.group:
@@ -136,6 +197,20 @@ class Document(TimeStampedModel):
             return self.file.url
         return None
     
+    @property
+    def thumbnail_url(self):
+        """Get thumbnail URL, once generated."""
+        if self.blob_id and self.blob.thumbnail:
+            return self.blob.thumbnail.url
+        return None
+
+    @property
+    def preview_url(self):
+        """Get compressed preview URL, once generated."""
+        if self.blob_id and self.blob.preview:
+            return self.blob.preview.url
+        return None
+
     @property
     def is_expired(self):
         """Check if document is expired."""
@@ -143,3 +218,125 @@ class Document(TimeStampedModel):
             from django.utils import timezone
             return self.expires_at < timezone.now().date()
         return False
+
+
+class UploadSession(TimeStampedModel):
+    """
+    Direct upload in progress: an S3 multipart upload or a partial local file
+    written in chunks. The Document is created when the session is finalized.
+    """
+
+    BACKEND_CHOICES = [
+        ('s3', 'S3'),
+        ('local', 'Local'),
+    ]
+
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('finalizing', 'Finalizing'),
+        ('completed', 'Completed'),
+        ('aborted', 'Aborted'),
+        ('failed', 'Failed'),
+    ]
+
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField(help_text='Total size in bytes')
+    content_type = models.CharField(max_length=100, blank=True)
+
+    # Storage
+    backend = models.CharField(max_length=10, choices=BACKEND_CHOICES)
+    storage_name = models.CharField(max_length=255)
+    s3_upload_id = models.CharField(max_length=1024, blank=True)
+    received = models.BigIntegerField(default=0, help_text='Bytes written (local backend)')
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    error = models.TextField(blank=True)
+    expires_at = models.DateTimeField()
+
+    # Document fields, stored until the upload is finalized
+    metadata = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    document = models.ForeignKey(
+        Document,
+        on_delete=models.SET_NULL,
+        related_name='upload_sessions',
+        null=True,
+        blank=True
+    )
+    created_by = models.ForeignKey(
+        'authentication.User',
+        on_delete=models.CASCADE,
+        related_name='document_upload_sessions'
+    )
+
+    class Meta:
+        db_table = 'document_upload_sessions'
+        verbose_name = 'Upload Session'
+        verbose_name_plural = 'Upload Sessions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+            models.Index(fields=['created_by', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+
+class DocumentAlert(TimeStampedModel):
+    """
+    Precomputed expiry alert of a document, maintained by the daily scan
+    (see alerts.py). One row per document, alert type and expiry date, so a
+    renewed document raises (and notifies) a fresh alert.
+    """
+
+    ALERT_TYPE_CHOICES = [
+        ('expired', 'Expired'),
+        ('expiring', 'Expiring Soon'),
+        ('passport_validity', 'Passport Validity'),
+    ]
+
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='alerts')
+    alert_type = models.CharField(max_length=20, choices=ALERT_TYPE_CHOICES)
+    expires_at = models.DateField()
+    # Passport validity: date the passport must remain valid until
+    required_until = models.DateField(null=True, blank=True)
+
+    # Denormalized from the document (or its passenger) for digests
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='document_alerts',
+        null=True,
+        blank=True
+    )
+    passenger = models.ForeignKey(
+        Passenger,
+        on_delete=models.CASCADE,
+        related_name='document_alerts',
+        null=True,
+        blank=True
+    )
+
+    scanned_at = models.DateTimeField()
+    notified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'document_alerts'
+        verbose_name = 'Document Alert'
+        verbose_name_plural = 'Document Alerts'
+        ordering = ['expires_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['document', 'alert_type', 'expires_at'],
+                name='document_alerts_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['alert_type', 'expires_at']),
+            models.Index(fields=['scanned_at']),
+            models.Index(
+                fields=['group', 'passenger'], name='document_alerts_pending',
+                condition=models.Q(notified_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.get_alert_type_display()}: {self.document_id} ({self.expires_at})"
@@ -1,14 +1,46 @@
 """
 Documents serializers.
 """
+import os
+
 from rest_framework import serializers
-from .models import Document
+from .direct_uploads import MAX_UPLOAD_SIZE
+from .models import Document, DocumentAlert, UploadSession
+from .uploads import UploadRejected, inspect_upload, store_blob
+
+
+def store_upload(validated_data):
+    """Replace the uploaded file by its content-addressed blob."""
+    file = validated_data.get('file')
+    if file is None or not hasattr(file, 'chunks'):
+        return validated_data
+    blob, _ = store_blob(file, inspect_upload(file))
+    validated_data.update(
+        file=blob.file.name, blob=blob, mime_type=blob.mime_type, file_size=blob.size)
+    return validated_data
+
+
+class UploadedFileMixin:
+    """Sniff the real MIME type of an uploaded file."""
 
+    def validate_file(self, file):
+        """Reject files whose content does not match their extension."""
+        try:
+            inspect_upload(file)
+        except UploadRejected as exc:
+            raise serializers.ValidationError(str(exc))
+        return file
 
-class DocumentSerializer(serializers.ModelSerializer):
+
+class DocumentSerializer(UploadedFileMixin, serializers.ModelSerializer):
     """Document serializer."""
 
     file_url = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+    checksum = serializers.CharField(source='blob.sha256', read_only=True)
+    processing_status = serializers.CharField(
+        source='blob.processing_status', read_only=True)
     uploaded_by_name = serializers.CharField(
         source='uploaded_by.get_full_name', read_only=True)
     is_expired = serializers.BooleanField(read_only=True)
@@ -25,6 +57,7 @@ class DocumentSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'description', 'document_type',
             'file', 'file_url', 'file_size', 'mime_type',
+            'checksum', 'thumbnail_url', 'preview_url', 'processing_status',
             'related_to', 'group', 'group_code',
             'passenger', 'passenger_name',
             'supplier', 'supplier_name',
@@ -33,18 +66,29 @@ class DocumentSerializer(serializers.ModelSerializer):
             'expires_at', 'is_expired', 'notes',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'file_size',
+        read_only_fields = ['id', 'file_size', 'mime_type',
                             'uploaded_by', 'created_at', 'updated_at']
 
+    def _absolute(self, url):
+        request = self.context.get('request')
+        if url and request:
+            return request.build_absolute_uri(url)
+        return url
+
     def get_file_url(self, obj):
         """Get file URL."""
         if obj.file:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.file.url)
-            return obj.file.url
+            return self._absolute(obj.file.url)
         return None
 
+    def get_thumbnail_url(self, obj):
+        """Get thumbnail URL."""
+        return self._absolute(obj.thumbnail_url)
+
+    def get_preview_url(self, obj):
+        """Get compressed preview URL."""
+        return self._absolute(obj.preview_url)
+
     def validate(self, data):
         """Validate related_to matches foreign keys."""
         related_to = data.get('related_to')
@@ -77,10 +121,14 @@ class DocumentSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
             validated_data['uploaded_by'] = request.user
-        return super().create(validated_data)
+        return super().create(store_upload(validated_data))
+
+    def update(self, instance, validated_data):
+        """Store a replaced file through its blob."""
+        return super().update(instance, store_upload(validated_data))
 
 
-class DocumentUploadSerializer(serializers.ModelSerializer):
+class DocumentUploadSerializer(UploadedFileMixin, serializers.ModelSerializer):
     """Simplified serializer for document upload."""
 
     class Meta:
@@ -92,14 +140,65 @@ class DocumentUploadSerializer(serializers.ModelSerializer):
         ]
 
     def create(self, validated_data):
-        """Set uploaded_by and detect mime_type."""
+        """Set uploaded_by and store the file through its blob."""
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
             validated_data['uploaded_by'] = request.user
+        return super().create(store_upload(validated_data))
+
+
+class DocumentMetadataSerializer(DocumentSerializer):
+    """Document fields sent when finalizing a direct upload (no file)."""
+
+    class Meta(DocumentSerializer.Meta):
+        fields = [
+            'name', 'description', 'document_type',
+            'related_to', 'group', 'passenger', 'supplier',
+            'tags', 'is_public', 'expires_at', 'notes'
+        ]
+
+
+class UploadStartSerializer(serializers.Serializer):
+    """Input for opening a direct upload session."""
+
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1, max_value=MAX_UPLOAD_SIZE)
+    content_type = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+    def validate_filename(self, filename):
+        """Accept the same extensions as Document.file."""
+        extension = os.path.splitext(filename)[1].lstrip('.').lower()
+        for validator in Document._meta.get_field('file').validators:
+            if extension not in validator.allowed_extensions:
+                raise serializers.ValidationError(
+                    f'File extension "{extension}" is not allowed')
+        return filename
 
-        # Try to get mime type from uploaded file
-        file = validated_data.get('file')
-        if file and hasattr(file, 'content_type'):
-            validated_data['mime_type'] = file.content_type
 
-        return super().create(validated_data)
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Direct upload session."""
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'filename', 'size', 'content_type', 'backend', 'received',
+            'status', 'error', 'expires_at', 'document', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class DocumentAlertSerializer(serializers.ModelSerializer):
+    """Document expiry alert with its document."""
+
+    document = DocumentSerializer(read_only=True)
+    group_code = serializers.CharField(source='group.code', read_only=True)
+    passenger_name = serializers.CharField(source='passenger.full_name', read_only=True)
+
+    class Meta:
+        model = DocumentAlert
+        fields = [
+            'id', 'alert_type', 'expires_at', 'required_until',
+            'group', 'group_code', 'passenger', 'passenger_name',
+            'scanned_at', 'notified_at', 'document'
+        ]
+        read_only_fields = fields
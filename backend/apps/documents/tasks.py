@@ -0,0 +1,80 @@
+"""
+Celery tasks for documents app.
+"""
+from celery import shared_task
+from PIL import Image, UnidentifiedImageError
+
+from core.common.jobs import JobTask
+from .alerts import scan_expiries, send_digests
+from .direct_uploads import abort_session, expired_sessions, finalize_session
+from .models import DocumentBlob, UploadSession
+from .serializers import DocumentMetadataSerializer
+from .uploads import render_previews
+
+
+def _mark_failed(blob, exc):
+    DocumentBlob.objects.filter(pk=blob.pk).update(
+        processing_status='failed', processing_error=f"{type(exc).__name__}: {exc}")
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def generate_document_previews(self, blob_id):
+    """Generate the thumbnail and compressed preview of an image blob."""
+    blob = DocumentBlob.objects.filter(pk=blob_id, processing_status='pending').first()
+    if blob is None:
+        return None
+
+    try:
+        render_previews(blob)
+    except (UnidentifiedImageError, Image.DecompressionBombError, ValueError) as exc:
+        # Not a usable image: keep the document, without previews
+        _mark_failed(blob, exc)
+        return 'failed'
+    except OSError as exc:
+        # Storage errors are retried
+        if self.request.retries >= self.max_retries:
+            _mark_failed(blob, exc)
+            raise
+        raise self.retry(exc=exc, countdown=30 * 2 ** self.request.retries)
+    return blob.processing_status
+
+
+@shared_task(bind=True, base=JobTask)
+def finalize_direct_upload(self, job_id, session_id):
+    """Run the upload pipeline on a direct upload and create its Document."""
+    session = UploadSession.objects.select_related('created_by').get(pk=session_id)
+    metadata = DocumentMetadataSerializer(data=session.metadata)
+    if not metadata.is_valid():
+        abort_session(session, status='failed')
+        raise ValueError(f'Invalid document fields: {metadata.errors}')
+
+    self.update_progress(10, None, 'Checking and storing the file')
+    document, created = finalize_session(session, lambda blob: metadata.save(
+        file=blob.file.name, blob=blob, mime_type=blob.mime_type, file_size=blob.size,
+        uploaded_by=session.created_by))
+    return {'document': str(document.pk), 'deduplicated': not created}
+
+
+@shared_task
+def purge_expired_uploads():
+    """
+    Abort direct uploads left unfinished past their expiry, and fail the
+    ones stuck finalizing (beat schedule).
+    """
+    count = 0
+    for session in expired_sessions().iterator():
+        abort_session(session, status='failed' if session.status == 'finalizing' else 'aborted')
+        count += 1
+    return count
+
+
+@shared_task
+def scan_document_expiries():
+    """Refresh the document expiry alerts (beat schedule)."""
+    return scan_expiries()
+
+
+@shared_task
+def send_document_alert_digests():
+    """Mail the digests of new document expiry alerts (beat schedule)."""
+    return send_digests()
@@ -0,0 +1,390 @@
+"""
+Test stand-in for an S3-compatible object store (MinIO).
+
+Implements the S3 operations used by the document storage and direct
+uploads (put/get/head/delete object, create/upload part/list parts/
+complete/abort multipart upload) with path-style addressing, so the tests
+can drive the presigned-URL upload path over real HTTP without network
+access or MinIO:
+
+    with FakeS3Server() as server:
+        client = boto3.client('s3', endpoint_url=server.url, ...)
+
+Signatures are not checked; any bucket exists. Objects and parts are kept
+as files under a temporary directory, so large uploads do not sit in memory.
+"""
+import email.utils
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+S3_NAMESPACE = 'http://s3.amazonaws.com/doc/2006-03-01/'
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Part children come in either order (botocore and s3transfer differ)
+_PART_RE = re.compile(r'<Part>(.*?)</Part>', re.S)
+_PART_NUMBER_RE = re.compile(r'<PartNumber>\s*(\d+)\s*</PartNumber>')
+_ETAG_RE = re.compile(r'<ETag>\s*(.*?)\s*</ETag>', re.S)
+_RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+def _xml(root, body, namespace=S3_NAMESPACE):
+    attributes = f' xmlns="{namespace}"' if namespace else ''
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<{root}{attributes}>{body}</{root}>'
+
+
+def _http_date(timestamp):
+    return email.utils.formatdate(timestamp, usegmt=True)
+
+
+def _iso_date(timestamp):
+    return time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime(timestamp))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    # Request parsing
+
+    def _target(self):
+        parts = urlsplit(self.path)
+        bucket, _, key = parts.path.lstrip('/').partition('/')
+        query = {name: values[0] for name, values in
+                 parse_qs(parts.query, keep_blank_values=True).items()}
+        return unquote(bucket), unquote(key), query
+
+    def _read_body(self):
+        """Request body, decoding chunked and aws-chunked (streaming checksum) bodies."""
+        if 'chunked' in self.headers.get('Transfer-Encoding', ''):
+            raw = b''.join(self._read_chunks())
+        else:
+            raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if 'aws-chunked' in self.headers.get('Content-Encoding', '') \
+                or 'x-amz-decoded-content-length' in self.headers:
+            raw = self._decode_aws_chunked(raw)
+        return raw
+
+    def _read_chunks(self):
+        while True:
+            size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+            if not size:
+                # Trailers end with an empty line
+                while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                    pass
+                return
+            yield self.rfile.read(size)
+            self.rfile.readline()
+
+    @staticmethod
+    def _decode_aws_chunked(raw):
+        data = []
+        position = 0
+        while True:
+            line_end = raw.index(b'\r\n', position)
+            size = int(raw[position:line_end].split(b';')[0], 16)
+            if not size:
+                return b''.join(data)
+            start = line_end + 2
+            data.append(raw[start:start + size])
+            position = start + size + 2
+
+    # Responses
+
+    def _send(self, status, body=b'', headers=None, content_type='application/xml'):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _error(self, status, code, message):
+        self._send(status, _xml('Error', f'<Code>{code}</Code><Message>{escape(message)}</Message>'
+                                         f'<RequestId>{uuid.uuid4().hex}</RequestId>',
+                                namespace=None))
+
+    def _no_such_key(self):
+        self._error(404, 'NoSuchKey', 'The specified key does not exist.')
+
+    def _no_such_upload(self):
+        self._error(404, 'NoSuchUpload', 'The specified upload does not exist.')
+
+    # Dispatch
+
+    def do_PUT(self):
+        bucket, key, query = self._target()
+        body = self._read_body()
+        if not key:
+            self._send(200)
+        elif 'uploadId' in query:
+            self._upload_part(query['uploadId'], int(query.get('partNumber', 0)), body)
+        else:
+            self._put_object(bucket, key, body)
+
+    def do_POST(self):
+        bucket, key, query = self._target()
+        body = self._read_body()
+        if 'uploads' in query:
+            self._create_multipart_upload(bucket, key)
+        elif 'uploadId' in query:
+            self._complete_multipart_upload(bucket, key, query['uploadId'], body)
+        else:
+            self._error(400, 'InvalidRequest', 'Unsupported POST request.')
+
+    def do_GET(self):
+        bucket, key, query = self._target()
+        if not key:
+            self._error(400, 'InvalidRequest', 'Bucket listings are not supported.')
+        elif 'uploadId' in query:
+            self._list_parts(bucket, key, query['uploadId'])
+        else:
+            self._get_object(bucket, key)
+
+    def do_HEAD(self):
+        bucket, key, _ = self._target()
+        if not key:
+            self._send(200)
+        else:
+            self._get_object(bucket, key)
+
+    def do_DELETE(self):
+        bucket, key, query = self._target()
+        if 'uploadId' in query:
+            upload = self.server.store.uploads.pop(query['uploadId'], None)
+            if upload is None:
+                self._no_such_upload()
+                return
+            shutil.rmtree(upload['path'], ignore_errors=True)
+        else:
+            self.server.store.delete(bucket, key)
+        self._send(204)
+
+    # Objects
+
+    def _put_object(self, bucket, key, body):
+        etag = self.server.store.write(
+            bucket, key, [body], self.headers.get('Content-Type', 'binary/octet-stream'))
+        self._send(200, headers={'ETag': etag})
+
+    def _get_object(self, bucket, key):
+        meta = self.server.store.objects.get((bucket, key))
+        if meta is None:
+            if self.command == 'HEAD':
+                self._send(404)
+            else:
+                self._no_such_key()
+            return
+
+        # s3transfer downloads large objects in ranged GETs
+        start, end = 0, meta['size'] - 1
+        match = _RANGE_RE.match(self.headers.get('Range', ''))
+        if match and match.group(1):
+            start = int(match.group(1))
+            end = min(int(match.group(2) or end), end)
+        elif match and match.group(2):
+            start = max(meta['size'] - int(match.group(2)), 0)
+
+        self.send_response(206 if match else 200)
+        self.send_header('Content-Type', meta['content_type'])
+        self.send_header('Content-Length', str(end - start + 1))
+        if match:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{meta['size']}")
+        self.send_header('ETag', meta['etag'])
+        self.send_header('Last-Modified', _http_date(meta['modified']))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        if self.command == 'HEAD':
+            return
+        with open(meta['path'], 'rb') as handle:
+            handle.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = handle.read(min(COPY_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+    # Multipart uploads
+
+    def _create_multipart_upload(self, bucket, key):
+        upload_id = uuid.uuid4().hex
+        path = os.path.join(self.server.store.root, 'uploads', upload_id)
+        os.makedirs(path)
+        self.server.store.uploads[upload_id] = {
+            'bucket': bucket, 'key': key, 'path': path, 'parts': {},
+            'content_type': self.headers.get('Content-Type', 'binary/octet-stream'),
+        }
+        self._send(200, _xml(
+            'InitiateMultipartUploadResult',
+            f'<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>'
+            f'<UploadId>{upload_id}</UploadId>'))
+
+    def _upload_part(self, upload_id, number, body):
+        upload = self.server.store.uploads.get(upload_id)
+        if upload is None:
+            self._no_such_upload()
+            return
+        if not 1 <= number <= 10000:
+            self._error(400, 'InvalidArgument', 'Part number must be between 1 and 10000.')
+            return
+        path = os.path.join(upload['path'], str(number))
+        with open(path, 'wb') as handle:
+            handle.write(body)
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        upload['parts'][number] = {'etag': etag, 'size': len(body), 'modified': time.time(),
+                                   'path': path}
+        self._send(200, headers={'ETag': etag})
+
+    def _list_parts(self, bucket, key, upload_id):
+        upload = self.server.store.uploads.get(upload_id)
+        if upload is None:
+            self._no_such_upload()
+            return
+        parts = ''.join(
+            f'<Part><PartNumber>{number}</PartNumber>'
+            f'<LastModified>{_iso_date(part["modified"])}</LastModified>'
+            f'<ETag>{escape(part["etag"])}</ETag><Size>{part["size"]}</Size></Part>'
+            for number, part in sorted(upload['parts'].items()))
+        self._send(200, _xml(
+            'ListPartsResult',
+            f'<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>'
+            f'<UploadId>{upload_id}</UploadId><MaxParts>10000</MaxParts>'
+            f'<IsTruncated>false</IsTruncated>{parts}'))
+
+    def _complete_multipart_upload(self, bucket, key, upload_id, body):
+        upload = self.server.store.uploads.get(upload_id)
+        if upload is None:
+            self._no_such_upload()
+            return
+
+        requested = []
+        for part in _PART_RE.findall(body.decode('utf-8')):
+            number, etag = _PART_NUMBER_RE.search(part), _ETAG_RE.search(part)
+            if number and etag:
+                requested.append((int(number.group(1)), etag.group(1).replace('&quot;', '"')))
+        numbers = [number for number, _ in requested]
+        if not requested or numbers != sorted(set(numbers)):
+            self._error(400, 'InvalidPartOrder', 'Parts must be listed in ascending order.')
+            return
+        for number, etag in requested:
+            part = upload['parts'].get(number)
+            if part is None or part['etag'].strip('"') != etag.strip('"'):
+                self._error(400, 'InvalidPart', f'Part {number} was not uploaded.')
+                return
+
+        digests = b''.join(bytes.fromhex(upload['parts'][number]['etag'].strip('"'))
+                           for number in numbers)
+        etag = f'"{hashlib.md5(digests).hexdigest()}-{len(numbers)}"'
+        self.server.store.write(
+            bucket, key, (upload['parts'][number]['path'] for number in numbers),
+            upload['content_type'], etag=etag, from_files=True)
+        del self.server.store.uploads[upload_id]
+        shutil.rmtree(upload['path'], ignore_errors=True)
+
+        location = f'{self.server.url}{quote(bucket)}/{quote(key)}'
+        self._send(200, _xml(
+            'CompleteMultipartUploadResult',
+            f'<Location>{escape(location)}</Location><Bucket>{escape(bucket)}</Bucket>'
+            f'<Key>{escape(key)}</Key><ETag>{escape(etag)}</ETag>'))
+
+
+class _Store:
+    """Objects and in-progress multipart uploads, backed by files under root."""
+
+    def __init__(self, root):
+        self.root = root
+        self.objects = {}
+        self.uploads = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        os.makedirs(os.path.join(root, 'uploads'), exist_ok=True)
+
+    def write(self, bucket, key, sources, content_type, etag=None, from_files=False):
+        """Store an object from byte strings (or part files) and return its ETag."""
+        path = os.path.join(self.root, 'objects', uuid.uuid4().hex)
+        digest = hashlib.md5()
+        with open(path, 'wb') as handle:
+            for source in sources:
+                if from_files:
+                    with open(source, 'rb') as part:
+                        shutil.copyfileobj(part, handle, COPY_CHUNK_SIZE)
+                    continue
+                digest.update(source)
+                handle.write(source)
+        size = os.path.getsize(path)
+        etag = etag or f'"{digest.hexdigest()}"'
+        with self._lock:
+            previous = self.objects.get((bucket, key))
+            self.objects[(bucket, key)] = {
+                'path': path, 'size': size, 'etag': etag,
+                'content_type': content_type, 'modified': time.time(),
+            }
+        if previous:
+            os.remove(previous['path'])
+        return etag
+
+    def delete(self, bucket, key):
+        with self._lock:
+            meta = self.objects.pop((bucket, key), None)
+        if meta:
+            os.remove(meta['path'])
+
+
+class FakeS3Server:
+    """Threaded fake S3 server; usable as a context manager."""
+
+    def __init__(self, host='127.0.0.1', port=0, root=None):
+        self._tempdir = None
+        if root is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix='fake-s3-')
+            root = self._tempdir.name
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.store = _Store(root)
+        self.httpd.url = self.url
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    @property
+    def objects(self):
+        """(bucket, key) -> object metadata stored so far."""
+        return self.httpd.store.objects
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,176 @@
+"""
+Direct uploads through the S3 multipart (presigned URL) and local
+resumable paths.
+"""
+import pytest
+import requests
+
+from apps.authentication.models import User
+from apps.documents import direct_uploads
+from apps.documents.direct_uploads import (
+    OffsetMismatch, UploadError, complete_upload, finalize_session, start_session,
+    upload_instructions, write_chunk
+)
+from apps.documents.models import Document, UploadSession
+from .fake_s3 import FakeS3Server
+
+BUCKET = 'travesia-test'
+PART_SIZE = 5 * 1024 * 1024
+
+
+def pdf_bytes(size):
+    return b'%PDF-1.4\n' + b'x' * (size - 9)
+
+
+def build_document(blob):
+    return Document.objects.create(
+        name='Passport scan', document_type='passport', related_to='general',
+        file=blob.file.name, blob=blob, mime_type=blob.mime_type, file_size=blob.size)
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user('uploader', 'uploader@example.com', 'secret')
+
+
+@pytest.fixture
+def fake_s3():
+    with FakeS3Server() as server:
+        yield server
+
+
+@pytest.fixture
+def s3_storage(settings, fake_s3, monkeypatch):
+    monkeypatch.setattr(direct_uploads, 'PART_SIZE', PART_SIZE)
+    # Options are read from the AWS_* settings: overriding STORAGES also
+    # overrides DEFAULT_FILE_STORAGE, which drops the backend OPTIONS
+    settings.AWS_STORAGE_BUCKET_NAME = BUCKET
+    settings.AWS_S3_ENDPOINT_URL = fake_s3.url
+    settings.AWS_ACCESS_KEY_ID = 'test'
+    settings.AWS_SECRET_ACCESS_KEY = 'test'
+    settings.AWS_S3_REGION_NAME = 'us-east-1'
+    settings.AWS_S3_ADDRESSING_STYLE = 'path'
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'default': {'BACKEND': 'core.common.storage_backends.MediaStorage'},
+    }
+    return fake_s3
+
+
+@pytest.fixture
+def local_storage(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    }
+    return tmp_path
+
+
+def upload_parts(session, content, numbers=None):
+    for part in upload_instructions(session)['parts']:
+        number = part['part_number']
+        if numbers is not None and number not in numbers:
+            continue
+        start = (number - 1) * PART_SIZE
+        response = requests.put(part['url'], data=content[start:start + PART_SIZE])
+        response.raise_for_status()
+
+
+def upload_keys(server):
+    return [key for bucket, key in server.objects if key.startswith('media/uploads/')]
+
+
+def test_presigned_multipart_upload(user, s3_storage):
+    content = pdf_bytes(PART_SIZE + 1000)
+    session = start_session(user, 'passport.pdf', len(content), 'application/pdf')
+    assert session.backend == 's3'
+    assert len(upload_instructions(session)['parts']) == 2
+
+    upload_parts(session, content)
+    assert upload_instructions(session)['uploaded_parts'] == [1, 2]
+
+    complete_upload(session)
+    assert UploadSession.objects.get(pk=session.pk).status == 'finalizing'
+
+    document, created = finalize_session(session, build_document)
+    session.refresh_from_db()
+    assert created
+    assert session.status == 'completed'
+    assert session.document == document
+    with document.blob.file.open('rb') as handle:
+        assert handle.read() == content
+    assert upload_keys(s3_storage) == []
+
+
+def test_resume_uploads_only_missing_parts(user, s3_storage):
+    content = pdf_bytes(2 * PART_SIZE + 10)
+    session = start_session(user, 'contract.pdf', len(content), 'application/pdf')
+
+    upload_parts(session, content, numbers={2})
+    instructions = upload_instructions(session)
+    assert instructions['uploaded_parts'] == [2]
+    assert [part['part_number'] for part in instructions['parts']] == [1, 3]
+
+    upload_parts(session, content)
+    complete_upload(session)
+    document, _ = finalize_session(session, build_document)
+    assert document.file_size == len(content)
+
+
+def test_complete_with_missing_parts_keeps_uploading(user, s3_storage):
+    content = pdf_bytes(PART_SIZE + 1000)
+    session = start_session(user, 'passport.pdf', len(content), 'application/pdf')
+    upload_parts(session, content, numbers={1})
+
+    with pytest.raises(UploadError):
+        complete_upload(session)
+    assert UploadSession.objects.get(pk=session.pk).status == 'uploading'
+
+
+def test_complete_only_once(user, s3_storage):
+    content = pdf_bytes(1000)
+    session = start_session(user, 'passport.pdf', len(content), 'application/pdf')
+    upload_parts(session, content)
+    complete_upload(session)
+
+    stale = UploadSession.objects.get(pk=session.pk)
+    stale.status = 'uploading'
+    with pytest.raises(UploadError):
+        complete_upload(stale)
+
+
+def test_rejected_file_fails_session(user, s3_storage):
+    content = b'\x89PNG\r\n\x1a\n' + b'x' * 100
+    session = start_session(user, 'passport.pdf', len(content), 'application/pdf')
+    upload_parts(session, content)
+    complete_upload(session)
+
+    with pytest.raises(Exception):
+        finalize_session(session, build_document)
+    session.refresh_from_db()
+    assert session.status == 'failed'
+    assert 'does not match' in session.error
+    assert upload_keys(s3_storage) == []
+
+
+def test_resumable_local_upload(user, local_storage, monkeypatch):
+    monkeypatch.setattr(direct_uploads, 'PART_SIZE', 100)
+    content = pdf_bytes(250)
+    session = start_session(user, 'passport.pdf', len(content), 'application/pdf')
+    assert session.backend == 'local'
+
+    write_chunk(session, 'bytes 0-99/250', content[:100])
+    with pytest.raises(OffsetMismatch) as exc:
+        write_chunk(session, 'bytes 200-249/250', content[200:])
+    assert exc.value.received == 100
+    assert upload_instructions(session)['received'] == 100
+
+    write_chunk(session, 'bytes 100-199/250', content[100:200])
+    write_chunk(session, 'bytes 200-249/250', content[200:])
+    complete_upload(session)
+    document, _ = finalize_session(session, build_document)
+
+    with document.blob.file.open('rb') as handle:
+        assert handle.read() == content
+    assert not (local_storage / session.storage_name).exists()
@@ -0,0 +1,192 @@
+"""
+Document upload pipeline.
+
+The uploaded file is read in chunks to compute its SHA-256, then its
+content is looked up in the content-addressed DocumentBlob table: identical
+passport scans or receipts uploaded again reuse the stored blob instead of
+writing a new copy. New content is streamed to storage chunk by chunk and
+thumbnails and compressed previews are generated by a background worker.
+The MIME type is sniffed from the file's leading bytes, not trusted from
+the client.
+"""
+import hashlib
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, transaction
+from PIL import Image, ImageOps
+
+from .models import DocumentBlob
+
+CHUNK_SIZE = 1024 * 1024
+SNIFF_SIZE = 2048
+
+THUMBNAIL_SIZE = (320, 320)
+PREVIEW_SIZE = (1600, 1600)
+PREVIEW_QUALITY = 70
+
+# Leading bytes -> MIME type
+SIGNATURES = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/x-ole-storage'),
+]
+
+# Container formats identified by extension
+CONTAINER_TYPES = {
+    'application/zip': {
+        'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'zip': 'application/zip',
+    },
+    'application/x-ole-storage': {
+        'doc': 'application/msword',
+        'xls': 'application/vnd.ms-excel',
+    },
+}
+TEXT_TYPES = {'txt': 'text/plain', 'csv': 'text/csv'}
+
+# Extension -> MIME types its content may have
+EXPECTED_TYPES = {
+    'pdf': {'application/pdf'},
+    'jpg': {'image/jpeg'},
+    'jpeg': {'image/jpeg'},
+    'png': {'image/png'},
+    'gif': {'image/gif'},
+    'zip': {'application/zip'},
+    'docx': {CONTAINER_TYPES['application/zip']['docx']},
+    'xlsx': {CONTAINER_TYPES['application/zip']['xlsx']},
+    'doc': {'application/msword'},
+    'xls': {'application/vnd.ms-excel'},
+    'txt': {'text/plain'},
+    'csv': {'text/csv'},
+}
+
+IMAGE_TYPES = {'image/jpeg', 'image/png', 'image/gif'}
+
+
+class UploadRejected(Exception):
+    """The file content does not match its extension."""
+
+
+def _extension(name):
+    return os.path.splitext(name or '')[1].lstrip('.').lower()
+
+
+def sniff_mime_type(head, name=''):
+    """
+    MIME type of a file from its first bytes.
+
+    Args:
+        head: Leading bytes of the file (SNIFF_SIZE is enough)
+        name: File name, used to tell container formats apart
+    """
+    extension = _extension(name)
+    for signature, mime_type in SIGNATURES:
+        if head.startswith(signature):
+            if mime_type in CONTAINER_TYPES:
+                return CONTAINER_TYPES[mime_type].get(extension, mime_type)
+            return mime_type
+    if b'\x00' not in head:
+        try:
+            head.decode('utf-8')
+        except UnicodeDecodeError as exc:
+            # A multi-byte character cut at the end of the sample is fine
+            if exc.start < len(head) - 3:
+                return 'application/octet-stream'
+        return TEXT_TYPES.get(extension, 'text/plain')
+    return 'application/octet-stream'
+
+
+def inspect_upload(uploaded):
+    """
+    Sniff an uploaded file's MIME type and check it matches the extension.
+
+    Raises:
+        UploadRejected: The content is not what the extension claims
+    """
+    head = uploaded.read(SNIFF_SIZE)
+    uploaded.seek(0)
+    mime_type = sniff_mime_type(head, uploaded.name)
+    expected = EXPECTED_TYPES.get(_extension(uploaded.name))
+    if expected is not None and mime_type not in expected:
+        raise UploadRejected(
+            f'File content ({mime_type}) does not match its .{_extension(uploaded.name)} extension')
+    return mime_type
+
+
+def digest(uploaded):
+    """SHA-256 hex digest and size of an uploaded file, read in chunks."""
+    sha = hashlib.sha256()
+    size = 0
+    for chunk in uploaded.chunks(CHUNK_SIZE):
+        sha.update(chunk)
+        size += len(chunk)
+    uploaded.seek(0)
+    return sha.hexdigest(), size
+
+
+def store_blob(uploaded, mime_type):
+    """
+    Blob holding an uploaded file's content, stored only if new.
+
+    Returns:
+        (DocumentBlob, created)
+    """
+    sha256, size = digest(uploaded)
+    blob = DocumentBlob.objects.filter(sha256=sha256).first()
+    if blob is not None:
+        return blob, False
+
+    blob = DocumentBlob(
+        sha256=sha256, size=size, mime_type=mime_type,
+        processing_status='pending' if mime_type in IMAGE_TYPES else 'skipped')
+    # The storage reads the upload chunk by chunk
+    blob.file.save(uploaded.name, uploaded, save=False)
+    try:
+        with transaction.atomic():
+            blob.save()
+    except IntegrityError:
+        # The same content was stored concurrently
+        blob.file.delete(save=False)
+        return DocumentBlob.objects.get(sha256=sha256), False
+
+    if blob.processing_status == 'pending':
+        from .tasks import generate_document_previews
+        blob_id = str(blob.pk)
+        transaction.on_commit(lambda: generate_document_previews.delay(blob_id))
+    return blob, True
+
+
+def _jpeg(image, size, quality):
+    """Downscaled JPEG copy of a Pillow image."""
+    copy = image.copy()
+    copy.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    copy.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return ContentFile(buffer.getvalue())
+
+
+def render_previews(blob):
+    """Generate and store a blob's thumbnail and compressed preview."""
+    with blob.file.open('rb') as handle:
+        image = Image.open(handle)
+        # Let the JPEG decoder skip detail the preview does not need
+        image.draft('RGB', PREVIEW_SIZE)
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        preview = _jpeg(image, PREVIEW_SIZE, PREVIEW_QUALITY)
+        thumbnail = _jpeg(image, THUMBNAIL_SIZE, 80)
+
+    blob.preview.save(f'{blob.sha256}.jpg', preview, save=False)
+    blob.thumbnail.save(f'{blob.sha256}.jpg', thumbnail, save=False)
+    blob.processing_status = 'ready'
+    blob.processing_error = ''
+    blob.save(update_fields=['preview', 'thumbnail', 'processing_status',
+                             'processing_error', 'updated_at'])
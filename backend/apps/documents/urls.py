@@ -3,10 +3,11 @@ Documents URL configuration.
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DocumentViewSet
+from .views import DocumentViewSet, UploadSessionViewSet
 
 router = DefaultRouter()
 router.register(r'documents', DocumentViewSet, basename='document')
+router.register(r'uploads', UploadSessionViewSet, basename='document-upload')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,39 +1,57 @@
 """
 Documents views.
 """
-from rest_framework import viewsets, filters, status
+from rest_framework import mixins, viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import BaseParser, MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import models, transaction
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 
+from core.common.jobs import enqueue_job, job_accepted_response
 from core.common.permissions import IsAuthenticated
-from .models import Document
-from .serializers import DocumentSerializer, DocumentUploadSerializer
+from core.common.search import FullTextSearchFilter
+from .alerts import EXPIRY_WARNING_DAYS
+from .archive import iter_documents_zip
+from .direct_uploads import (
+    OffsetMismatch, UploadError, abort_session, complete_upload, start_session,
+    upload_instructions, write_chunk
+)
+from .models import Document, DocumentAlert, UploadSession
+from .serializers import (
+    DocumentSerializer, DocumentUploadSerializer, DocumentMetadataSerializer,
+    UploadStartSerializer, UploadSessionSerializer, DocumentAlertSerializer
+)
+from .tasks import finalize_direct_upload
+
+# Files accepted by one bulk upload request
+MAX_BULK_FILES = 500
 
 
 class DocumentViewSet(viewsets.ModelViewSet):
     """Document ViewSet with file upload support."""
 
     queryset = Document.objects.select_related(
-        'group', 'passenger', 'supplier', 'uploaded_by'
+        'group', 'passenger', 'supplier', 'uploaded_by', 'blob'
     ).all()
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
     filter_backends = [DjangoFilterBackend,
-                       filters.SearchFilter, filters.OrderingFilter]
+                       filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = [
         'document_type', 'related_to', 'group', 'passenger',
         'supplier', 'is_public', 'is_archived'
     ]
     search_fields = ['name', 'description', 'tags', 'notes']
+    search_vector_field = 'search_vector'
     ordering_fields = ['created_at', 'name', 'expires_at', 'file_size']
     ordering = ['-created_at']
 
     def get_serializer_class(self):
         """Return appropriate serializer for action."""
-        if self.action in ['create', 'upload']:
+        if self.action in ['create', 'upload', 'bulk_upload']:
             return DocumentUploadSerializer
         return DocumentSerializer
 
@@ -69,6 +87,46 @@ class DocumentViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED
         )
 
+    @action(detail=False, methods=['post'], url_path='bulk-upload')
+    def bulk_upload(self, request):
+        """Upload many files sharing the same metadata, one document each."""
+        files = request.FILES.getlist('files')
+        if not files:
+            return Response(
+                {'error': 'files is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(files) > MAX_BULK_FILES:
+            return Response(
+                {'error': f'At most {MAX_BULK_FILES} files per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        common = {key: value for key, value in request.data.dict().items()
+                  if key not in ('files', 'file')}
+        uploads = [
+            DocumentUploadSerializer(
+                data={**common, 'file': file, 'name': common.get('name') or file.name},
+                context={'request': request}
+            )
+            for file in files
+        ]
+        errors = {
+            file.name: serializer.errors
+            for file, serializer in zip(files, uploads)
+            if not serializer.is_valid()
+        }
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            documents = [serializer.save() for serializer in uploads]
+
+        return Response(
+            DocumentSerializer(documents, many=True, context={'request': request}).data,
+            status=status.HTTP_201_CREATED
+        )
+
     @action(detail=True, methods=['post'])
     def archive(self, request, pk=None):
         """Archive a document."""
@@ -120,38 +178,183 @@ class DocumentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
-    def expiring_soon(self, request):
-        """Get documents expiring in the next 30 days."""
-        days = int(request.query_params.get('days', 30))
+    def zip(self, request):
+        """
+        Download the documents of a group or passenger as one streamed ZIP.
+
+        Query params: group_id or passenger_id, document_type (comma
+        separated or repeated) to restrict the types.
+        """
+        group_id = request.query_params.get('group_id')
+        passenger_id = request.query_params.get('passenger_id')
+        if not group_id and not passenger_id:
+            return Response(
+                {'error': 'group_id or passenger_id parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        today = timezone.now().date()
-        future_date = today + timezone.timedelta(days=days)
+        document_types = [
+            value for param in request.query_params.getlist('document_type')
+            for value in param.split(',') if value
+        ]
+        unknown = set(document_types) - {choice for choice, _ in Document.DOCUMENT_TYPE_CHOICES}
+        if unknown:
+            return Response(
+                {'error': f"Unknown document_type: {', '.join(sorted(unknown))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        documents = self.get_queryset().filter(
-            expires_at__gte=today,
-            expires_at__lte=future_date
-        ).order_by('expires_at')
+        documents = self.get_queryset()
+        if group_id:
+            documents = documents.filter(group_id=group_id)
+        if passenger_id:
+            documents = documents.filter(passenger_id=passenger_id)
+        if document_types:
+            documents = documents.filter(document_type__in=document_types)
+        documents = documents.order_by('document_type', 'passenger', 'name', 'created_at')
+
+        response = StreamingHttpResponse(
+            iter_documents_zip(documents.iterator(chunk_size=200)),
+            content_type='application/zip'
+        )
+        name = '-'.join(filter(None, [
+            'documents', group_id or passenger_id, '-'.join(sorted(document_types))]))
+        response['Content-Disposition'] = f'attachment; filename="{name}.zip"'
+        return response
+
+    def _alerts_response(self, request, alerts):
+        """Paginated alerts of the documents visible to the user."""
+        # Skip alerts left stale by an archive or expiry change until the
+        # next refresh rebuilds them
+        alerts = alerts.filter(
+            document__in=self.get_queryset().values('pk'),
+            document__expires_at=models.F('expires_at'),
+            document__is_archived=False,
+        ).select_related(
+            'group', 'passenger', 'document', 'document__group', 'document__passenger',
+            'document__supplier', 'document__uploaded_by', 'document__blob'
+        ).order_by('expires_at', 'id')
+
+        page = self.paginate_queryset(alerts)
+        serializer = DocumentAlertSerializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(documents, many=True)
+    @action(detail=False, methods=['get'])
+    def expiring_soon(self, request):
+        """Get documents expiring in the next 30 days (from the alerts table)."""
+        try:
+            days = min(int(request.query_params.get('days', EXPIRY_WARNING_DAYS)),
+                       EXPIRY_WARNING_DAYS)
+        except ValueError:
+            return Response(
+                {'error': 'days must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        return Response({
-            'days': days,
-            'count': documents.count(),
-            'documents': serializer.data
-        })
+        future_date = timezone.localdate() + timezone.timedelta(days=days)
+        return self._alerts_response(request, DocumentAlert.objects.filter(
+            alert_type='expiring', expires_at__lte=future_date))
 
     @action(detail=False, methods=['get'])
     def expired(self, request):
-        """Get expired documents."""
-        today = timezone.now().date()
+        """Get expired documents (from the alerts table)."""
+        return self._alerts_response(request, DocumentAlert.objects.filter(alert_type='expired'))
 
-        documents = self.get_queryset().filter(
-            expires_at__lt=today
-        ).order_by('expires_at')
+    @action(detail=False, methods=['get'])
+    def passport_validity(self, request):
+        """Passports expiring before their group's end date + 6 months."""
+        alerts = DocumentAlert.objects.filter(alert_type='passport_validity')
+        group_id = request.query_params.get('group_id')
+        if group_id:
+            alerts = alerts.filter(group_id=group_id)
+        return self._alerts_response(request, alerts)
 
-        serializer = self.get_serializer(documents, many=True)
 
-        return Response({
-            'count': documents.count(),
-            'documents': serializer.data
-        })
+class ChunkParser(BaseParser):
+    """Raw request body of a resumable upload chunk."""
+
+    media_type = 'application/octet-stream'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream.read() if stream else b''
+
+
+class UploadSessionViewSet(mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Direct uploads of large documents.
+
+    POST opens a session and returns presigned S3 part URLs or, on local
+    storage, the chunk protocol. GET returns what is left to send (to resume),
+    PUT chunk/ appends a local chunk, POST complete/ creates the Document in
+    the background and DELETE aborts the upload.
+    """
+
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(created_by=self.request.user)
+
+    def _response(self, session, status_code=status.HTTP_200_OK):
+        data = self.get_serializer(session).data
+        if session.status == 'uploading':
+            data['upload'] = upload_instructions(session)
+        return Response(data, status=status_code)
+
+    def create(self, request):
+        """Open an upload session."""
+        params = UploadStartSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        session = start_session(request.user, **params.validated_data)
+        return self._response(session, status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        """Session state and what is left to upload."""
+        return self._response(self.get_object())
+
+    def destroy(self, request, pk=None):
+        """Abort the upload and drop the bytes sent so far."""
+        session = self.get_object()
+        if session.status != 'uploading':
+            return Response(
+                {'error': f'Upload is {session.status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        abort_session(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['put'], parser_classes=[ChunkParser])
+    def chunk(self, request, pk=None):
+        """Write one chunk (Content-Range: bytes start-end/total) of a local upload."""
+        session = self.get_object()
+        try:
+            received = write_chunk(session, request.headers.get('Content-Range'), request.data)
+        except OffsetMismatch as exc:
+            return Response(
+                {'error': str(exc), 'received': exc.received},
+                status=status.HTTP_409_CONFLICT
+            )
+        except UploadError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'received': received, 'size': session.size})
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Close the upload and create its Document in the background."""
+        session = self.get_object()
+        metadata = DocumentMetadataSerializer(data=request.data)
+        metadata.is_valid(raise_exception=True)
+
+        try:
+            complete_upload(session, request.data.get('parts'))
+        except UploadError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        session.metadata = metadata.data
+        session.save(update_fields=['metadata', 'updated_at'])
+        job = enqueue_job(
+            finalize_direct_upload, 'finalize_direct_upload', user=request.user,
+            params={'session_id': str(session.pk)}
+        )
+        return job_accepted_response(job, {'upload': self.get_serializer(session).data})
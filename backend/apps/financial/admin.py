@@ -2,7 +2,10 @@
 Financial admin configuration.
 """
 from django.contrib import admin
-from .models import GroupCost, AdditionalSale, Commission, Invoice, BankDeposit
+from .models import (
+    GroupCost, AdditionalSale, Commission, Invoice, InvoiceSeries,
+    SunatSummary, BankDeposit, BankStatement, LedgerEntry, PayablesRun
+)
 
 
 @admin.register(GroupCost)
@@ -163,7 +166,7 @@ class InvoiceAdmin(admin.ModelAdmin):
             'fields': ('paid', 'payment_date', 'payment_method')
         }),
         ('SUNAT', {
-            'fields': ('sunat_response', 'xml_file', 'pdf_file'),
+            'fields': ('sunat_summary', 'sunat_response', 'xml_file', 'pdf_file'),
             'classes': ('collapse',)
         }),
         ('Notes', {
@@ -177,6 +180,26 @@ class InvoiceAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(InvoiceSeries)
+class InvoiceSeriesAdmin(admin.ModelAdmin):
+    """InvoiceSeries admin."""
+
+    list_display = ['series', 'invoice_type', 'next_number', 'is_active']
+    list_filter = ['invoice_type', 'is_active']
+    readonly_fields = ['next_number', 'created_at', 'updated_at']
+
+
+@admin.register(SunatSummary)
+class SunatSummaryAdmin(admin.ModelAdmin):
+    """SunatSummary admin."""
+
+    list_display = ['identifier', 'reference_date', 'status', 'ticket', 'created_at']
+    list_filter = ['status']
+    search_fields = ['identifier', 'ticket']
+    readonly_fields = ['created_at', 'updated_at']
+    date_hierarchy = 'reference_date'
+
+
 @admin.register(BankDeposit)
 class BankDepositAdmin(admin.ModelAdmin):
     """BankDeposit admin."""
@@ -223,3 +246,56 @@ class BankDepositAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(BankStatement)
+class BankStatementAdmin(admin.ModelAdmin):
+    """BankStatement admin."""
+
+    list_display = [
+        'bank_name', 'file_format', 'status', 'line_count',
+        'matched_count', 'suggested_count', 'created_at'
+    ]
+    list_filter = ['status', 'file_format', 'bank_name']
+    readonly_fields = [
+        'line_count', 'matched_count', 'suggested_count',
+        'created_at', 'updated_at'
+    ]
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    """LedgerEntry admin (read-only)."""
+
+    list_display = [
+        'id', 'entry_date', 'group', 'passenger', 'entry_type',
+        'source_type', 'amount', 'currency', 'balance_after'
+    ]
+    list_filter = ['entry_type', 'source_type', 'currency']
+    search_fields = ['group__code', 'passenger__last_name', 'description']
+    raw_id_fields = ['group', 'passenger']
+    date_hierarchy = 'entry_date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PayablesRun)
+class PayablesRunAdmin(admin.ModelAdmin):
+    """PayablesRun admin."""
+
+    list_display = [
+        'payment_date', 'currency', 'status', 'supplier_count',
+        'cost_count', 'total_amount', 'created_at'
+    ]
+    list_filter = ['status', 'currency']
+    readonly_fields = [
+        'supplier_count', 'cost_count', 'total_amount', 'payment_file',
+        'paid_at', 'created_at', 'updated_at'
+    ]
@@ -8,3 +8,6 @@ class FinancialConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.financial'
     verbose_name = 'Financial'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,163 @@
+"""
+Bulk invoicing of whole groups.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, Exists, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.circuits.models import Group, Passenger
+from core.common.utils import calculate_igv
+from .currency import RateCache
+from .models import AdditionalSale, Invoice
+from .sequences import allocate_invoice_numbers, default_series
+
+
+def _pending_sales_total(includes_tax):
+    """Per-passenger sum of unpaid, not yet invoiced additional sales."""
+    sales = AdditionalSale.objects.filter(
+        passenger=OuterRef('pk'),
+        currency=OuterRef('currency'),
+        includes_tax=includes_tax,
+        paid=False,
+        invoice_number='',
+    ).order_by().values('passenger').annotate(total=Sum('total_amount')).values('total')
+    return Coalesce(
+        Subquery(sales, output_field=DecimalField(max_digits=12, decimal_places=2)),
+        Value(Decimal('0')),
+    )
+
+
+def compute_amounts(gross, net=Decimal('0')):
+    """
+    Split invoice amounts into subtotal, IGV and total.
+
+    Args:
+        gross: Amount that already includes IGV
+        net: Amount IGV still has to be added to
+
+    Returns:
+        Tuple of (subtotal, tax_amount, total_amount)
+    """
+    gross_amounts = calculate_igv(gross, include_igv=True)
+    net_amounts = calculate_igv(net)
+    subtotal = gross_amounts['base_amount'] + net_amounts['base_amount']
+    tax_amount = gross_amounts['igv_amount'] + net_amounts['igv_amount']
+    return subtotal, tax_amount, subtotal + tax_amount
+
+
+def invoice_group(group, invoice_type='boleta', issue_date=None, series=None):
+    """
+    Issue one invoice per confirmed passenger of a group.
+
+    Passenger.total_price is taken as IGV-inclusive; unpaid additional sales
+    in the passenger's currency are added according to their includes_tax
+    flag. Passengers that already hold a non-cancelled boleta or factura are
+    skipped, so re-running the action only bills newcomers. Facturas are
+    only issued to passengers identified by RUC.
+
+    Returns:
+        Dict with the created invoices and skip counters
+    """
+    issue_date = issue_date or timezone.localdate()
+    series = series or default_series(invoice_type)
+
+    already_invoiced = Invoice.objects.filter(
+        passenger=OuterRef('pk'),
+        invoice_type__in=['boleta', 'factura'],
+    ).exclude(status='cancelled')
+
+    with transaction.atomic():
+        # Serialise invoicing of the same group
+        Group.objects.select_for_update().filter(pk=group.pk).first()
+
+        passengers = Passenger.objects.filter(
+            group=group, status='confirmed'
+        ).annotate(
+            invoiced=Exists(already_invoiced),
+            sales_gross=_pending_sales_total(includes_tax=True),
+            sales_net=_pending_sales_total(includes_tax=False),
+        ).order_by('last_name', 'first_name')
+
+        rows = list(passengers.values_list(
+            'pk', 'first_name', 'last_name', 'document_type', 'document_number',
+            'email', 'total_price', 'currency', 'invoiced', 'sales_gross', 'sales_net'
+        ))
+
+        drafts = []
+        skipped = {'already_invoiced': 0, 'missing_ruc': 0, 'zero_amount': 0}
+        for (pk, first_name, last_name, document_type, document_number,
+             email, total_price, currency, invoiced, sales_gross, sales_net) in rows:
+            if invoiced:
+                skipped['already_invoiced'] += 1
+                continue
+            if invoice_type == 'factura' and document_type != 'ruc':
+                skipped['missing_ruc'] += 1
+                continue
+
+            subtotal, tax_amount, total_amount = compute_amounts(
+                total_price + sales_gross, sales_net)
+            if total_amount <= 0:
+                skipped['zero_amount'] += 1
+                continue
+
+            drafts.append(Invoice(
+                passenger_id=pk,
+                invoice_type=invoice_type,
+                issue_date=issue_date,
+                status='issued',
+                customer_name=f"{first_name} {last_name}",
+                customer_document_type=document_type,
+                customer_document_number=document_number,
+                customer_email=email,
+                subtotal=subtotal,
+                tax_amount=tax_amount,
+                total_amount=total_amount,
+                currency=currency,
+                notes=f"Group {group.code}",
+            ))
+
+        numbers = allocate_invoice_numbers(series, len(drafts))
+        rates = RateCache()
+        for invoice, number in zip(drafts, numbers):
+            invoice.invoice_number = number
+            # bulk_create skips save(), so normalize the currency here
+            invoice.apply_base_amount(rates)
+
+        invoices = Invoice.objects.bulk_create(drafts, batch_size=500)
+        invoice_ids = [invoice.pk for invoice in invoices]
+
+        # Stamp the billed sales with their invoice number in one statement
+        AdditionalSale.objects.filter(
+            passenger__in=[invoice.passenger_id for invoice in invoices],
+            paid=False,
+            invoice_number='',
+        ).filter(
+            currency=Subquery(Passenger.objects.filter(
+                pk=OuterRef('passenger')).values('currency')[:1])
+        ).update(
+            invoice_number=Subquery(Invoice.objects.filter(
+                pk__in=invoice_ids, passenger=OuterRef('passenger')
+            ).values('invoice_number')[:1]),
+            updated_at=timezone.now()
+        )
+
+        transaction.on_commit(lambda: _after_commit(invoice_ids))
+
+    return {'invoices': invoices, 'skipped': skipped}
+
+
+def _after_commit(invoice_ids):
+    # bulk_create bypasses post_save, so index and render explicitly
+    from apps.search.indexing import build_document, upsert_documents
+    from .tasks import render_invoice_documents
+
+    if not invoice_ids:
+        return
+    upsert_documents([
+        build_document('invoice', invoice)
+        for invoice in Invoice.objects.filter(pk__in=invoice_ids)
+    ])
+    render_invoice_documents.delay([str(pk) for pk in invoice_ids])
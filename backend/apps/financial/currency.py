@@ -0,0 +1,116 @@
+"""
+Conversion of financial amounts to the base currency.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.suppliers.models import ExchangeRate
+
+CENT = Decimal('0.01')
+ONE = Decimal('1')
+
+
+def lookup_rate(from_currency, to_currency, on_date):
+    """
+    Latest rate on or before a date, trying the inverse pair as a fallback.
+
+    Returns:
+        Decimal rate or None if no rate is known
+    """
+    if from_currency == to_currency:
+        return ONE
+
+    rate = ExchangeRate.objects.filter(
+        from_currency=from_currency, to_currency=to_currency, date__lte=on_date
+    ).values_list('rate', flat=True).first()
+    if rate:
+        return rate
+
+    inverse = ExchangeRate.objects.filter(
+        from_currency=to_currency, to_currency=from_currency, date__lte=on_date
+    ).values_list('rate', flat=True).first()
+    if inverse:
+        return (ONE / inverse).quantize(Decimal('0.000001'))
+    return None
+
+
+class RateCache:
+    """Memoized base-currency rates for bulk writes and backfills."""
+
+    def __init__(self, base_currency=None):
+        self.base_currency = base_currency or settings.BASE_CURRENCY
+        self._rates = {}
+
+    def rate(self, currency, on_date):
+        key = (currency, on_date)
+        if key not in self._rates:
+            self._rates[key] = lookup_rate(currency, self.base_currency, on_date)
+        return self._rates[key]
+
+
+def to_base(amount, currency, on_date, rates=None):
+    """
+    Convert an amount to the base currency.
+
+    Returns:
+        Tuple of (base amount, rate), both None when no rate is known
+    """
+    if amount is None:
+        return None, None
+    if rates is not None:
+        rate = rates.rate(currency, on_date)
+    else:
+        rate = lookup_rate(currency, settings.BASE_CURRENCY, on_date)
+    if rate is None:
+        return None, None
+    return (Decimal(amount) * rate).quantize(CENT), rate
+
+
+def backfill_base_amounts(model, only_missing=True, currency=None, batch_size=1000):
+    """
+    Recompute base-currency amounts of existing rows in keyset-paginated batches.
+
+    Args:
+        model: BaseCurrencyModel subclass
+        only_missing: Only rows without a base amount yet
+        currency: Restrict to rows in this currency
+        batch_size: Rows per bulk UPDATE
+
+    bulk_update skips the rollup signals, so the rollups of the days whose
+    amounts changed are rebuilt at the end.
+
+    Returns:
+        Tuple of (rows updated, rows still without a rate)
+    """
+    from .rollups import refresh_days
+
+    queryset = model.objects.order_by('pk')
+    if only_missing:
+        queryset = queryset.filter(base_currency_amount__isnull=True)
+    if currency:
+        queryset = queryset.filter(currency=currency)
+
+    rates = RateCache()
+    updated = missing = 0
+    changed_days = set()
+    last_pk = None
+    while True:
+        batch_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(batch_queryset[:batch_size])
+        if not batch:
+            break
+        for obj in batch:
+            previous = obj.base_currency_amount
+            obj.apply_base_amount(rates)
+            if obj.base_currency_amount is None:
+                missing += 1
+            if obj.base_currency_amount != previous:
+                changed_days.add(timezone.localdate(obj.created_at))
+        model.objects.bulk_update(batch, ['base_currency_amount', 'base_exchange_rate'])
+        updated += len(batch)
+        last_pk = batch[-1].pk
+
+    refresh_days(model, changed_days)
+    return updated, missing
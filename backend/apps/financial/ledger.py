@@ -0,0 +1,359 @@
+"""
+Receivables ledger posting and reporting.
+
+Every financial source (tour price, additional sale, verified deposit,
+credit/debit note) has a desired ledger amount. sync_source() compares it
+with what is already posted for that source and appends the difference, so
+posting is idempotent and corrections never rewrite history. Balances are
+updated under a row lock in the same transaction as the entry; always lock
+the passenger balance before the group balance to avoid deadlocks.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from apps.circuits.models import Passenger
+from .models import AccountBalance, AdditionalSale, BankDeposit, GroupBalance, Invoice, LedgerEntry
+
+ZERO = Decimal('0')
+
+Posting = namedtuple(
+    'Posting',
+    ['entry_type', 'amount', 'currency', 'group_id', 'passenger_id',
+     'entry_date', 'due_date', 'description']
+)
+
+AGING_BUCKETS = [
+    ('current', None, 0),
+    ('1_30', 1, 30),
+    ('31_60', 31, 60),
+    ('61_90', 61, 90),
+    ('over_90', 91, None),
+]
+
+_TOTAL_FIELDS = {
+    'charge': 'total_charges',
+    'payment': 'total_payments',
+    'credit': 'total_credits',
+}
+
+
+def _passenger_posting(passenger):
+    if passenger.status == 'cancelled':
+        return None
+    return Posting(
+        'charge', passenger.total_price, passenger.currency, passenger.group_id,
+        passenger.pk, passenger.created_at.date() if passenger.created_at else timezone.localdate(),
+        passenger.group.start_date, 'Tour price'
+    )
+
+
+def _additional_sale_posting(sale):
+    created = sale.created_at.date() if sale.created_at else timezone.localdate()
+    return Posting(
+        'charge', sale.total_amount, sale.currency, sale.passenger.group_id,
+        sale.passenger_id, created, sale.payment_date or created,
+        sale.description[:200]
+    )
+
+
+def _bank_deposit_posting(deposit):
+    if deposit.status != 'verified':
+        return None
+    return Posting(
+        'payment', -deposit.amount, deposit.currency, deposit.group_id,
+        deposit.passenger_id, deposit.deposit_date, None,
+        f"Deposit {deposit.reference_number}".strip()
+    )
+
+
+def _note_posting(invoice):
+    if invoice.status in ('draft', 'cancelled'):
+        return None
+    if invoice.invoice_type == 'nota_credito':
+        entry_type, amount = 'credit', -invoice.total_amount
+    else:
+        entry_type, amount = 'charge', invoice.total_amount
+    return Posting(
+        entry_type, amount, invoice.currency, invoice.passenger.group_id,
+        invoice.passenger_id, invoice.issue_date, invoice.due_date or invoice.issue_date,
+        invoice.invoice_number
+    )
+
+
+# source_type -> (model, select_related, posting builder)
+SOURCES = {
+    'passenger': (Passenger, ['group'], _passenger_posting),
+    'additional_sale': (AdditionalSale, ['passenger'], _additional_sale_posting),
+    'bank_deposit': (BankDeposit, [], _bank_deposit_posting),
+    'credit_note': (Invoice, ['passenger'], _note_posting),
+    'debit_note': (Invoice, ['passenger'], _note_posting),
+}
+
+NOTE_SOURCE_TYPES = {'nota_credito': 'credit_note', 'nota_debito': 'debit_note'}
+
+
+def source_type_for(obj):
+    """Ledger source type of a model instance, or None if it is not posted."""
+    if isinstance(obj, Invoice):
+        return NOTE_SOURCE_TYPES.get(obj.invoice_type)
+    for source_type, (model, _, _) in SOURCES.items():
+        if isinstance(obj, model):
+            return source_type
+    return None
+
+
+def _apply_balance(model, lookup, entry_type, amount, now):
+    balance, _ = model.objects.select_for_update().get_or_create(**lookup)
+    # Totals are kept positive: payments and credits are posted as negatives
+    total_field = _TOTAL_FIELDS[entry_type]
+    signed = amount if entry_type == 'charge' else -amount
+    model.objects.filter(pk=balance.pk).update(**{
+        'balance': F('balance') + amount,
+        total_field: F(total_field) + signed,
+        'last_entry_at': now,
+    })
+    return balance.balance + amount
+
+
+def post_entry(source_type, source_id, posting, amount):
+    """
+    Append one entry and move the materialized balances.
+
+    Args:
+        source_type: Ledger source type
+        source_id: Primary key of the source object
+        posting: Posting describing the source
+        amount: Signed amount of this entry (may be a correction)
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        if posting.passenger_id:
+            balance_after = _apply_balance(
+                AccountBalance,
+                {'passenger_id': posting.passenger_id, 'currency': posting.currency},
+                posting.entry_type, amount, now)
+            _apply_balance(
+                GroupBalance, {'group_id': posting.group_id, 'currency': posting.currency},
+                posting.entry_type, amount, now)
+        else:
+            balance_after = _apply_balance(
+                GroupBalance, {'group_id': posting.group_id, 'currency': posting.currency},
+                posting.entry_type, amount, now)
+
+        return LedgerEntry.objects.create(
+            group_id=posting.group_id,
+            passenger_id=posting.passenger_id,
+            entry_type=posting.entry_type,
+            source_type=source_type,
+            source_id=source_id,
+            description=posting.description,
+            amount=amount,
+            currency=posting.currency,
+            entry_date=posting.entry_date,
+            due_date=posting.due_date,
+            balance_after=balance_after,
+        )
+
+
+def _posted(source_type, source_id):
+    """Last posting context and net posted amount per currency for a source."""
+    rows = LedgerEntry.objects.filter(
+        source_type=source_type, source_id=source_id
+    ).values('currency', 'entry_type', 'group_id', 'passenger_id').annotate(total=Sum('amount'))
+    return [row for row in rows if row['total']]
+
+
+def sync_source(source_type, obj=None, source_id=None):
+    """
+    Bring the ledger in line with a source object.
+
+    Pass obj=None (with source_id) when the source was deleted: everything
+    posted for it is reversed.
+
+    Returns:
+        List of new entries
+    """
+    source_id = obj.pk if obj is not None else source_id
+    _, _, build = SOURCES[source_type]
+    posting = build(obj) if obj is not None else None
+    if posting is not None and not posting.amount:
+        posting = None
+
+    entries = []
+    with transaction.atomic():
+        for row in _posted(source_type, source_id):
+            same_target = (
+                posting is not None
+                and row['currency'] == posting.currency
+                and row['passenger_id'] == posting.passenger_id
+                and row['group_id'] == posting.group_id
+            )
+            if same_target:
+                delta = posting.amount - row['total']
+                if delta:
+                    entries.append(post_entry(source_type, source_id, posting, delta))
+                posting = None
+            else:
+                reversal = Posting(
+                    row['entry_type'], row['total'], row['currency'], row['group_id'],
+                    row['passenger_id'], timezone.localdate(), None, 'Reversal')
+                entries.append(post_entry(source_type, source_id, reversal, -row['total']))
+
+        if posting is not None:
+            entries.append(post_entry(source_type, source_id, posting, posting.amount))
+
+    return entries
+
+
+def sync_queryset(source_type, queryset, batch_size=500):
+    """Sync every object of a queryset (backfills and bulk updates)."""
+    model, related, _ = SOURCES[source_type]
+    count = 0
+    for obj in queryset.select_related(*related).iterator(chunk_size=batch_size):
+        sync_source(source_type, obj)
+        count += 1
+    return count
+
+
+def _entry_totals(entries, key):
+    """Balance and positive totals per key, summed from ledger entries."""
+    totals = {}
+    for row in entries.values(*key, 'entry_type').annotate(total=Sum('amount')).order_by():
+        values = totals.setdefault(tuple(row[field] for field in key), {
+            'balance': ZERO, 'total_charges': ZERO, 'total_payments': ZERO, 'total_credits': ZERO,
+        })
+        values['balance'] += row['total']
+        signed = row['total'] if row['entry_type'] == 'charge' else -row['total']
+        values[_TOTAL_FIELDS[row['entry_type']]] += signed
+    return totals
+
+
+def remove_passenger(passenger_id):
+    """
+    Take a deleted passenger's entries out of the group balances.
+
+    The entries and the passenger's own balances go with the delete
+    cascade; call this before the delete runs.
+    """
+    now = timezone.now()
+    totals = _entry_totals(LedgerEntry.objects.filter(passenger_id=passenger_id),
+                           ['group_id', 'currency'])
+    with transaction.atomic():
+        for (group_id, currency), values in sorted(totals.items()):
+            GroupBalance.objects.filter(
+                group_id=group_id, currency=currency
+            ).update(last_entry_at=now, **{
+                field: F(field) - amount for field, amount in values.items()
+            })
+
+
+def recompute_group_balances():
+    """Rewrite every group balance from the entries in the ledger."""
+    totals = _entry_totals(LedgerEntry.objects.all(), ['group_id', 'currency'])
+    with transaction.atomic():
+        for balance in GroupBalance.objects.select_for_update().order_by('pk'):
+            values = totals.pop((balance.group_id, balance.currency), None) or {
+                field: ZERO for field in ('balance', *_TOTAL_FIELDS.values())}
+            if any(getattr(balance, field) != amount for field, amount in values.items()):
+                GroupBalance.objects.filter(pk=balance.pk).update(**values)
+        GroupBalance.objects.bulk_create([
+            GroupBalance(group_id=group_id, currency=currency, **values)
+            for (group_id, currency), values in totals.items()
+        ])
+
+
+def rebuild(batch_size=500):
+    """
+    Post every source that is not yet reflected in the ledger, then
+    recompute the group balances from the surviving entries.
+    """
+    totals = {}
+    for source_type, (model, related, _) in SOURCES.items():
+        queryset = model.objects.all()
+        if model is Invoice:
+            invoice_type = next(
+                key for key, value in NOTE_SOURCE_TYPES.items() if value == source_type)
+            queryset = queryset.filter(invoice_type=invoice_type)
+        totals[source_type] = sync_queryset(source_type, queryset, batch_size)
+    recompute_group_balances()
+    return totals
+
+
+def receivables_aging(as_of=None, group=None, currency=None):
+    """
+    Age outstanding passenger balances using only the ledger.
+
+    Payments are assumed to settle the oldest charges first, so a positive
+    balance is made of the most recent charges: walk each debtor's charges
+    newest first and spread the balance over their due dates.
+
+    Returns:
+        Dict with per-currency bucket totals and per-passenger rows
+    """
+    as_of = as_of or timezone.localdate()
+
+    balances = AccountBalance.objects.filter(balance__gt=0)
+    if group:
+        balances = balances.filter(passenger__group=group)
+    if currency:
+        balances = balances.filter(currency=currency)
+    outstanding = {
+        (row['passenger_id'], row['currency']): row['balance']
+        for row in balances.values('passenger_id', 'currency', 'balance')
+    }
+    if not outstanding:
+        return {'as_of': as_of, 'totals': {}, 'passengers': []}
+
+    charges = LedgerEntry.objects.filter(
+        passenger_id__in={passenger_id for passenger_id, _ in outstanding},
+        entry_type='charge',
+        amount__gt=0,
+    ).order_by('passenger_id', 'currency', F('due_date').desc(nulls_last=True), '-id').values_list(
+        'passenger_id', 'currency', 'amount', 'due_date', 'entry_date')
+
+    rows = {}
+    for passenger_id, entry_currency, amount, due_date, entry_date in charges.iterator(chunk_size=5000):
+        key = (passenger_id, entry_currency)
+        remaining = outstanding.get(key, ZERO)
+        if remaining <= 0:
+            continue
+        allocated = min(amount, remaining)
+        outstanding[key] = remaining - allocated
+
+        days = (as_of - (due_date or entry_date)).days
+        row = rows.setdefault(key, {name: ZERO for name, _, _ in AGING_BUCKETS})
+        row[_bucket(days)] += allocated
+
+    # Balance not explained by charges (e.g. reversed payments) counts as current
+    for key, remaining in outstanding.items():
+        if remaining > 0:
+            row = rows.setdefault(key, {name: ZERO for name, _, _ in AGING_BUCKETS})
+            row['current'] += remaining
+
+    totals = {}
+    passengers = []
+    for (passenger_id, entry_currency), buckets in rows.items():
+        currency_totals = totals.setdefault(
+            entry_currency, {name: ZERO for name, _, _ in AGING_BUCKETS})
+        for name, value in buckets.items():
+            currency_totals[name] += value
+        passengers.append({
+            'passenger': passenger_id,
+            'currency': entry_currency,
+            'total': sum(buckets.values()),
+            **buckets,
+        })
+
+    passengers.sort(key=lambda row: row['total'], reverse=True)
+    return {'as_of': as_of, 'totals': totals, 'passengers': passengers}
+
+
+def _bucket(days):
+    for name, start, end in AGING_BUCKETS:
+        if (start is None or days >= start) and (end is None or days <= end):
+            return name
+    return AGING_BUCKETS[-1][0]
@@ -0,0 +1,40 @@
+"""
+Fill base-currency amounts on existing financial rows.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.financial.currency import backfill_base_amounts
+from apps.financial.models import AdditionalSale, BankDeposit, Commission, GroupCost, Invoice
+
+MODELS = {
+    'groupcost': GroupCost,
+    'additionalsale': AdditionalSale,
+    'commission': Commission,
+    'invoice': Invoice,
+    'bankdeposit': BankDeposit,
+}
+
+
+class Command(BaseCommand):
+    help = 'Convert financial amounts to BASE_CURRENCY using the transaction date rate'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', action='append', dest='models', choices=list(MODELS),
+            help='Model to backfill (repeatable, default: all)')
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Recompute every row, not only rows without a base amount')
+        parser.add_argument('--currency', help='Only rows in this currency')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for name in options['models'] or MODELS:
+            updated, missing = backfill_base_amounts(
+                MODELS[name],
+                only_missing=not options['all'],
+                currency=options['currency'],
+                batch_size=options['batch_size'],
+            )
+            self.stdout.write(f'{name}: {updated} rows processed, {missing} without exchange rate')
+        self.stdout.write(self.style.SUCCESS('Base amounts backfilled'))
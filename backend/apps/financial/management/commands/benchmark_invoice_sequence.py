@@ -0,0 +1,93 @@
+"""
+Contention benchmark for the invoice number allocator.
+"""
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.financial.models import InvoiceSeries
+from apps.financial.sequences import allocate_invoice_numbers
+
+
+class Command(BaseCommand):
+    help = 'Allocate invoice numbers from concurrent writers and verify the series is gapless'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=50)
+        parser.add_argument('--allocations', type=int, default=20,
+                            help='Transactions per writer')
+        parser.add_argument('--batch', type=int, default=1,
+                            help='Numbers reserved per transaction')
+        parser.add_argument('--series', default='Z999',
+                            help='Scratch series, deleted afterwards')
+        parser.add_argument('--hold-ms', type=float, default=0,
+                            help='Simulated work inside each transaction')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The benchmark needs PostgreSQL row locking')
+
+        series = options['series']
+        if InvoiceSeries.objects.filter(series=series).exists():
+            raise CommandError(f'Series {series} already exists; pick a scratch series')
+        InvoiceSeries.objects.create(
+            series=series, invoice_type='boleta', description='Benchmark')
+
+        allocated = []
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        start_barrier = threading.Barrier(options['writers'])
+
+        def writer():
+            numbers = []
+            timings = []
+            try:
+                start_barrier.wait()
+                for _ in range(options['allocations']):
+                    started = time.perf_counter()
+                    with transaction.atomic():
+                        numbers.extend(allocate_invoice_numbers(series, options['batch']))
+                        if options['hold_ms']:
+                            time.sleep(options['hold_ms'] / 1000)
+                    timings.append(time.perf_counter() - started)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+            with lock:
+                allocated.extend(numbers)
+                latencies.extend(timings)
+
+        threads = [threading.Thread(target=writer) for _ in range(options['writers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        InvoiceSeries.objects.filter(series=series).delete()
+
+        if errors:
+            raise CommandError(f'{len(errors)} writers failed: {errors[0]}')
+
+        expected = options['writers'] * options['allocations'] * options['batch']
+        correlativos = sorted(int(number.split('-')[1]) for number in allocated)
+        gapless = correlativos == list(range(1, expected + 1))
+
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(f"Writers:            {options['writers']}")
+        self.stdout.write(f'Numbers allocated:  {len(allocated)} (expected {expected})')
+        self.stdout.write(f'Elapsed:            {elapsed:.2f}s')
+        self.stdout.write(f'Throughput:         {len(allocated) / elapsed:.0f} numbers/s')
+        self.stdout.write(f'Latency p50:        {statistics.median(latencies) * 1000:.1f} ms')
+        self.stdout.write(f'Latency p95:        {p95 * 1000:.1f} ms')
+
+        if not gapless:
+            raise CommandError('Series has gaps or duplicates')
+        self.stdout.write(self.style.SUCCESS('Series is gapless and duplicate-free'))
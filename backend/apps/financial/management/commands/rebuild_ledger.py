@@ -0,0 +1,19 @@
+"""
+Post missing or changed sources to the receivables ledger.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.financial.ledger import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Sync the receivables ledger with passengers, sales, deposits and notes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        totals = rebuild(batch_size=options['batch_size'])
+        for source_type, count in totals.items():
+            self.stdout.write(f'{source_type}: {count} sources checked')
+        self.stdout.write(self.style.SUCCESS('Ledger is in sync'))
@@ -0,0 +1,22 @@
+"""
+Run the local SUNAT stand-in.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.financial.sunat.fake_server import FakeSunatServer
+
+
+class Command(BaseCommand):
+    help = 'Run a local fake SUNAT billing service (point SUNAT_API_URL at it)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8089)
+
+    def handle(self, *args, **options):
+        server = FakeSunatServer(options['host'], options['port'])
+        self.stdout.write(self.style.SUCCESS(f'Fake SUNAT listening on {server.url}'))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.stop()
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoice',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('issued', 'Issued'), ('queued', 'Queued for SUNAT'), ('sent', 'Sent to SUNAT'), ('accepted', 'Accepted by SUNAT'), ('rejected', 'Rejected by SUNAT'), ('cancelled', 'Cancelled')], default='draft', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='SunatSummary',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('identifier', models.CharField(help_text='e.g., RC-20260119-1', max_length=30, unique=True)),
+                ('reference_date', models.DateField(help_text='Issue date of the boletas')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent to SUNAT'), ('accepted', 'Accepted by SUNAT'), ('rejected', 'Rejected by SUNAT')], default='pending', max_length=20)),
+                ('ticket', models.CharField(blank=True, max_length=50)),
+                ('sunat_response', models.JSONField(blank=True, default=dict)),
+                ('xml_file', models.FileField(blank=True, null=True, upload_to='invoices/summaries/')),
+            ],
+            options={
+                'verbose_name': 'SUNAT Summary',
+                'verbose_name_plural': 'SUNAT Summaries',
+                'db_table': 'sunat_summaries',
+                'ordering': ['-reference_date', '-identifier'],
+                'indexes': [models.Index(fields=['status', 'reference_date'], name='sunat_summa_status_fe6573_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='sunat_summary',
+            field=models.ForeignKey(blank=True, help_text='Resumen diario that reported this boleta', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='invoices', to='financial.sunatsummary'),
+        ),
+    ]
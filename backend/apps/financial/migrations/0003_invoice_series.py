@@ -0,0 +1,64 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:43
+
+import django.core.validators
+import uuid
+from django.db import migrations, models
+
+
+DEFAULT_SERIES = {
+    'boleta': 'B001',
+    'factura': 'F001',
+    'nota_credito': 'FC01',
+    'nota_debito': 'FD01',
+}
+
+
+def seed_series(apps, schema_editor):
+    """Create the default series, continuing after any existing numbers."""
+    Invoice = apps.get_model('financial', 'Invoice')
+    InvoiceSeries = apps.get_model('financial', 'InvoiceSeries')
+
+    for invoice_type, series in DEFAULT_SERIES.items():
+        last_number = 0
+        numbers = Invoice.objects.filter(
+            invoice_number__startswith=f'{series}-'
+        ).values_list('invoice_number', flat=True)
+        for number in numbers.iterator():
+            correlativo = number.split('-', 1)[1]
+            if correlativo.isdigit():
+                last_number = max(last_number, int(correlativo))
+
+        InvoiceSeries.objects.get_or_create(
+            series=series,
+            defaults={'invoice_type': invoice_type, 'next_number': last_number + 1}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0002_sunat_submission'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSeries',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('series', models.CharField(max_length=4, unique=True)),
+                ('invoice_type', models.CharField(choices=[('boleta', 'Boleta de Venta'), ('factura', 'Factura'), ('nota_credito', 'Nota de Crédito'), ('nota_debito', 'Nota de Débito')], max_length=20)),
+                ('next_number', models.PositiveBigIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)])),
+                ('is_active', models.BooleanField(default=True)),
+                ('description', models.CharField(blank=True, max_length=200)),
+            ],
+            options={
+                'verbose_name': 'Invoice Series',
+                'verbose_name_plural': 'Invoice Series',
+                'db_table': 'invoice_series',
+                'ordering': ['series'],
+            },
+        ),
+        migrations.RunPython(seed_series, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:47
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circuits', '0002_passenger_search_vector'),
+        ('financial', '0003_invoice_series'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankStatement',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('file', models.FileField(upload_to='bank_statements/%Y/%m/')),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('ofx', 'OFX')], max_length=10)),
+                ('bank_name', models.CharField(blank=True, max_length=100)),
+                ('account_number', models.CharField(blank=True, max_length=50)),
+                ('default_currency', models.CharField(default='PEN', max_length=3)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('reconciled', 'Reconciled'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('line_count', models.PositiveIntegerField(default=0)),
+                ('matched_count', models.PositiveIntegerField(default=0)),
+                ('suggested_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Bank Statement',
+                'verbose_name_plural': 'Bank Statements',
+                'db_table': 'bank_statements',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BankStatementLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line_number', models.PositiveIntegerField()),
+                ('transaction_date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('currency', models.CharField(max_length=3)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('description', models.CharField(blank=True, max_length=255)),
+                ('match_status', models.CharField(choices=[('unmatched', 'Unmatched'), ('matched', 'Matched to deposit'), ('suggested', 'Suggested match'), ('duplicate', 'Duplicate line')], default='unmatched', max_length=20)),
+                ('match_score', models.DecimalField(blank=True, decimal_places=3, max_digits=4, null=True)),
+            ],
+            options={
+                'verbose_name': 'Bank Statement Line',
+                'verbose_name_plural': 'Bank Statement Lines',
+                'db_table': 'bank_statement_lines',
+                'ordering': ['statement', 'line_number'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='bankdeposit',
+            name='bank_deposi_referen_da3ae3_idx',
+        ),
+        migrations.AddIndex(
+            model_name='bankdeposit',
+            index=django.contrib.postgres.indexes.HashIndex(fields=['reference_number'], name='bank_deposits_ref_hash'),
+        ),
+        migrations.AddField(
+            model_name='bankstatement',
+            name='uploaded_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bank_statements', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='bankstatementline',
+            name='deposit',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='statement_lines', to='financial.bankdeposit'),
+        ),
+        migrations.AddField(
+            model_name='bankstatementline',
+            name='invoice',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='statement_lines', to='financial.invoice'),
+        ),
+        migrations.AddField(
+            model_name='bankstatementline',
+            name='passenger',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='statement_lines', to='circuits.passenger'),
+        ),
+        migrations.AddField(
+            model_name='bankstatementline',
+            name='statement',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='financial.bankstatement'),
+        ),
+        migrations.AddIndex(
+            model_name='bankstatementline',
+            index=models.Index(fields=['statement', 'match_status'], name='bank_statem_stateme_cbbddc_idx'),
+        ),
+    ]
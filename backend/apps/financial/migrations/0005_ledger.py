@@ -0,0 +1,79 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circuits', '0002_passenger_search_vector'),
+        ('financial', '0004_bank_reconciliation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_charges', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_payments', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_credits', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_entry_at', models.DateTimeField(blank=True, null=True)),
+                ('passenger', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='circuits.passenger')),
+            ],
+            options={
+                'verbose_name': 'Passenger Balance',
+                'verbose_name_plural': 'Passenger Balances',
+                'db_table': 'passenger_balances',
+                'indexes': [models.Index(fields=['currency', 'balance'], name='passenger_b_currenc_197397_idx')],
+                'unique_together': {('passenger', 'currency')},
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_charges', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_payments', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_credits', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('last_entry_at', models.DateTimeField(blank=True, null=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='circuits.group')),
+            ],
+            options={
+                'verbose_name': 'Group Balance',
+                'verbose_name_plural': 'Group Balances',
+                'db_table': 'group_balances',
+                'unique_together': {('group', 'currency')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entry_type', models.CharField(choices=[('charge', 'Charge'), ('payment', 'Payment'), ('credit', 'Credit')], max_length=20)),
+                ('source_type', models.CharField(choices=[('passenger', 'Tour Price'), ('additional_sale', 'Additional Sale'), ('bank_deposit', 'Bank Deposit'), ('credit_note', 'Credit Note'), ('debit_note', 'Debit Note')], max_length=20)),
+                ('source_id', models.UUIDField()),
+                ('description', models.CharField(blank=True, max_length=200)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('currency', models.CharField(max_length=3)),
+                ('entry_date', models.DateField()),
+                ('due_date', models.DateField(blank=True, null=True)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='circuits.group')),
+                ('passenger', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='circuits.passenger')),
+            ],
+            options={
+                'verbose_name': 'Ledger Entry',
+                'verbose_name_plural': 'Ledger Entries',
+                'db_table': 'ledger_entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['passenger', 'currency', 'id'], name='ledger_entr_passeng_2aae83_idx'), models.Index(fields=['group', 'currency'], name='ledger_entr_group_i_4628c4_idx'), models.Index(fields=['source_type', 'source_id'], name='ledger_entr_source__b9ad33_idx')],
+            },
+        ),
+    ]
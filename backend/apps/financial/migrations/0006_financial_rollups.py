@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circuits', '0002_passenger_search_vector'),
+        ('financial', '0005_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('metric', models.CharField(choices=[('revenue', 'Additional Sales Revenue'), ('cost', 'Group Costs')], max_length=20)),
+                ('category', models.CharField(max_length=20)),
+                ('currency', models.CharField(max_length=3)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='financial_rollups', to='circuits.program')),
+            ],
+            options={
+                'verbose_name': 'Financial Rollup',
+                'verbose_name_plural': 'Financial Rollups',
+                'db_table': 'financial_rollups',
+                'ordering': ['day'],
+                'indexes': [models.Index(fields=['metric', 'day'], name='financial_r_metric_7d9a59_idx')],
+                'unique_together': {('day', 'metric', 'program', 'category', 'currency')},
+            },
+        ),
+    ]
@@ -0,0 +1,149 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:54
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+CENT = Decimal('0.01')
+
+# model -> (amount field, transaction date field or None for created_at)
+CONVERTED_MODELS = {
+    'GroupCost': ('total_amount', None),
+    'AdditionalSale': ('total_amount', None),
+    'Commission': ('commission_amount', None),
+    'Invoice': ('total_amount', 'issue_date'),
+    'BankDeposit': ('amount', 'deposit_date'),
+}
+
+# metric -> (model, program path, category field)
+ROLLUP_SOURCES = {
+    'revenue': ('AdditionalSale', 'passenger__group__program', 'sale_type'),
+    'cost': ('GroupCost', 'group__program', 'cost_type'),
+}
+
+
+def fill_base_amounts(apps, schema_editor):
+    """Convert existing rows, then carry the base amounts into the rollups."""
+    ExchangeRate = apps.get_model('suppliers', 'ExchangeRate')
+    FinancialRollup = apps.get_model('financial', 'FinancialRollup')
+    base_currency = settings.BASE_CURRENCY
+    rates = {}
+
+    def rate(currency, day):
+        if currency == base_currency:
+            return Decimal('1')
+        if (currency, day) not in rates:
+            value = ExchangeRate.objects.filter(
+                from_currency=currency, to_currency=base_currency, date__lte=day
+            ).order_by('-date').values_list('rate', flat=True).first()
+            if not value:
+                inverse = ExchangeRate.objects.filter(
+                    from_currency=base_currency, to_currency=currency, date__lte=day
+                ).order_by('-date').values_list('rate', flat=True).first()
+                value = (Decimal('1') / inverse).quantize(Decimal('0.000001')) if inverse else None
+            rates[(currency, day)] = value
+        return rates[(currency, day)]
+
+    for model_name, (amount_field, date_field) in CONVERTED_MODELS.items():
+        model = apps.get_model('financial', model_name)
+        last_pk = None
+        while True:
+            batch_queryset = model.objects.order_by('pk')
+            if last_pk is not None:
+                batch_queryset = batch_queryset.filter(pk__gt=last_pk)
+            batch = list(batch_queryset[:BATCH_SIZE])
+            if not batch:
+                break
+            for obj in batch:
+                day = getattr(obj, date_field) if date_field else timezone.localdate(obj.created_at)
+                obj.base_exchange_rate = rate(obj.currency, day)
+                amount = getattr(obj, amount_field)
+                obj.base_currency_amount = (
+                    (amount * obj.base_exchange_rate).quantize(CENT)
+                    if obj.base_exchange_rate is not None and amount is not None else None)
+            model.objects.bulk_update(batch, ['base_currency_amount', 'base_exchange_rate'])
+            last_pk = batch[-1].pk
+
+    for metric, (model_name, program_path, category_field) in ROLLUP_SOURCES.items():
+        model = apps.get_model('financial', model_name)
+        rows = model.objects.annotate(
+            day=TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+        ).order_by().values('day', program_path, category_field, 'currency').annotate(
+            total=Coalesce(Sum('base_currency_amount'), Decimal('0')))
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            FinancialRollup.objects.filter(
+                day=row['day'], metric=metric, program_id=row[program_path],
+                category=row[category_field], currency=row['currency'],
+            ).update(base_currency_amount=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0006_financial_rollups'),
+        ('suppliers', '0002_supplier_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='additionalsale',
+            name='base_currency_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Amount in settings.BASE_CURRENCY at the transaction date', max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='additionalsale',
+            name='base_exchange_rate',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='bankdeposit',
+            name='base_currency_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Amount in settings.BASE_CURRENCY at the transaction date', max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='bankdeposit',
+            name='base_exchange_rate',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='commission',
+            name='base_currency_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Amount in settings.BASE_CURRENCY at the transaction date', max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='commission',
+            name='base_exchange_rate',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='financialrollup',
+            name='base_currency_amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='groupcost',
+            name='base_currency_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Amount in settings.BASE_CURRENCY at the transaction date', max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='groupcost',
+            name='base_exchange_rate',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='base_currency_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Amount in settings.BASE_CURRENCY at the transaction date', max_digits=14, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='base_exchange_rate',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=12, null=True),
+        ),
+        migrations.RunPython(fill_base_amounts, migrations.RunPython.noop),
+    ]
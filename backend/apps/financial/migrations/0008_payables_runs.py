@@ -0,0 +1,46 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:57
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0007_base_currency_amounts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayablesRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('currency', models.CharField(max_length=3)),
+                ('due_through', models.DateField(help_text='Pay costs due on or before this date')),
+                ('payment_date', models.DateField()),
+                ('status', models.CharField(choices=[('preparing', 'Preparing'), ('ready', 'Ready to Pay'), ('empty', 'Nothing Due'), ('paid', 'Paid'), ('cancelled', 'Cancelled'), ('failed', 'Failed')], default='preparing', max_length=20)),
+                ('supplier_count', models.PositiveIntegerField(default=0)),
+                ('cost_count', models.PositiveIntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payment_file', models.FileField(blank=True, upload_to='payables/%Y/%m/')),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payables_runs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Payables Run',
+                'verbose_name_plural': 'Payables Runs',
+                'db_table': 'payables_runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='groupcost',
+            name='payables_run',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='costs', to='financial.payablesrun'),
+        ),
+    ]
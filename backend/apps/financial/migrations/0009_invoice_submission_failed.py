@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0008_payables_runs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='invoice',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('issued', 'Issued'), ('queued', 'Queued for SUNAT'), ('sent', 'Sent to SUNAT'), ('accepted', 'Accepted by SUNAT'), ('rejected', 'Rejected by SUNAT'), ('failed', 'Submission Failed'), ('cancelled', 'Cancelled')], default='draft', max_length=20),
+        ),
+    ]
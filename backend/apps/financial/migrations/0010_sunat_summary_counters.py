@@ -0,0 +1,50 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:27
+
+from datetime import datetime
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    """Continue each day after the highest existing RC-YYYYMMDD-n identifier."""
+    SunatSummary = apps.get_model('financial', 'SunatSummary')
+    SunatSummaryCounter = apps.get_model('financial', 'SunatSummaryCounter')
+
+    last_numbers = {}
+    for identifier in SunatSummary.objects.values_list('identifier', flat=True).iterator():
+        parts = identifier.split('-')
+        if len(parts) != 3 or parts[0] != 'RC' or not parts[2].isdigit():
+            continue
+        try:
+            day = datetime.strptime(parts[1], '%Y%m%d').date()
+        except ValueError:
+            continue
+        last_numbers[day] = max(last_numbers.get(day, 0), int(parts[2]))
+
+    SunatSummaryCounter.objects.bulk_create(
+        [SunatSummaryCounter(day=day, last_number=number) for day, number in last_numbers.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0009_invoice_submission_failed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SunatSummaryCounter',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'SUNAT Summary Counter',
+                'verbose_name_plural': 'SUNAT Summary Counters',
+                'db_table': 'sunat_summary_counters',
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0010_sunat_summary_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sunatsummary',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent to SUNAT'), ('accepted', 'Accepted by SUNAT'), ('rejected', 'Rejected by SUNAT'), ('failed', 'Submission Failed')], default='pending', max_length=20),
+        ),
+    ]
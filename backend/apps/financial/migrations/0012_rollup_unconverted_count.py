@@ -0,0 +1,46 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:42
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+# metric -> (model, program path, category field)
+ROLLUP_SOURCES = {
+    'revenue': ('AdditionalSale', 'passenger__group__program', 'sale_type'),
+    'cost': ('GroupCost', 'group__program', 'cost_type'),
+}
+
+
+def count_unconverted(apps, schema_editor):
+    """Count the existing rows without a base amount into their rollups."""
+    FinancialRollup = apps.get_model('financial', 'FinancialRollup')
+    for metric, (model_name, program_path, category_field) in ROLLUP_SOURCES.items():
+        model = apps.get_model('financial', model_name)
+        rows = model.objects.filter(base_currency_amount__isnull=True).annotate(
+            day=TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+        ).order_by().values('day', program_path, category_field, 'currency').annotate(
+            total=Count('id'))
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            FinancialRollup.objects.filter(
+                day=row['day'], metric=metric, program_id=row[program_path],
+                category=row[category_field], currency=row['currency'],
+            ).update(unconverted_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financial', '0011_sunat_summary_failed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='financialrollup',
+            name='unconverted_count',
+            field=models.PositiveIntegerField(default=0, help_text='Rows left out of base_currency_amount (no exchange rate yet)'),
+        ),
+        migrations.RunPython(count_unconverted, migrations.RunPython.noop),
+    ]
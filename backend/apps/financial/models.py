@@ -1,14 +1,76 @@
 """
-Financial models: GroupCost, AdditionalSale, Commission, Invoice, BankDeposit.
+Financial models: BaseCurrencyModel, GroupCost, AdditionalSale, Commission,
+Invoice, InvoiceSeries, SunatSummary, BankDeposit, BankStatement,
+BankStatementLine, LedgerEntry, AccountBalance, GroupBalance, FinancialRollup,
+PayablesRun.
 """
+from django.contrib.postgres.indexes import HashIndex
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from core.common.models import TimeStampedModel
-from apps.circuits.models import Group, Passenger
+from apps.circuits.models import Program, Group, Passenger
 from apps.suppliers.models import Supplier
+from .currency import to_base
 
 
-class GroupCost(TimeStampedModel):
+class BaseCurrencyModel(TimeStampedModel):
+    """
+    Abstract financial row that also stores its amount in BASE_CURRENCY.
+
+    The amount is converted with the exchange rate of the transaction date
+    when the row is created, and again only when its amount, currency or
+    transaction date change, so cross-currency totals are a plain SUM of
+    base_currency_amount and settling a row later keeps its historical base
+    amount. Rows written while no rate was known keep NULL until
+    backfill_base_amounts fills them.
+    """
+
+    # Field holding the amount to convert
+    amount_field = 'total_amount'
+
+    base_currency_amount = models.DecimalField(
+        max_digits=14, decimal_places=2, null=True, blank=True,
+        help_text='Amount in settings.BASE_CURRENCY at the transaction date')
+    base_exchange_rate = models.DecimalField(
+        max_digits=12, decimal_places=6, null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not instance.get_deferred_fields():
+            instance._converted_from = instance._conversion_inputs()
+        return instance
+
+    def get_transaction_date(self):
+        """Date whose exchange rate applies to this row (the day it was recorded)."""
+        return timezone.localdate(self.created_at) if self.created_at else timezone.localdate()
+
+    def _conversion_inputs(self):
+        return getattr(self, self.amount_field), self.currency, self.get_transaction_date()
+
+    def apply_base_amount(self, rates=None):
+        """Convert the amount to the base currency (rates: optional RateCache)."""
+        self.base_currency_amount, self.base_exchange_rate = to_base(
+            getattr(self, self.amount_field), self.currency,
+            self.get_transaction_date(), rates)
+
+    def save(self, *args, **kwargs):
+        inputs = self._conversion_inputs()
+        if self.base_currency_amount is None or inputs != getattr(self, '_converted_from', None):
+            self.apply_base_amount()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {
+                    'base_currency_amount', 'base_exchange_rate'}
+        super().save(*args, **kwargs)
+        self._converted_from = inputs
+
+
+class GroupCost(BaseCurrencyModel):
     """Costs associated with a group."""
 
     COST_TYPE_CHOICES = [
@@ -49,6 +111,13 @@ class GroupCost(TimeStampedModel):
     # Payment
     paid = models.BooleanField(default=False)
     payment_date = models.DateField(null=True, blank=True)
+    payables_run = models.ForeignKey(
+        'PayablesRun',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='costs'
+    )
 
     # Reference
     invoice_number = models.CharField(max_length=50, blank=True)
@@ -75,7 +144,7 @@ class GroupCost(TimeStampedModel):
         super().save(*args, **kwargs)
 
 
-class AdditionalSale(TimeStampedModel):
+class AdditionalSale(BaseCurrencyModel):
     """Additional sales to passengers (extras, upgrades, etc.)."""
 
     SALE_TYPE_CHOICES = [
@@ -139,9 +208,11 @@ class AdditionalSale(TimeStampedModel):
         super().save(*args, **kwargs)
 
 
-class Commission(TimeStampedModel):
+class Commission(BaseCurrencyModel):
     """Sales commissions."""
 
+    amount_field = 'commission_amount'
+
     COMMISSION_TYPE_CHOICES = [
         ('agent', 'Travel Agent'),
         ('referral', 'Referral'),
@@ -197,7 +268,7 @@ class Commission(TimeStampedModel):
         super().save(*args, **kwargs)
 
 
-class Invoice(TimeStampedModel):
+class Invoice(BaseCurrencyModel):
     """Invoices for passengers (SUNAT electronic invoicing)."""
 
     INVOICE_TYPE_CHOICES = [
@@ -210,9 +281,11 @@ class Invoice(TimeStampedModel):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('issued', 'Issued'),
+        ('queued', 'Queued for SUNAT'),
         ('sent', 'Sent to SUNAT'),
         ('accepted', 'Accepted by SUNAT'),
         ('rejected', 'Rejected by SUNAT'),
+        ('failed', 'Submission Failed'),
         ('cancelled', 'Cancelled'),
     ]
 
@@ -250,6 +323,14 @@ class Invoice(TimeStampedModel):
 
     # SUNAT
     sunat_response = models.JSONField(default=dict, blank=True)
+    sunat_summary = models.ForeignKey(
+        'SunatSummary',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='invoices',
+        help_text='Resumen diario that reported this boleta'
+    )
     xml_file = models.FileField(
         upload_to='invoices/xml/', blank=True, null=True)
     pdf_file = models.FileField(
@@ -273,10 +354,108 @@ class Invoice(TimeStampedModel):
     def __str__(self):
         return f"{self.invoice_number} - {self.customer_name}"
 
+    def get_transaction_date(self):
+        return self.issue_date
+
+
+class InvoiceSeries(TimeStampedModel):
+    """
+    Numbering series for electronic invoices (e.g., B001, F001).
 
-class BankDeposit(TimeStampedModel):
+    `next_number` is the next correlativo to hand out. Numbers are allocated
+    with a row lock held until the surrounding transaction ends, so a
+    rolled-back invoice also rolls back its number and series stay gapless.
+    """
+
+    NUMBER_LENGTH = 8
+    MAX_NUMBER = 99999999
+
+    DEFAULT_SERIES = {
+        'boleta': 'B001',
+        'factura': 'F001',
+        'nota_credito': 'FC01',
+        'nota_debito': 'FD01',
+    }
+
+    series = models.CharField(max_length=4, unique=True)
+    invoice_type = models.CharField(
+        max_length=20, choices=Invoice.INVOICE_TYPE_CHOICES)
+    next_number = models.PositiveBigIntegerField(
+        default=1, validators=[MinValueValidator(1)])
+    is_active = models.BooleanField(default=True)
+    description = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        db_table = 'invoice_series'
+        verbose_name = 'Invoice Series'
+        verbose_name_plural = 'Invoice Series'
+        ordering = ['series']
+
+    def __str__(self):
+        return f"{self.series} ({self.get_invoice_type_display()})"
+
+
+class SunatSummary(TimeStampedModel):
+    """Resumen diario (RC) reporting a batch of boletas to SUNAT."""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent to SUNAT'),
+        ('accepted', 'Accepted by SUNAT'),
+        ('rejected', 'Rejected by SUNAT'),
+        ('failed', 'Submission Failed'),
+    ]
+
+    identifier = models.CharField(
+        max_length=30, unique=True, help_text='e.g., RC-20260119-1')
+    reference_date = models.DateField(help_text='Issue date of the boletas')
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='pending')
+    ticket = models.CharField(max_length=50, blank=True)
+
+    # SUNAT
+    sunat_response = models.JSONField(default=dict, blank=True)
+    xml_file = models.FileField(
+        upload_to='invoices/summaries/', blank=True, null=True)
+
+    class Meta:
+        db_table = 'sunat_summaries'
+        verbose_name = 'SUNAT Summary'
+        verbose_name_plural = 'SUNAT Summaries'
+        ordering = ['-reference_date', '-identifier']
+        indexes = [
+            models.Index(fields=['status', 'reference_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.identifier} ({self.status})"
+
+
+class SunatSummaryCounter(models.Model):
+    """
+    Last resumen diario correlativo used on a day (RC-YYYYMMDD-n).
+
+    Allocated like InvoiceSeries numbers: the row lock taken by the
+    increment serializes concurrent summary runs.
+    """
+
+    day = models.DateField(primary_key=True)
+    last_number = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'sunat_summary_counters'
+        verbose_name = 'SUNAT Summary Counter'
+        verbose_name_plural = 'SUNAT Summary Counters'
+
+    def __str__(self):
+        return f"RC-{self.day:%Y%m%d} ({self.last_number})"
+
+
+class BankDeposit(BaseCurrencyModel):
     """Bank deposits/payments from clients."""
 
+    amount_field = 'amount'
+
     PAYMENT_METHOD_CHOICES = [
         ('transfer', 'Bank Transfer'),
         ('deposit', 'Bank Deposit'),
@@ -342,8 +521,308 @@ class BankDeposit(TimeStampedModel):
             models.Index(fields=['group', 'status']),
             models.Index(fields=['passenger', 'deposit_date']),
             models.Index(fields=['status', 'deposit_date']),
-            models.Index(fields=['reference_number']),
+            HashIndex(fields=['reference_number'], name='bank_deposits_ref_hash'),
         ]
 
     def __str__(self):
         return f"{self.group.code} - {self.amount} {self.currency} ({self.deposit_date})"
+
+    def get_transaction_date(self):
+        return self.deposit_date
+
+
+class BankStatement(TimeStampedModel):
+    """Bank statement file imported for automatic reconciliation."""
+
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ofx', 'OFX'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('reconciled', 'Reconciled'),
+        ('failed', 'Failed'),
+    ]
+
+    file = models.FileField(upload_to='bank_statements/%Y/%m/')
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    bank_name = models.CharField(max_length=100, blank=True)
+    account_number = models.CharField(max_length=50, blank=True)
+    default_currency = models.CharField(max_length=3, default='PEN')
+
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='pending')
+    line_count = models.PositiveIntegerField(default=0)
+    matched_count = models.PositiveIntegerField(default=0)
+    suggested_count = models.PositiveIntegerField(default=0)
+
+    uploaded_by = models.ForeignKey(
+        'authentication.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bank_statements'
+    )
+
+    class Meta:
+        db_table = 'bank_statements'
+        verbose_name = 'Bank Statement'
+        verbose_name_plural = 'Bank Statements'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.bank_name or 'Statement'} {self.created_at:%Y-%m-%d} ({self.status})"
+
+
+class BankStatementLine(models.Model):
+    """One credit line of an imported bank statement and its match."""
+
+    MATCH_STATUS_CHOICES = [
+        ('unmatched', 'Unmatched'),
+        ('matched', 'Matched to deposit'),
+        ('suggested', 'Suggested match'),
+        ('duplicate', 'Duplicate line'),
+    ]
+
+    statement = models.ForeignKey(
+        BankStatement, on_delete=models.CASCADE, related_name='lines')
+    line_number = models.PositiveIntegerField()
+    transaction_date = models.DateField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    currency = models.CharField(max_length=3)
+    reference = models.CharField(max_length=100, blank=True)
+    description = models.CharField(max_length=255, blank=True)
+
+    # Match
+    match_status = models.CharField(
+        max_length=20, choices=MATCH_STATUS_CHOICES, default='unmatched')
+    match_score = models.DecimalField(
+        max_digits=4, decimal_places=3, null=True, blank=True)
+    deposit = models.ForeignKey(
+        BankDeposit,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='statement_lines'
+    )
+    invoice = models.ForeignKey(
+        Invoice,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='statement_lines'
+    )
+    passenger = models.ForeignKey(
+        Passenger,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='statement_lines'
+    )
+
+    class Meta:
+        db_table = 'bank_statement_lines'
+        verbose_name = 'Bank Statement Line'
+        verbose_name_plural = 'Bank Statement Lines'
+        ordering = ['statement', 'line_number']
+        indexes = [
+            models.Index(fields=['statement', 'match_status']),
+        ]
+
+    def __str__(self):
+        return f"{self.transaction_date} {self.amount} {self.currency} {self.reference}"
+
+
+class LedgerEntry(models.Model):
+    """
+    Append-only receivables ledger.
+
+    Charges are positive, payments and credits negative. Entries are never
+    updated: a changed or deleted source posts a correcting entry. Invoices
+    (boletas/facturas) document charges already posted from the passenger
+    price and additional sales, so only notes reach the ledger.
+    """
+
+    ENTRY_TYPE_CHOICES = [
+        ('charge', 'Charge'),
+        ('payment', 'Payment'),
+        ('credit', 'Credit'),
+    ]
+
+    SOURCE_TYPE_CHOICES = [
+        ('passenger', 'Tour Price'),
+        ('additional_sale', 'Additional Sale'),
+        ('bank_deposit', 'Bank Deposit'),
+        ('credit_note', 'Credit Note'),
+        ('debit_note', 'Debit Note'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    group = models.ForeignKey(
+        Group, on_delete=models.CASCADE, related_name='ledger_entries')
+    passenger = models.ForeignKey(
+        Passenger,
+        on_delete=models.CASCADE,
+        related_name='ledger_entries',
+        null=True,
+        blank=True
+    )
+
+    entry_type = models.CharField(max_length=20, choices=ENTRY_TYPE_CHOICES)
+    source_type = models.CharField(max_length=20, choices=SOURCE_TYPE_CHOICES)
+    source_id = models.UUIDField()
+    description = models.CharField(max_length=200, blank=True)
+
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    currency = models.CharField(max_length=3)
+    entry_date = models.DateField()
+    due_date = models.DateField(null=True, blank=True)
+
+    # Passenger (or group, for group-level payments) balance after this entry
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'ledger_entries'
+        verbose_name = 'Ledger Entry'
+        verbose_name_plural = 'Ledger Entries'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['passenger', 'currency', 'id']),
+            models.Index(fields=['group', 'currency']),
+            models.Index(fields=['source_type', 'source_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.entry_type} {self.amount} {self.currency} ({self.entry_date})"
+
+
+class AccountBalance(models.Model):
+    """Materialized passenger balance per currency, maintained by the ledger."""
+
+    passenger = models.ForeignKey(
+        Passenger, on_delete=models.CASCADE, related_name='balances')
+    currency = models.CharField(max_length=3)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_charges = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_payments = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_credits = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_entry_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'passenger_balances'
+        verbose_name = 'Passenger Balance'
+        verbose_name_plural = 'Passenger Balances'
+        unique_together = ['passenger', 'currency']
+        indexes = [
+            models.Index(fields=['currency', 'balance']),
+        ]
+
+    def __str__(self):
+        return f"{self.passenger} - {self.balance} {self.currency}"
+
+
+class GroupBalance(models.Model):
+    """Materialized group balance per currency, maintained by the ledger."""
+
+    group = models.ForeignKey(
+        Group, on_delete=models.CASCADE, related_name='balances')
+    currency = models.CharField(max_length=3)
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_charges = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_payments = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_credits = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    last_entry_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'group_balances'
+        verbose_name = 'Group Balance'
+        verbose_name_plural = 'Group Balances'
+        unique_together = ['group', 'currency']
+
+    def __str__(self):
+        return f"{self.group.code} - {self.balance} {self.currency}"
+
+
+class FinancialRollup(models.Model):
+    """
+    Daily pre-aggregated revenue and cost totals.
+
+    One row per day, metric, program, category (sale_type or cost_type) and
+    currency, kept current by apps.financial.rollups.
+    """
+
+    METRIC_CHOICES = [
+        ('revenue', 'Additional Sales Revenue'),
+        ('cost', 'Group Costs'),
+    ]
+
+    day = models.DateField()
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    program = models.ForeignKey(
+        Program, on_delete=models.CASCADE, related_name='financial_rollups')
+    category = models.CharField(max_length=20)
+    currency = models.CharField(max_length=3)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    base_currency_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    row_count = models.PositiveIntegerField(default=0)
+    unconverted_count = models.PositiveIntegerField(
+        default=0, help_text='Rows left out of base_currency_amount (no exchange rate yet)')
+
+    class Meta:
+        db_table = 'financial_rollups'
+        verbose_name = 'Financial Rollup'
+        verbose_name_plural = 'Financial Rollups'
+        ordering = ['day']
+        unique_together = ['day', 'metric', 'program', 'category', 'currency']
+        indexes = [
+            models.Index(fields=['metric', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.metric} {self.category}: {self.amount} {self.currency}"
+
+
+class PayablesRun(TimeStampedModel):
+    """Batch payment of the supplier costs due by a date (see payables.py)."""
+
+    STATUS_CHOICES = [
+        ('preparing', 'Preparing'),
+        ('ready', 'Ready to Pay'),
+        ('empty', 'Nothing Due'),
+        ('paid', 'Paid'),
+        ('cancelled', 'Cancelled'),
+        ('failed', 'Failed'),
+    ]
+
+    currency = models.CharField(max_length=3)
+    due_through = models.DateField(help_text='Pay costs due on or before this date')
+    payment_date = models.DateField()
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='preparing')
+
+    supplier_count = models.PositiveIntegerField(default=0)
+    cost_count = models.PositiveIntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    payment_file = models.FileField(upload_to='payables/%Y/%m/', blank=True)
+    paid_at = models.DateTimeField(null=True, blank=True)
+
+    created_by = models.ForeignKey(
+        'authentication.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='payables_runs'
+    )
+
+    class Meta:
+        db_table = 'payables_runs'
+        verbose_name = 'Payables Run'
+        verbose_name_plural = 'Payables Runs'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.payment_date} {self.currency} ({self.status})"
@@ -0,0 +1,212 @@
+"""
+Supplier payables runs.
+
+A run claims every unpaid GroupCost of one currency that is due by a cutoff
+date, writes the bank payment batch file (one transfer per supplier) and,
+once the bank confirms, marks the claimed costs paid. Due dates come from
+Supplier.payment_terms ("Net 30", "30 días", "contado"...) counted from the
+day the cost was recorded, and are computed in SQL so aggregation is a
+single GROUP BY.
+"""
+import re
+import tempfile
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DateField, ExpressionWrapper, IntegerField, Max, Min, Sum, Value, When
+)
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.suppliers.models import Supplier
+from .models import GroupCost
+
+_TERMS_DAYS_RE = re.compile(r'(\d+)')
+SPOOL_MAX_SIZE = 2 * 1024 * 1024
+
+
+def parse_payment_terms(terms):
+    """Days of credit in a payment terms text (0 for cash or unparsable terms)."""
+    match = _TERMS_DAYS_RE.search(terms or '')
+    return int(match.group(1)) if match else 0
+
+
+def due_date_expression():
+    """SQL expression for a cost's due date: recording day + supplier terms."""
+    suppliers_by_days = defaultdict(list)
+    for supplier_id, terms in Supplier.objects.exclude(
+        payment_terms=''
+    ).values_list('id', 'payment_terms'):
+        days = parse_payment_terms(terms)
+        if days:
+            suppliers_by_days[days].append(supplier_id)
+
+    terms_days = Case(
+        *[When(supplier_id__in=ids, then=Value(days))
+          for days, ids in suppliers_by_days.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    # Postgres: date + integer -> date
+    return ExpressionWrapper(
+        TruncDate('created_at', tzinfo=timezone.get_current_timezone()) + terms_days,
+        output_field=DateField(),
+    )
+
+
+def unpaid_costs(currency=None, due_through=None):
+    """Unpaid supplier costs not claimed by a run, annotated with due_date."""
+    queryset = GroupCost.objects.filter(
+        paid=False, supplier__isnull=False, payables_run__isnull=True
+    ).annotate(due_date=due_date_expression())
+    if currency:
+        queryset = queryset.filter(currency=currency)
+    if due_through:
+        queryset = queryset.filter(due_date__lte=due_through)
+    return queryset
+
+
+def aggregate_by_due_date(queryset):
+    """Totals per supplier, currency and due date in one GROUP BY."""
+    return queryset.order_by().values(
+        'supplier_id', 'supplier__code', 'supplier__name',
+        'supplier__bank_account', 'currency', 'due_date'
+    ).annotate(
+        total_amount=Sum('total_amount'),
+        cost_count=Count('id'),
+    ).order_by('due_date', 'supplier__name')
+
+
+def aggregate_by_supplier(run):
+    """Totals per supplier of a run in one GROUP BY (one transfer each)."""
+    return run.costs.order_by().values(
+        'supplier_id', 'supplier__code', 'supplier__name',
+        'supplier__tax_id', 'supplier__bank_account'
+    ).annotate(
+        total_amount=Sum('total_amount'),
+        cost_count=Count('id'),
+        first_cost=Min('created_at'),
+        last_cost=Max('created_at'),
+    ).order_by('supplier__name')
+
+
+def claim_costs(run):
+    """
+    Attach the due costs to a run with a single UPDATE.
+
+    Costs of suppliers without a bank account are left out so they are
+    picked up by a later run once the account is registered. Concurrent
+    runs cannot claim the same cost: the UPDATE re-checks
+    payables_run IS NULL on rows it had to wait for.
+    """
+    selection = unpaid_costs(run.currency, run.due_through).exclude(
+        supplier__bank_account='')
+    claimed = GroupCost.objects.filter(
+        pk__in=selection.values('pk'), payables_run__isnull=True
+    ).update(payables_run=run, updated_at=timezone.now())
+
+    totals = run.costs.aggregate(
+        total_amount=Sum('total_amount'),
+        supplier_count=Count('supplier_id', distinct=True),
+    )
+    run.cost_count = claimed
+    run.supplier_count = totals['supplier_count']
+    run.total_amount = totals['total_amount'] or Decimal('0')
+    run.save(update_fields=['cost_count', 'supplier_count', 'total_amount', 'updated_at'])
+    return claimed
+
+
+def _field(value, width):
+    """Fixed-width text field (bank formats reject separators in names)."""
+    text = re.sub(r'[|\r\n]', ' ', str(value or ''))
+    return text[:width]
+
+
+def iter_payment_file(run):
+    """
+    Yield the lines of the bank payment batch file of a run.
+
+    Layout (pipe separated): one header line with the ordering company,
+    payment date, currency, transfer count and total; one detail line per
+    supplier with its tax id, name, account, amount and reference.
+    """
+    yield '|'.join([
+        'H', settings.SUNAT_RUC, _field(settings.SUNAT_COMPANY_NAME, 60),
+        f"{run.payment_date:%Y%m%d}", run.currency,
+        str(run.supplier_count), f"{run.total_amount:.2f}",
+    ]) + '\r\n'
+
+    reference = f"PAG{run.payment_date:%Y%m%d}"
+    for row in aggregate_by_supplier(run).iterator(chunk_size=500):
+        yield '|'.join([
+            'D', _field(row['supplier__tax_id'], 20), _field(row['supplier__name'], 60),
+            _field(row['supplier__bank_account'], 30), f"{row['total_amount']:.2f}",
+            _field(f"{reference}-{row['supplier__code']}", 30), str(row['cost_count']),
+        ]) + '\r\n'
+
+
+def write_payment_file(run):
+    """Stream the batch file of a run to its payment_file storage."""
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as tmp:
+        for line in iter_payment_file(run):
+            tmp.write(line.encode('utf-8'))
+        tmp.seek(0)
+        name = f"payables-{run.currency}-{run.payment_date:%Y%m%d}-{str(run.pk)[:8]}.txt"
+        run.payment_file.save(name, File(tmp), save=False)
+    run.save(update_fields=['payment_file', 'updated_at'])
+
+
+def prepare_run(run):
+    """Claim the due costs of a run and write its payment file."""
+    with transaction.atomic():
+        claim_costs(run)
+        if run.cost_count:
+            write_payment_file(run)
+            run.status = 'ready'
+        else:
+            run.status = 'empty'
+        run.save(update_fields=['status', 'updated_at'])
+    return {
+        'costs': run.cost_count,
+        'suppliers': run.supplier_count,
+        'total_amount': str(run.total_amount),
+    }
+
+
+def mark_run_paid(run, payment_date=None):
+    """
+    Mark every cost of a run paid with one bulk UPDATE.
+
+    Base-currency amounts keep the rate of the day each cost was recorded
+    (see BaseCurrencyModel), so the rollups are unaffected; the dashboard
+    KPIs are refreshed since the update skips post_save.
+    """
+    from apps.dashboard.signals import schedule_refresh
+
+    payment_date = payment_date or run.payment_date
+    with transaction.atomic():
+        updated = run.costs.filter(paid=False).update(
+            paid=True,
+            payment_date=payment_date,
+            updated_at=timezone.now(),
+        )
+        run.status = 'paid'
+        run.payment_date = payment_date
+        run.paid_at = timezone.now()
+        run.save(update_fields=['status', 'payment_date', 'paid_at', 'updated_at'])
+        schedule_refresh(GroupCost)
+    return updated
+
+
+def release_run(run):
+    """Cancel a run that was not paid, returning its costs to the pool."""
+    with transaction.atomic():
+        released = run.costs.filter(paid=False).update(
+            payables_run=None, updated_at=timezone.now())
+        run.status = 'cancelled'
+        run.save(update_fields=['status', 'updated_at'])
+    return released
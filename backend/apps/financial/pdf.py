@@ -0,0 +1,181 @@
+"""
+Invoice PDF rendering.
+
+Rendering works on plain dicts built by invoice_context(), so the CPU-heavy
+part runs in Celery workers without further database access. The layout
+(styles, column widths, the static company header) is compiled once per
+worker process and reused for every document.
+"""
+import tempfile
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files import File
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .sunat.ubl import document_filename
+
+# Spool rendered PDFs in memory up to this size before using a temp file
+SPOOL_MAX_SIZE = 5 * 1024 * 1024
+
+
+class InvoiceLayout:
+    """Compiled invoice layout shared by all renders in a process."""
+
+    def __init__(self):
+        base = getSampleStyleSheet()
+        self.styles = {
+            'company': ParagraphStyle('company', parent=base['Title'], fontSize=14, alignment=0),
+            'title': ParagraphStyle('title', parent=base['Heading2'], alignment=2),
+            'label': ParagraphStyle('label', parent=base['Normal'], fontSize=8, textColor=colors.grey),
+            'body': ParagraphStyle('body', parent=base['Normal'], fontSize=9),
+            'footer': ParagraphStyle('footer', parent=base['Normal'], fontSize=7, textColor=colors.grey),
+        }
+        self.company = Paragraph(
+            f"{settings.SUNAT_COMPANY_NAME}<br/>RUC {settings.SUNAT_RUC}", self.styles['company'])
+        self.line_widths = [110 * mm, 20 * mm, 25 * mm, 25 * mm]
+        self.line_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#eeeeee')),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+            ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.grey),
+        ])
+        self.totals_style = TableStyle([
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('LINEABOVE', (0, -1), (-1, -1), 0.5, colors.grey),
+        ])
+
+    def flowables(self, context):
+        """Flowables for one invoice."""
+        styles = self.styles
+        header = Table(
+            [[self.company, Paragraph(
+                f"{context['type_label']}<br/>{context['invoice_number']}", styles['title'])]],
+            colWidths=[100 * mm, 80 * mm],
+        )
+        customer = Paragraph(
+            f"<b>{context['customer_name']}</b><br/>"
+            f"{context['customer_document_type']} {context['customer_document_number']}<br/>"
+            f"{context['customer_address']}",
+            styles['body'])
+        dates = Paragraph(
+            f"Fecha de emisión: {context['issue_date']}<br/>"
+            f"Vencimiento: {context['due_date'] or '-'}<br/>"
+            f"Moneda: {context['currency']}",
+            styles['body'])
+        lines = Table(
+            [['Descripción', 'Cant.', 'V. unitario', 'Importe'],
+             [Paragraph(context['description'], styles['body']), '1',
+              context['subtotal'], context['subtotal']]],
+            colWidths=self.line_widths,
+        )
+        lines.setStyle(self.line_style)
+        totals = Table(
+            [['Op. gravada', context['subtotal']],
+             ['IGV 18%', context['tax_amount']],
+             ['Total', f"{context['currency']} {context['total_amount']}"]],
+            colWidths=[40 * mm, 35 * mm],
+            hAlign='RIGHT',
+        )
+        totals.setStyle(self.totals_style)
+
+        return [
+            header,
+            Spacer(1, 8 * mm),
+            Table([[customer, dates]], colWidths=[110 * mm, 70 * mm]),
+            Spacer(1, 8 * mm),
+            lines,
+            Spacer(1, 4 * mm),
+            totals,
+            Spacer(1, 12 * mm),
+            Paragraph(
+                'Representación impresa del comprobante electrónico.', styles['footer']),
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_layout():
+    """Get the per-process compiled layout."""
+    return InvoiceLayout()
+
+
+def invoice_context(invoice):
+    """Plain, picklable rendering context for an invoice."""
+    return {
+        'filename': document_filename(invoice),
+        'type_label': invoice.get_invoice_type_display(),
+        'invoice_number': invoice.invoice_number,
+        'issue_date': invoice.issue_date.isoformat(),
+        'due_date': invoice.due_date.isoformat() if invoice.due_date else '',
+        'customer_name': escape(invoice.customer_name),
+        'customer_document_type': invoice.customer_document_type.upper(),
+        'customer_document_number': invoice.customer_document_number,
+        'customer_address': escape(invoice.customer_address),
+        'description': escape(invoice.notes or 'Servicios turísticos'),
+        'subtotal': f"{invoice.subtotal:,.2f}",
+        'tax_amount': f"{invoice.tax_amount:,.2f}",
+        'total_amount': f"{invoice.total_amount:,.2f}",
+        'currency': invoice.currency,
+    }
+
+
+def render_pdf(contexts, out):
+    """
+    Render one or more invoices into a single PDF.
+
+    Args:
+        contexts: Iterable of invoice_context() dicts
+        out: Writable binary file-like object
+    """
+    layout = get_layout()
+    story = []
+    for context in contexts:
+        if story:
+            story.append(PageBreak())
+        story.extend(layout.flowables(context))
+
+    document = SimpleDocTemplate(
+        out, pagesize=A4,
+        leftMargin=15 * mm, rightMargin=15 * mm,
+        topMargin=15 * mm, bottomMargin=15 * mm,
+    )
+    document.build(story)
+
+
+def save_invoice_pdf(invoice):
+    """Render an invoice and stream it to its pdf_file storage."""
+    context = invoice_context(invoice)
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as tmp:
+        render_pdf([context], tmp)
+        tmp.seek(0)
+        invoice.pdf_file.save(f"{context['filename']}.pdf", File(tmp), save=False)
+    return invoice
+
+
+def render_merged_pdf(invoices, save, progress=None):
+    """
+    Render many invoices into one PDF and hand it to `save` as a django File.
+
+    Args:
+        invoices: Iterable of invoices
+        save: Callable receiving (name, File)
+        progress: Optional callable receiving the number of prepared invoices
+    """
+    contexts = []
+    for invoice in invoices:
+        contexts.append(invoice_context(invoice))
+        if progress and len(contexts) % 100 == 0:
+            progress(len(contexts))
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as tmp:
+        render_pdf(contexts, tmp)
+        tmp.seek(0)
+        save('invoices.pdf', File(tmp))
+    return len(contexts)
@@ -0,0 +1,396 @@
+"""
+Bank statement reconciliation.
+
+Statement files are parsed line by line (CSV or OFX) into lightweight
+StatementEntry tuples. Candidates are loaded once per statement into dict
+indexes, so each line is matched with hash lookups:
+
+1. Pending BankDeposit with the same reference, currency and amount within
+   the date window -> matched, and the deposit is verified.
+2. A single pending BankDeposit with the same amount and currency within the
+   date window -> suggested (an equal amount alone does not verify it).
+3. Unpaid Invoice with the same amount and currency whose number, customer
+   document or customer name appears in the line -> suggested.
+4. Confirmed passenger whose document number appears in the line ->
+   suggested.
+
+Deposits already matched by a statement line are never candidates again,
+and re-running a statement keeps its matched lines, so the same credit is
+never recognized twice. Deposits are verified and lines stored in one
+transaction.
+"""
+import csv
+import io
+import re
+from collections import defaultdict, namedtuple
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from difflib import SequenceMatcher
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.circuits.models import Passenger
+from .ledger import sync_queryset
+from .models import BankDeposit, BankStatementLine, Invoice
+
+DATE_WINDOW_DAYS = 3
+NAME_SIMILARITY = 0.85
+# Name similarity is only computed when few invoices share the amount
+FUZZY_CANDIDATE_LIMIT = 25
+LINE_BATCH_SIZE = 2000
+
+StatementEntry = namedtuple(
+    'StatementEntry',
+    ['line_number', 'transaction_date', 'amount', 'currency', 'reference', 'description']
+)
+
+# Accepted CSV headers (lowercase) per field, Spanish and English
+CSV_COLUMNS = {
+    'transaction_date': ['date', 'fecha', 'fecha operacion', 'fecha de operación', 'fecha valor'],
+    'amount': ['amount', 'monto', 'importe', 'abono', 'credit'],
+    'currency': ['currency', 'moneda'],
+    'reference': ['reference', 'referencia', 'nro operacion', 'nro. operación', 'operacion'],
+    'description': ['description', 'descripcion', 'descripción', 'concepto', 'detalle'],
+}
+
+DATE_FORMATS = [('%Y-%m-%d', 10), ('%d/%m/%Y', 10), ('%d-%m-%Y', 10), ('%Y%m%d', 8)]
+
+_TOKEN_RE = re.compile(r'[A-Z0-9]+(?:-[A-Z0-9]+)?')
+
+
+class StatementParseError(ValueError):
+    """Raised when a statement file cannot be parsed."""
+
+
+def _normalize(value):
+    return re.sub(r'[^A-Z0-9]', '', (value or '').upper())
+
+
+def _entry_key(entry):
+    return (entry.transaction_date, entry.amount, entry.currency, _normalize(entry.reference))
+
+
+def _parse_amount(value):
+    value = (value or '').strip().replace(' ', '')
+    if ',' in value and '.' in value:
+        # 1,234.56 or 1.234,56
+        if value.rfind(',') > value.rfind('.'):
+            value = value.replace('.', '').replace(',', '.')
+        else:
+            value = value.replace(',', '')
+    elif ',' in value:
+        value = value.replace(',', '.')
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise StatementParseError(f'Invalid amount: {value!r}')
+
+
+def _parse_date(value):
+    value = (value or '').strip()
+    for fmt, length in DATE_FORMATS:
+        try:
+            return datetime.strptime(value[:length], fmt).date()
+        except ValueError:
+            continue
+    raise StatementParseError(f'Invalid date: {value!r}')
+
+
+def iter_csv_entries(fileobj, default_currency='PEN'):
+    """Stream StatementEntry tuples from a CSV statement (credits only)."""
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    sample = text.read(4096)
+    text.seek(0)
+    dialect = csv.Sniffer().sniff(sample, delimiters=',;\t') if sample else csv.excel
+    reader = csv.reader(text, dialect)
+
+    header = [column.strip().lower() for column in next(reader, [])]
+    positions = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in header:
+                positions[field] = header.index(alias)
+                break
+    missing = {'transaction_date', 'amount'} - set(positions)
+    if missing:
+        raise StatementParseError(f"Missing columns: {', '.join(sorted(missing))}")
+
+    def column(row, field):
+        position = positions.get(field)
+        return row[position].strip() if position is not None and position < len(row) else ''
+
+    try:
+        for line_number, row in enumerate(reader, start=2):
+            if not any(row):
+                continue
+            amount = _parse_amount(column(row, 'amount'))
+            if amount <= 0:
+                continue
+            yield StatementEntry(
+                line_number,
+                _parse_date(column(row, 'transaction_date')),
+                amount,
+                (column(row, 'currency') or default_currency).upper()[:3],
+                column(row, 'reference')[:100],
+                column(row, 'description')[:255],
+            )
+    finally:
+        text.detach()
+
+
+_OFX_TAG_RE = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)')
+
+
+def iter_ofx_entries(fileobj, default_currency='PEN'):
+    """Stream StatementEntry tuples from an OFX (SGML or XML) statement."""
+    currency = default_currency
+    current = None
+    line_number = 0
+
+    for raw in io.TextIOWrapper(fileobj, encoding='latin-1'):
+        for closing, tag, value in _OFX_TAG_RE.findall(raw):
+            value = value.strip()
+            if tag == 'CURDEF' and value:
+                currency = value.upper()[:3]
+            elif tag == 'STMTTRN':
+                if not closing:
+                    current = {}
+                elif current is not None:
+                    line_number += 1
+                    entry = _ofx_entry(current, line_number, currency)
+                    if entry:
+                        yield entry
+                    current = None
+            elif current is not None and not closing and value:
+                current[tag] = value
+
+
+def _ofx_entry(fields, line_number, currency):
+    amount = _parse_amount(fields.get('TRNAMT'))
+    if amount <= 0:
+        return None
+    memo = ' '.join(filter(None, [fields.get('NAME'), fields.get('MEMO')]))
+    return StatementEntry(
+        line_number,
+        _parse_date(fields.get('DTPOSTED', '')[:8]),
+        amount,
+        fields.get('CURRENCY', currency)[:3],
+        (fields.get('CHECKNUM') or fields.get('REFNUM') or fields.get('FITID', ''))[:100],
+        memo[:255],
+    )
+
+
+PARSERS = {
+    'csv': iter_csv_entries,
+    'ofx': iter_ofx_entries,
+}
+
+
+class Reconciler:
+    """Match statement entries against deposits, invoices and passengers."""
+
+    def __init__(self, entries, date_window=DATE_WINDOW_DAYS):
+        self.entries = entries
+        self.window = timedelta(days=date_window)
+        self.claimed_deposits = set()
+        self.seen = set()
+
+        if entries:
+            start = min(entry.transaction_date for entry in entries) - self.window
+            end = max(entry.transaction_date for entry in entries) + self.window
+        else:
+            start = end = date.today()
+        self._index_deposits(start, end)
+        self._index_invoices({(entry.amount, entry.currency) for entry in entries})
+        self._index_passengers()
+
+    def _index_deposits(self, start, end):
+        self.deposits_by_reference = defaultdict(list)
+        self.deposits_by_amount = defaultdict(list)
+        deposits = BankDeposit.objects.filter(
+            status='pending', deposit_date__range=(start, end)
+        ).exclude(
+            statement_lines__match_status='matched'
+        ).values_list('pk', 'reference_number', 'amount', 'currency', 'deposit_date')
+        for pk, reference, amount, currency, deposit_date in deposits.iterator(chunk_size=5000):
+            candidate = (pk, amount, deposit_date)
+            if reference:
+                self.deposits_by_reference[(_normalize(reference), currency)].append(candidate)
+            self.deposits_by_amount[(amount, currency)].append(candidate)
+
+    def _index_invoices(self, amount_keys):
+        self.invoices_by_amount = defaultdict(list)
+        self.invoices_by_token = defaultdict(list)
+        amounts = {amount for amount, _ in amount_keys}
+        invoices = Invoice.objects.filter(
+            paid=False, total_amount__in=amounts
+        ).exclude(status__in=['draft', 'cancelled']).values_list(
+            'pk', 'total_amount', 'currency', 'invoice_number',
+            'customer_document_number', 'customer_name', 'passenger_id'
+        )
+        for pk, amount, currency, number, document, name, passenger_id in invoices.iterator(chunk_size=5000):
+            if (amount, currency) not in amount_keys:
+                continue
+            candidate = (pk, name.upper(), passenger_id)
+            self.invoices_by_amount[(amount, currency)].append(candidate)
+            for token in (_normalize(number), _normalize(document)):
+                if token:
+                    self.invoices_by_token[(token, amount, currency)].append(candidate)
+
+    def _index_passengers(self):
+        self.passengers_by_document = {}
+        passengers = Passenger.objects.filter(status='confirmed').values_list('pk', 'document_number')
+        for pk, document in passengers.iterator(chunk_size=5000):
+            normalized = _normalize(document)
+            if len(normalized) >= 6:
+                self.passengers_by_document[normalized] = pk
+
+    def _in_window(self, entry, deposit_date):
+        return abs(entry.transaction_date - deposit_date) <= self.window
+
+    def _deposit_candidates(self, candidates, entry):
+        return [
+            candidate for candidate in candidates
+            if candidate[0] not in self.claimed_deposits
+            and candidate[1] == entry.amount
+            and self._in_window(entry, candidate[2])
+        ]
+
+    def keep(self, entry, deposit_id):
+        """Record a line matched by an earlier run of the statement."""
+        self.seen.add(_entry_key(entry))
+        self.claimed_deposits.add(deposit_id)
+
+    def match(self, entry):
+        """
+        Match one entry.
+
+        Returns:
+            Dict of BankStatementLine match fields
+        """
+        key = _entry_key(entry)
+        if entry.reference and key in self.seen:
+            return {'match_status': 'duplicate'}
+        self.seen.add(key)
+
+        if entry.reference:
+            candidates = self._deposit_candidates(
+                self.deposits_by_reference.get((_normalize(entry.reference), entry.currency), []), entry)
+            if candidates:
+                pk = min(candidates, key=lambda c: abs(entry.transaction_date - c[2]))[0]
+                self.claimed_deposits.add(pk)
+                return {'match_status': 'matched', 'match_score': Decimal('1'), 'deposit_id': pk}
+
+        candidates = self._deposit_candidates(
+            self.deposits_by_amount.get((entry.amount, entry.currency), []), entry)
+        if len(candidates) == 1:
+            pk = candidates[0][0]
+            self.claimed_deposits.add(pk)
+            return {'match_status': 'suggested', 'match_score': Decimal('0.9'), 'deposit_id': pk}
+
+        text = f"{entry.reference} {entry.description}".upper()
+        tokens = {_normalize(token) for token in _TOKEN_RE.findall(text)}
+
+        for token in tokens:
+            candidates = self.invoices_by_token.get((token, entry.amount, entry.currency))
+            if candidates:
+                pk, _, passenger_id = candidates[0]
+                return {'match_status': 'suggested', 'match_score': Decimal('0.95'),
+                        'invoice_id': pk, 'passenger_id': passenger_id}
+
+        candidates = self.invoices_by_amount.get((entry.amount, entry.currency), [])
+        if entry.description and len(candidates) <= FUZZY_CANDIDATE_LIMIT:
+            description = entry.description.upper()
+            best = None
+            for pk, name, passenger_id in candidates:
+                ratio = SequenceMatcher(None, name, description).ratio()
+                if ratio >= NAME_SIMILARITY and (best is None or ratio > best[0]):
+                    best = (ratio, pk, passenger_id)
+            if best:
+                return {'match_status': 'suggested',
+                        'match_score': Decimal(str(round(best[0] * 0.9, 3))),
+                        'invoice_id': best[1], 'passenger_id': best[2]}
+
+        for token in tokens:
+            passenger_id = self.passengers_by_document.get(token)
+            if passenger_id:
+                return {'match_status': 'suggested', 'match_score': Decimal('0.6'),
+                        'passenger_id': passenger_id}
+
+        return {'match_status': 'unmatched'}
+
+
+def reconcile_statement(statement, user=None, progress=None):
+    """
+    Parse, match and store a statement, verifying matched deposits.
+
+    Lines matched by an earlier run are kept as they are; the rest are
+    matched again.
+
+    Args:
+        statement: BankStatement with an attached file
+        user: User recorded as verifier
+        progress: Optional callable receiving (done, total)
+
+    Returns:
+        Dict with line, matched and suggested counts
+    """
+    parser = PARSERS[statement.file_format]
+    with statement.file.open('rb') as fileobj:
+        entries = list(parser(fileobj, default_currency=statement.default_currency))
+
+    kept = {
+        line_number: (pk, deposit_id)
+        for pk, line_number, deposit_id in BankStatementLine.objects.filter(
+            statement=statement, match_status='matched', deposit__isnull=False
+        ).values_list('pk', 'line_number', 'deposit_id')
+    }
+    reconciler = Reconciler(entries)
+    total = len(entries)
+    lines = []
+    matched_deposits = []
+    counts = defaultdict(int)
+
+    for done, entry in enumerate(entries, start=1):
+        if entry.line_number in kept:
+            reconciler.keep(entry, kept[entry.line_number][1])
+            counts['matched'] += 1
+            continue
+        result = reconciler.match(entry)
+        counts[result['match_status']] += 1
+        if result['match_status'] == 'matched':
+            matched_deposits.append(result['deposit_id'])
+        lines.append(BankStatementLine(statement=statement, **entry._asdict(), **result))
+        if progress and done % 5000 == 0:
+            progress(done, total)
+
+    with transaction.atomic():
+        BankStatementLine.objects.filter(statement=statement).exclude(
+            pk__in=[pk for pk, _ in kept.values()]).delete()
+        BankStatementLine.objects.bulk_create(lines, batch_size=LINE_BATCH_SIZE)
+        verified = BankDeposit.objects.filter(
+            pk__in=matched_deposits, status='pending'
+        ).update(
+            status='verified',
+            verified_by=user,
+            verified_at=timezone.now(),
+            updated_at=timezone.now()
+        )
+        # The bulk update bypasses post_save, so post the payments here
+        sync_queryset('bank_deposit', BankDeposit.objects.filter(pk__in=matched_deposits))
+        statement.status = 'reconciled'
+        statement.line_count = total
+        statement.matched_count = counts['matched']
+        statement.suggested_count = counts['suggested']
+        statement.save(update_fields=[
+            'status', 'line_count', 'matched_count', 'suggested_count', 'updated_at'])
+
+    return {
+        'lines': total,
+        'matched': counts['matched'],
+        'suggested': counts['suggested'],
+        'unmatched': counts['unmatched'],
+        'duplicates': counts['duplicate'],
+        'verified_deposits': verified,
+    }
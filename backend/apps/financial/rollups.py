@@ -0,0 +1,261 @@
+"""
+Daily revenue and cost rollups and the time series built from them.
+
+Rows are bucketed by the local date a sale or cost was recorded
+(created_at), its program, category and currency. Writes recompute only
+the buckets they touch; rebuild() repopulates a date range from scratch.
+Series in BASE_CURRENCY are plain sums of the base amounts stored on each
+row; rows still without a base amount (no rate when written) are counted
+per bucket and reported as missing rates. Other reporting currencies are
+converted per day, using the latest ExchangeRate on or before that day.
+"""
+from bisect import bisect_right
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.conf import settings
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from apps.suppliers.models import ExchangeRate
+from .models import AdditionalSale, FinancialRollup, GroupCost
+
+CENT = Decimal('0.01')
+
+Bucket = namedtuple('Bucket', ['day', 'metric', 'program_id', 'category', 'currency'])
+
+# metric -> (model, program path, category field, amount field)
+SOURCES = {
+    'revenue': (AdditionalSale, 'passenger__group__program', 'sale_type', 'total_amount'),
+    'cost': (GroupCost, 'group__program', 'cost_type', 'total_amount'),
+}
+
+INTERVALS = ['day', 'week', 'month']
+GROUP_BY = {
+    'program': 'program_id',
+    'category': 'category',
+    'currency': 'currency',
+}
+
+
+def _totals(amount_field):
+    """Aggregates stored on a rollup row."""
+    # Before base_currency_amount: later aggregates shadow the column name
+    return {
+        'unconverted_count': Count('id', filter=Q(base_currency_amount__isnull=True)),
+        'amount': Sum(amount_field),
+        'base_currency_amount': Coalesce(Sum('base_currency_amount'), Decimal('0')),
+        'row_count': Count('id'),
+    }
+
+
+def _day_range(start, end):
+    """Aware datetimes covering local days [start, end]."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def bucket_for(metric, obj):
+    """Rollup bucket a sale or cost belongs to."""
+    if metric == 'revenue':
+        program_id = obj.passenger.group.program_id
+        category = obj.sale_type
+    else:
+        program_id = obj.group.program_id
+        category = obj.cost_type
+    created = timezone.localdate(obj.created_at) if obj.created_at else timezone.localdate()
+    return Bucket(created, metric, program_id, category, obj.currency)
+
+
+def recompute_buckets(buckets):
+    """
+    Recompute a set of buckets from the raw rows.
+
+    Totals are written with one INSERT ... ON CONFLICT on the bucket's
+    unique key, so concurrent recomputes of a bucket never collide.
+    """
+    rollups = []
+    for bucket in buckets:
+        model, program_path, category_field, amount_field = SOURCES[bucket.metric]
+        totals = model.objects.filter(**{
+            'created_at__range': _day_range(bucket.day, bucket.day),
+            program_path: bucket.program_id,
+            category_field: bucket.category,
+            'currency': bucket.currency,
+        }).aggregate(**_totals(amount_field))
+
+        lookup = {
+            'day': bucket.day, 'metric': bucket.metric, 'program_id': bucket.program_id,
+            'category': bucket.category, 'currency': bucket.currency,
+        }
+        if totals['row_count']:
+            rollups.append(FinancialRollup(**lookup, **totals))
+        else:
+            FinancialRollup.objects.filter(**lookup).delete()
+
+    if rollups:
+        FinancialRollup.objects.bulk_create(
+            rollups,
+            update_conflicts=True,
+            unique_fields=['day', 'metric', 'program', 'category', 'currency'],
+            update_fields=['amount', 'base_currency_amount', 'row_count', 'unconverted_count'],
+        )
+
+
+def rebuild(start=None, end=None, batch_size=2000):
+    """
+    Repopulate rollups for a date range (default: everything).
+
+    Returns:
+        Number of rollup rows written
+    """
+    written = 0
+    with transaction.atomic():
+        stale = FinancialRollup.objects.all()
+        if start:
+            stale = stale.filter(day__gte=start)
+        if end:
+            stale = stale.filter(day__lte=end)
+        stale.delete()
+
+        for metric, (model, program_path, category_field, amount_field) in SOURCES.items():
+            queryset = model.objects.all()
+            if start:
+                queryset = queryset.filter(created_at__gte=_day_range(start, start)[0])
+            if end:
+                queryset = queryset.filter(created_at__lt=_day_range(end, end)[1])
+
+            rows = queryset.annotate(
+                day=TruncDate('created_at', tzinfo=timezone.get_current_timezone())
+            ).order_by().values('day', program_path, category_field, 'currency').annotate(
+                **_totals(amount_field))
+
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(FinancialRollup(
+                    day=row['day'], metric=metric, program_id=row[program_path],
+                    category=row[category_field], currency=row['currency'],
+                    amount=row['amount'], base_currency_amount=row['base_currency_amount'],
+                    row_count=row['row_count'], unconverted_count=row['unconverted_count'],
+                ))
+                if len(batch) >= batch_size:
+                    FinancialRollup.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            if batch:
+                FinancialRollup.objects.bulk_create(batch)
+                written += len(batch)
+
+    return written
+
+
+def refresh_days(model, days):
+    """
+    Rebuild the rollups over the days a bulk write to `model` touched.
+
+    Returns:
+        Number of rollup rows written
+    """
+    if not days or model not in {source[0] for source in SOURCES.values()}:
+        return 0
+    return rebuild(min(days), max(days))
+
+
+class RateTable:
+    """Exchange rates to one currency, looked up by day with bisect."""
+
+    def __init__(self, currencies, to_currency, end):
+        self.to_currency = to_currency
+        self.rates = defaultdict(list)
+        others = [currency for currency in currencies if currency != to_currency]
+
+        direct = ExchangeRate.objects.filter(
+            from_currency__in=others, to_currency=to_currency, date__lte=end
+        ).values_list('from_currency', 'date', 'rate')
+        inverse = ExchangeRate.objects.filter(
+            from_currency=to_currency, to_currency__in=others, date__lte=end
+        ).values_list('to_currency', 'date', 'rate')
+
+        merged = {}
+        for currency, day, rate in inverse:
+            merged[(currency, day)] = 1 / rate
+        for currency, day, rate in direct:
+            merged[(currency, day)] = rate
+        for (currency, day), rate in sorted(merged.items()):
+            self.rates[currency].append((day, rate))
+        self.days = {currency: [day for day, _ in rows] for currency, rows in self.rates.items()}
+
+    def rate(self, currency, day):
+        """Rate from `currency` on `day`, or None if unknown."""
+        if currency == self.to_currency:
+            return Decimal('1')
+        index = bisect_right(self.days.get(currency, []), day)
+        if not index:
+            return None
+        return self.rates[currency][index - 1][1]
+
+
+def period_start(day, interval):
+    """First day of the period containing `day`."""
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def series(metric, interval, start, end, reporting_currency, group_by=None,
+           program=None, category=None, currency=None):
+    """
+    Time series of a metric in the reporting currency.
+
+    Returns:
+        Dict with ordered points ({period, key, amount}) and the
+        currency/day pairs that had no exchange rate
+    """
+    rollups = FinancialRollup.objects.filter(metric=metric, day__range=(start, end))
+    if program:
+        rollups = rollups.filter(program_id=program)
+    if category:
+        rollups = rollups.filter(category=category)
+    if currency:
+        rollups = rollups.filter(currency=currency)
+
+    dimension = GROUP_BY.get(group_by)
+    points = defaultdict(Decimal)
+    missing = set()
+
+    fields = ['day', 'currency'] + ([dimension] if dimension and dimension != 'currency' else [])
+    if reporting_currency == settings.BASE_CURRENCY:
+        rows = rollups.order_by().values(*fields).annotate(
+            total=Sum('base_currency_amount'), unconverted=Sum('unconverted_count'))
+        for row in rows:
+            if row['unconverted']:
+                # Rows written before a rate existed are not in the total
+                missing.add((row['currency'], row['day'].isoformat()))
+            key = str(row[dimension]) if dimension else None
+            points[(period_start(row['day'], interval), key)] += row['total']
+    else:
+        rows = list(rollups.order_by().values(*fields).annotate(total=Sum('amount')))
+        rates = RateTable({row['currency'] for row in rows}, reporting_currency, end)
+        for row in rows:
+            rate = rates.rate(row['currency'], row['day'])
+            if rate is None:
+                missing.add((row['currency'], row['day'].isoformat()))
+                continue
+            key = str(row[dimension]) if dimension else None
+            points[(period_start(row['day'], interval), key)] += row['total'] * rate
+
+    return {
+        'points': [
+            {'period': period.isoformat(), 'key': key, 'amount': amount.quantize(CENT)}
+            for (period, key), amount in sorted(points.items(), key=lambda item: (item[0][0], item[0][1] or ''))
+        ],
+        'missing_rates': sorted(missing),
+    }
@@ -0,0 +1,106 @@
+"""
+Gapless invoice number allocation.
+
+Each InvoiceSeries row is its own lock, so writers on B001 never wait on
+writers on F001. Allocation must happen inside the transaction that inserts
+the invoices: the row lock is held until commit, and a rollback returns the
+numbers to the series. Allocate as late as possible in that transaction to
+keep the lock window short, and take a whole batch at once when issuing
+many invoices.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from core.common.utils import generate_code
+from .models import InvoiceSeries, SunatSummaryCounter
+
+
+class SeriesExhausted(Exception):
+    """Raised when a series has no numbers left."""
+
+
+def format_invoice_number(series, number):
+    """Format a correlativo as SUNAT expects (e.g., F001-00000123)."""
+    return generate_code(series, number, length=InvoiceSeries.NUMBER_LENGTH)
+
+
+def managed_series(invoice_number):
+    """
+    Series code of an invoice number if that series is allocated here.
+
+    Numbers of managed series (e.g., B001-00000005) must come from the
+    allocator: a hand-picked one would be handed out again later.
+    """
+    series = (invoice_number or '').split('-', 1)[0]
+    if series and InvoiceSeries.objects.filter(series=series).exists():
+        return series
+    return None
+
+
+def default_series(invoice_type):
+    """Default series code for an invoice type."""
+    return InvoiceSeries.DEFAULT_SERIES[invoice_type]
+
+
+def allocate_invoice_numbers(series, count=1):
+    """
+    Reserve `count` consecutive invoice numbers from a series.
+
+    Args:
+        series: Series code (e.g., 'B001')
+        count: How many numbers to reserve
+
+    Returns:
+        List of formatted invoice numbers
+
+    Raises:
+        InvoiceSeries.DoesNotExist: Unknown or inactive series
+        SeriesExhausted: The series would overflow its 8-digit correlativo
+    """
+    if count < 1:
+        return []
+
+    if not transaction.get_connection().in_atomic_block:
+        raise RuntimeError(
+            'Invoice numbers must be allocated inside transaction.atomic() '
+            'together with the invoices that use them.')
+
+    # Increment first so the row lock is taken by the UPDATE itself; the
+    # follow-up read sees our own uncommitted value.
+    updated = InvoiceSeries.objects.filter(
+        series=series, is_active=True
+    ).update(next_number=F('next_number') + count)
+    if not updated:
+        raise InvoiceSeries.DoesNotExist(f'Invoice series {series} does not exist or is inactive')
+
+    end = InvoiceSeries.objects.filter(series=series).values_list(
+        'next_number', flat=True).get()
+    start = end - count
+    if end - 1 > InvoiceSeries.MAX_NUMBER:
+        raise SeriesExhausted(f'Invoice series {series} is exhausted')
+
+    return [format_invoice_number(series, number) for number in range(start, end)]
+
+
+def allocate_invoice_number(series):
+    """Reserve a single invoice number from a series."""
+    return allocate_invoice_numbers(series, 1)[0]
+
+
+def allocate_summary_identifier(day):
+    """
+    Reserve the next resumen diario identifier of a day (e.g., RC-20260119-3).
+
+    Like invoice numbers, this must run inside the transaction that creates
+    the summary.
+    """
+    if not transaction.get_connection().in_atomic_block:
+        raise RuntimeError(
+            'Summary identifiers must be allocated inside transaction.atomic() '
+            'together with the summary that uses them.')
+
+    SunatSummaryCounter.objects.bulk_create([SunatSummaryCounter(day=day)], ignore_conflicts=True)
+    SunatSummaryCounter.objects.filter(day=day).update(last_number=F('last_number') + 1)
+    number = SunatSummaryCounter.objects.filter(day=day).values_list(
+        'last_number', flat=True).get()
+    return f"RC-{day:%Y%m%d}-{number}"
@@ -1,8 +1,21 @@
 """
 Financial serializers.
 """
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import GroupCost, AdditionalSale, Commission, Invoice, BankDeposit
+from rest_framework.validators import UniqueValidator
+from core.common.utils import calculate_igv
+from apps.circuits.models import Group
+from .models import (
+    GroupCost, AdditionalSale, Commission, Invoice, InvoiceSeries,
+    BankDeposit, BankStatement, BankStatementLine, LedgerEntry,
+    AccountBalance, GroupBalance, FinancialRollup, PayablesRun
+)
+from .rollups import GROUP_BY, INTERVALS
+from .sequences import allocate_invoice_number, default_series, managed_series
 
 
 class GroupCostSerializer(serializers.ModelSerializer):
@@ -18,10 +31,12 @@ class GroupCostSerializer(serializers.ModelSerializer):
             'id', 'group', 'group_code', 'supplier', 'supplier_name',
             'cost_type', 'description', 'quantity', 'unit_price',
             'total_amount', 'currency', 'includes_tax', 'tax_amount',
-            'paid', 'payment_date', 'invoice_number', 'notes',
+            'paid', 'payment_date', 'payables_run', 'invoice_number', 'notes',
+            'base_currency_amount', 'base_exchange_rate',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'payables_run', 'base_currency_amount',
+                            'base_exchange_rate', 'created_at', 'updated_at']
 
     def validate(self, data):
         """Validate payment date."""
@@ -46,9 +61,11 @@ class AdditionalSaleSerializer(serializers.ModelSerializer):
             'total_amount', 'currency', 'includes_tax', 'tax_amount',
             'paid', 'payment_method', 'payment_date',
             'invoice_number', 'notes',
+            'base_currency_amount', 'base_exchange_rate',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'base_currency_amount', 'base_exchange_rate',
+                            'created_at', 'updated_at']
 
     def validate(self, data):
         """Validate payment info."""
@@ -76,9 +93,11 @@ class CommissionSerializer(serializers.ModelSerializer):
             'commission_type', 'recipient_name', 'recipient_email',
             'percentage', 'base_amount', 'commission_amount', 'currency',
             'paid', 'payment_date', 'notes',
+            'base_currency_amount', 'base_exchange_rate',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'base_currency_amount', 'base_exchange_rate',
+                            'created_at', 'updated_at']
 
     def validate_percentage(self, value):
         """Validate percentage is between 0 and 100."""
@@ -104,9 +123,11 @@ class InvoiceSerializer(serializers.ModelSerializer):
             'subtotal', 'tax_amount', 'total_amount', 'currency',
             'paid', 'payment_date', 'payment_method',
             'sunat_response', 'xml_file', 'pdf_file', 'notes',
+            'base_currency_amount', 'base_exchange_rate',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'base_currency_amount', 'base_exchange_rate',
+                            'created_at', 'updated_at']
 
     def validate(self, data):
         """Validate invoice amounts."""
@@ -124,30 +145,118 @@ class InvoiceSerializer(serializers.ModelSerializer):
 
         return data
 
+    def validate_invoice_number(self, value):
+        """Numbers of allocator-managed series cannot be changed by hand."""
+        if self.instance is not None and value == self.instance.invoice_number:
+            return value
+        series = managed_series(value)
+        if series:
+            raise serializers.ValidationError(
+                f'Numbers of series {series} are assigned automatically.')
+        return value
+
 
 class InvoiceCreateSerializer(serializers.ModelSerializer):
-    """Invoice create serializer with automatic calculations."""
+    """
+    Invoice create serializer with automatic calculations.
+
+    When invoice_number is omitted the next number of `series` (or the
+    default series for the invoice type) is allocated. A manual
+    invoice_number must lie outside the allocator-managed series.
+    """
+
+    invoice_number = serializers.CharField(
+        max_length=50, required=False,
+        validators=[UniqueValidator(queryset=Invoice.objects.all())])
+    series = serializers.CharField(max_length=4, required=False, write_only=True)
 
     class Meta:
         model = Invoice
         fields = [
-            'passenger', 'invoice_type', 'invoice_number', 'issue_date', 'due_date',
+            'passenger', 'invoice_type', 'invoice_number', 'series',
+            'issue_date', 'due_date',
             'customer_name', 'customer_document_type', 'customer_document_number',
             'customer_address', 'customer_email', 'subtotal', 'currency', 'notes'
         ]
 
+    def validate_invoice_number(self, value):
+        """Only numbers outside the allocator-managed series can be given."""
+        series = managed_series(value)
+        if series:
+            raise serializers.ValidationError(
+                f'Numbers of series {series} are assigned automatically; send series instead.')
+        return value
+
+    def validate(self, data):
+        """Validate the requested series."""
+        series = data.get('series')
+        if series and data.get('invoice_number'):
+            raise serializers.ValidationError({
+                'series': 'Give either series or invoice_number, not both.'
+            })
+        if series and not InvoiceSeries.objects.filter(
+            series=series, invoice_type=data['invoice_type'], is_active=True
+        ).exists():
+            raise serializers.ValidationError({
+                'series': 'Unknown or inactive series for this invoice type.'
+            })
+        return data
+
     def create(self, validated_data):
-        """Create invoice with automatic tax calculation."""
+        """Create invoice with automatic tax calculation and numbering."""
         subtotal = validated_data['subtotal']
+        series = validated_data.pop('series', None)
 
         # Calculate IGV (18% in Peru)
-        tax_amount = subtotal * 0.18
-        total_amount = subtotal + tax_amount
+        amounts = calculate_igv(subtotal)
+        validated_data['tax_amount'] = amounts['igv_amount']
+        validated_data['total_amount'] = amounts['total_amount']
+
+        with transaction.atomic():
+            if not validated_data.get('invoice_number'):
+                validated_data['invoice_number'] = allocate_invoice_number(
+                    series or default_series(validated_data['invoice_type']))
+            return super().create(validated_data)
+
 
-        validated_data['tax_amount'] = tax_amount
-        validated_data['total_amount'] = total_amount
+class GroupInvoicingSerializer(serializers.Serializer):
+    """Input for invoicing every confirmed passenger of a group."""
+
+    group = serializers.PrimaryKeyRelatedField(queryset=Group.objects.all())
+    invoice_type = serializers.ChoiceField(choices=['boleta', 'factura'], default='boleta')
+    issue_date = serializers.DateField(required=False)
+    series = serializers.CharField(max_length=4, required=False)
+
+    def validate(self, data):
+        """Validate the requested series."""
+        series = data.get('series')
+        if series and not InvoiceSeries.objects.filter(
+            series=series, invoice_type=data['invoice_type'], is_active=True
+        ).exists():
+            raise serializers.ValidationError({
+                'series': 'Unknown or inactive series for this invoice type.'
+            })
+        return data
 
-        return super().create(validated_data)
+
+class RenderPdfsSerializer(serializers.Serializer):
+    """Input for rendering invoice PDFs."""
+
+    invoice_ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False)
+    merge = serializers.BooleanField(default=False)
+
+
+class InvoiceSeriesSerializer(serializers.ModelSerializer):
+    """InvoiceSeries serializer."""
+
+    class Meta:
+        model = InvoiceSeries
+        fields = [
+            'id', 'series', 'invoice_type', 'next_number',
+            'is_active', 'description',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'next_number', 'created_at', 'updated_at']
 
 
 class BankDepositSerializer(serializers.ModelSerializer):
@@ -167,10 +276,12 @@ class BankDepositSerializer(serializers.ModelSerializer):
             'bank_name', 'account_number', 'reference_number',
             'status', 'verified_by', 'verified_by_name', 'verified_at',
             'receipt_file', 'notes',
+            'base_currency_amount', 'base_exchange_rate',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'verified_by',
-                            'verified_at', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'verified_by', 'verified_at',
+                            'base_currency_amount', 'base_exchange_rate',
+                            'created_at', 'updated_at']
 
     def validate(self, data):
         """Validate deposit info."""
@@ -180,3 +291,147 @@ class BankDepositSerializer(serializers.ModelSerializer):
                     'bank_name': 'Bank name is required for transfers and deposits.'
                 })
         return data
+
+
+class BankStatementSerializer(serializers.ModelSerializer):
+    """BankStatement serializer."""
+
+    file_format = serializers.ChoiceField(
+        choices=BankStatement.FORMAT_CHOICES, required=False)
+    uploaded_by_name = serializers.CharField(
+        source='uploaded_by.get_full_name', read_only=True)
+
+    class Meta:
+        model = BankStatement
+        fields = [
+            'id', 'file', 'file_format', 'bank_name', 'account_number',
+            'default_currency', 'status', 'line_count', 'matched_count',
+            'suggested_count', 'uploaded_by', 'uploaded_by_name',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'line_count', 'matched_count', 'suggested_count',
+            'uploaded_by', 'created_at', 'updated_at'
+        ]
+
+    def validate(self, data):
+        """Infer the file format from the extension when not given."""
+        if not data.get('file_format'):
+            extension = data['file'].name.rsplit('.', 1)[-1].lower()
+            if extension not in dict(BankStatement.FORMAT_CHOICES):
+                raise serializers.ValidationError({
+                    'file_format': 'Unsupported statement format. Use CSV or OFX.'
+                })
+            data['file_format'] = extension
+        return data
+
+
+class BankStatementLineSerializer(serializers.ModelSerializer):
+    """BankStatementLine serializer."""
+
+    invoice_number = serializers.CharField(
+        source='invoice.invoice_number', read_only=True)
+    passenger_name = serializers.CharField(
+        source='passenger.full_name', read_only=True)
+
+    class Meta:
+        model = BankStatementLine
+        fields = [
+            'id', 'statement', 'line_number', 'transaction_date', 'amount',
+            'currency', 'reference', 'description', 'match_status',
+            'match_score', 'deposit', 'invoice', 'invoice_number',
+            'passenger', 'passenger_name'
+        ]
+        read_only_fields = fields
+
+
+class LedgerEntrySerializer(serializers.ModelSerializer):
+    """LedgerEntry serializer."""
+
+    class Meta:
+        model = LedgerEntry
+        fields = [
+            'id', 'group', 'passenger', 'entry_type', 'source_type',
+            'source_id', 'description', 'amount', 'currency',
+            'entry_date', 'due_date', 'balance_after', 'created_at'
+        ]
+        read_only_fields = fields
+
+
+class AccountBalanceSerializer(serializers.ModelSerializer):
+    """AccountBalance serializer."""
+
+    class Meta:
+        model = AccountBalance
+        fields = [
+            'passenger', 'currency', 'balance', 'total_charges',
+            'total_payments', 'total_credits', 'last_entry_at'
+        ]
+        read_only_fields = fields
+
+
+class GroupBalanceSerializer(serializers.ModelSerializer):
+    """GroupBalance serializer."""
+
+    group_code = serializers.CharField(source='group.code', read_only=True)
+
+    class Meta:
+        model = GroupBalance
+        fields = [
+            'group', 'group_code', 'currency', 'balance', 'total_charges',
+            'total_payments', 'total_credits', 'last_entry_at'
+        ]
+        read_only_fields = fields
+
+
+class PayablesRunSerializer(serializers.ModelSerializer):
+    """PayablesRun serializer."""
+
+    created_by_name = serializers.CharField(
+        source='created_by.get_full_name', read_only=True)
+
+    class Meta:
+        model = PayablesRun
+        fields = [
+            'id', 'currency', 'due_through', 'payment_date', 'status',
+            'supplier_count', 'cost_count', 'total_amount', 'payment_file',
+            'paid_at', 'created_by', 'created_by_name',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'status', 'supplier_count', 'cost_count', 'total_amount',
+            'payment_file', 'paid_at', 'created_by', 'created_at', 'updated_at'
+        ]
+
+
+class ReceivablesFilterSerializer(serializers.Serializer):
+    """Query parameters of the receivables reports."""
+
+    as_of = serializers.DateField(required=False)
+    group = serializers.UUIDField(required=False)
+    currency = serializers.CharField(max_length=3, required=False)
+
+
+class AnalyticsSerializer(serializers.Serializer):
+    """Query parameters of the revenue and cost analytics."""
+
+    metric = serializers.ChoiceField(choices=FinancialRollup.METRIC_CHOICES, default='revenue')
+    interval = serializers.ChoiceField(choices=INTERVALS, default='month')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    currency = serializers.CharField(max_length=3, default='USD')
+    group_by = serializers.ChoiceField(choices=list(GROUP_BY), required=False)
+    program = serializers.UUIDField(required=False)
+    category = serializers.CharField(max_length=20, required=False)
+    source_currency = serializers.CharField(max_length=3, required=False)
+
+    def validate(self, attrs):
+        """Default to the last 12 months and validate the range."""
+        attrs['currency'] = attrs['currency'].upper()
+        attrs.setdefault('end', timezone.localdate())
+        attrs.setdefault('start', attrs['end'] - timedelta(days=365))
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({
+                'end': 'End date must be after or equal to start date'
+            })
+        return attrs
@@ -0,0 +1,102 @@
+"""
+Signal handlers that post financial changes to the receivables ledger, keep
+the revenue/cost rollups current and fill base-currency amounts once an
+exchange rate arrives.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+
+from apps.circuits.models import Passenger
+from apps.suppliers.models import ExchangeRate
+from .ledger import remove_passenger, sync_source, source_type_for
+from .models import AdditionalSale, BankDeposit, GroupCost, Invoice
+from .rollups import bucket_for, recompute_buckets
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    source_type = source_type_for(instance)
+    if source_type:
+        sync_source(source_type, instance)
+
+
+def _on_passenger_delete(sender, instance, **kwargs):
+    # The cascade removes the passenger's entries and balances, not their
+    # share of the group balances
+    remove_passenger(instance.pk)
+
+
+def _on_delete(sender, instance, origin=None, **kwargs):
+    if sender is Passenger:
+        return
+    if origin is not None and origin is not instance and getattr(origin, 'model', None) is not sender:
+        # Cascaded from a passenger or group whose entries go with it
+        return
+    source_type = source_type_for(instance)
+    if source_type:
+        sync_source(source_type, source_id=instance.pk)
+
+
+for model in (Passenger, AdditionalSale, BankDeposit, Invoice):
+    post_save.connect(_on_save, sender=model,
+                      dispatch_uid=f'ledger_post_{model._meta.label}')
+    post_delete.connect(_on_delete, sender=model,
+                        dispatch_uid=f'ledger_reverse_{model._meta.label}')
+pre_delete.connect(_on_passenger_delete, sender=Passenger,
+                   dispatch_uid='ledger_remove_passenger')
+
+
+ROLLUP_METRICS = {AdditionalSale: 'revenue', GroupCost: 'cost'}
+
+
+def _rollup_before_save(sender, instance, raw=False, **kwargs):
+    instance._rollup_buckets = set()
+    if raw or instance._state.adding:
+        return
+    previous = sender.objects.filter(pk=instance.pk).first()
+    if previous is not None:
+        instance._rollup_buckets.add(bucket_for(ROLLUP_METRICS[sender], previous))
+
+
+def _rollup_after_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    buckets = getattr(instance, '_rollup_buckets', set())
+    buckets.add(bucket_for(ROLLUP_METRICS[sender], instance))
+    transaction.on_commit(lambda: recompute_buckets(buckets))
+
+
+def _rollup_before_delete(sender, instance, **kwargs):
+    # Resolve the bucket while the passenger/group rows still exist
+    bucket = bucket_for(ROLLUP_METRICS[sender], instance)
+    transaction.on_commit(lambda: recompute_buckets({bucket}))
+
+
+for model in ROLLUP_METRICS:
+    pre_save.connect(_rollup_before_save, sender=model,
+                     dispatch_uid=f'rollup_pre_save_{model._meta.label}')
+    post_save.connect(_rollup_after_save, sender=model,
+                      dispatch_uid=f'rollup_post_save_{model._meta.label}')
+    pre_delete.connect(_rollup_before_delete, sender=model,
+                       dispatch_uid=f'rollup_pre_delete_{model._meta.label}')
+
+
+def _on_exchange_rate_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .tasks import backfill_missing_base_amounts
+
+    base_currency = settings.BASE_CURRENCY
+    if instance.to_currency == base_currency:
+        currency = instance.from_currency
+    elif instance.from_currency == base_currency:
+        currency = instance.to_currency
+    else:
+        return
+    transaction.on_commit(lambda: backfill_missing_base_amounts.delay(currency))
+
+
+post_save.connect(_on_exchange_rate_saved, sender=ExchangeRate,
+                  dispatch_uid='financial_exchange_rate_backfill')
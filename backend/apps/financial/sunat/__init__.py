@@ -0,0 +1,3 @@
+"""
+SUNAT electronic invoicing: UBL builders, transports and rate limiting.
+"""
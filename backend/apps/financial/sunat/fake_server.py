@@ -0,0 +1,170 @@
+"""
+Local stand-in for the SUNAT billing web service.
+
+Speaks the same SOAP operations as SUNAT (sendBill, sendSummary, getStatus)
+so HttpTransport can be exercised end to end without network access:
+
+    with FakeSunatServer() as server:
+        transport = HttpTransport(url=server.url, username='x', password='y')
+        transport.send_bill(filename, xml)
+
+Documents whose number ends with '-99999999' are rejected with code 2800.
+"""
+import base64
+import io
+import re
+import threading
+import uuid
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CDR_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<ar:ApplicationResponse
+    xmlns:ar="urn:oasis:names:specification:ubl:schema:xsd:ApplicationResponse-2"
+    xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"
+    xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">
+  <cbc:ID>{response_id}</cbc:ID>
+  <cac:DocumentResponse>
+    <cac:Response>
+      <cbc:ReferenceID>{reference}</cbc:ReferenceID>
+      <cbc:ResponseCode>{code}</cbc:ResponseCode>
+      <cbc:Description>{description}</cbc:Description>
+    </cac:Response>
+  </cac:DocumentResponse>
+</ar:ApplicationResponse>"""
+
+RESPONSE_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/">
+  <soap-env:Body>
+    <br:{operation}Response xmlns:br="http://service.sunat.gob.pe">{body}</br:{operation}Response>
+  </soap-env:Body>
+</soap-env:Envelope>"""
+
+REJECTED_SUFFIX = '-99999999'
+
+_OPERATION_RE = re.compile(r'<\w+:(sendBill|sendSummary|getStatus)>')
+_TAG_RE = '<{0}>(.*?)</{0}>'
+
+
+def _tag(body, name):
+    match = re.search(_TAG_RE.format(name), body, re.S)
+    return match.group(1).strip() if match else ''
+
+
+def build_cdr_zip(filename, code='0', description=None):
+    """Build a CDR zip (R-{filename}.xml) like the ones SUNAT returns."""
+    reference = filename.split('-', 2)[-1]
+    description = description or f'El comprobante {reference} ha sido aceptado'
+    xml = CDR_TEMPLATE.format(
+        response_id=uuid.uuid4().hex[:12],
+        reference=reference,
+        code=code,
+        description=description
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr(f'R-{filename}.xml', xml)
+    return buffer.getvalue()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+        match = _OPERATION_RE.search(body)
+        operation = match.group(1) if match else ''
+        handler = getattr(self, f'_{operation}', None)
+        if handler is None:
+            self._send(500, self._fault('0100', 'Operation not supported'))
+            return
+        self.server.requests.append(operation)
+        handler(body)
+
+    def _send(self, status, payload):
+        data = payload.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    @staticmethod
+    def _fault(code, message):
+        return (
+            '<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/">'
+            '<soap-env:Body><soap-env:Fault>'
+            f'<faultcode>soap-env:Client.{code}</faultcode>'
+            f'<faultstring>{message}</faultstring>'
+            '</soap-env:Fault></soap-env:Body></soap-env:Envelope>'
+        )
+
+    @staticmethod
+    def _respond(operation, body):
+        return RESPONSE_TEMPLATE.format(operation=operation, body=body)
+
+    def _sendBill(self, body):
+        filename = _tag(body, 'fileName').rsplit('.', 1)[0]
+        if filename.endswith(REJECTED_SUFFIX):
+            cdr = build_cdr_zip(filename, '2800', 'El dato ingresado en el tipo de documento no cumple')
+        else:
+            cdr = build_cdr_zip(filename)
+        encoded = base64.b64encode(cdr).decode('ascii')
+        self._send(200, self._respond(
+            'sendBill', f'<applicationResponse>{encoded}</applicationResponse>'))
+
+    def _sendSummary(self, body):
+        filename = _tag(body, 'fileName').rsplit('.', 1)[0]
+        ticket = str(uuid.uuid4().int)[:15]
+        self.server.tickets[ticket] = filename
+        self._send(200, self._respond('sendSummary', f'<ticket>{ticket}</ticket>'))
+
+    def _getStatus(self, body):
+        ticket = _tag(body, 'ticket')
+        filename = self.server.tickets.get(ticket)
+        if filename is None:
+            self._send(500, self._fault('0127', 'El ticket no existe'))
+            return
+        encoded = base64.b64encode(build_cdr_zip(filename)).decode('ascii')
+        self._send(200, self._respond(
+            'getStatus',
+            f'<status><statusCode>0</statusCode><content>{encoded}</content></status>'))
+
+
+class FakeSunatServer:
+    """Threaded fake SUNAT server; usable as a context manager."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.tickets = {}
+        self.httpd.requests = []
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    @property
+    def requests(self):
+        """Operations received so far, in order."""
+        return self.httpd.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,109 @@
+"""
+SUNAT submission steps used by the financial Celery tasks.
+"""
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from .transports import SunatError, get_transport
+from .ubl import build_invoice_xml, build_summary_xml, document_filename, summary_filename
+
+
+def _response_payload(response):
+    return {
+        'code': response.code,
+        'description': response.description,
+        'accepted': response.accepted,
+        'ticket': response.ticket,
+        'cdr': response.cdr,
+        'received_at': timezone.now().isoformat(),
+    }
+
+
+def ensure_invoice_xml(invoice):
+    """
+    Build and store the UBL XML for an invoice if it is missing.
+
+    Returns:
+        Tuple of (filename, xml_bytes)
+    """
+    filename = document_filename(invoice)
+    if invoice.xml_file:
+        with invoice.xml_file.open('rb') as xml:
+            return filename, xml.read()
+
+    xml_bytes = build_invoice_xml(invoice)
+    invoice.xml_file.save(f'{filename}.xml', ContentFile(xml_bytes), save=False)
+    return filename, xml_bytes
+
+
+def submit_invoice(invoice):
+    """
+    Send a factura or note to SUNAT and record the CDR on the invoice.
+
+    Raises:
+        TransientSunatError: The submission should be retried later
+    """
+    filename, xml_bytes = ensure_invoice_xml(invoice)
+    try:
+        response = get_transport().send_bill(filename, xml_bytes)
+    except SunatError as exc:
+        invoice.status = 'rejected'
+        invoice.sunat_response = {
+            'code': exc.code,
+            'description': exc.description,
+            'accepted': False,
+            'received_at': timezone.now().isoformat(),
+        }
+    else:
+        invoice.status = 'accepted' if response.accepted else 'rejected'
+        invoice.sunat_response = _response_payload(response)
+
+    invoice.save(update_fields=['status', 'sunat_response', 'xml_file', 'updated_at'])
+    return invoice
+
+
+def submit_summary(summary):
+    """
+    Send a resumen diario and store the ticket SUNAT returns.
+
+    Raises:
+        TransientSunatError: The submission should be retried later
+    """
+    invoices = list(summary.invoices.order_by('invoice_number'))
+    filename = summary_filename(summary)
+    xml_bytes = build_summary_xml(summary, invoices)
+    summary.xml_file.save(f'{filename}.xml', ContentFile(xml_bytes), save=False)
+
+    try:
+        response = get_transport().send_summary(filename, xml_bytes)
+    except SunatError as exc:
+        summary.status = 'rejected'
+        summary.sunat_response = {'code': exc.code, 'description': exc.description}
+        summary.save(update_fields=['status', 'sunat_response', 'xml_file', 'updated_at'])
+        summary.invoices.update(status='rejected', updated_at=timezone.now())
+        return summary
+
+    summary.status = 'sent'
+    summary.ticket = response.ticket
+    summary.sunat_response = _response_payload(response)
+    summary.save(update_fields=['status', 'ticket', 'sunat_response', 'xml_file', 'updated_at'])
+    return summary
+
+
+def resolve_summary(summary, response):
+    """Apply a processed ticket to the summary and all of its boletas in bulk."""
+    payload = _response_payload(response)
+    status = 'accepted' if response.accepted else 'rejected'
+
+    summary.status = status
+    summary.sunat_response = payload
+    summary.save(update_fields=['status', 'sunat_response', 'updated_at'])
+
+    invoice_payload = {key: value for key, value in payload.items() if key != 'cdr'}
+    invoice_payload['summary'] = summary.identifier
+    summary.invoices.exclude(status='cancelled').update(
+        status=status,
+        sunat_response=invoice_payload,
+        updated_at=timezone.now()
+    )
+    return summary
@@ -0,0 +1,28 @@
+"""
+Cluster-wide rate limiting for SUNAT submissions.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def acquire_slot(key='sunat', limit=None):
+    """
+    Take one slot in the current one-second window shared by all workers.
+
+    Args:
+        key: Limiter name
+        limit: Requests per second (default: settings.SUNAT_RATE_LIMIT)
+
+    Returns:
+        True if the caller may submit now, False if it should back off
+    """
+    limit = limit or settings.SUNAT_RATE_LIMIT
+    window_key = f'ratelimit:{key}:{int(time.time())}'
+    cache.add(window_key, 0, timeout=5)
+    try:
+        return cache.incr(window_key) <= limit
+    except ValueError:
+        # Window expired between add() and incr()
+        return True
@@ -0,0 +1,197 @@
+"""
+Pluggable transports for the SUNAT billing web service.
+
+The transport class is configured with settings.SUNAT_TRANSPORT. One
+instance is kept per worker process so its HTTP connection pool is reused
+across submissions.
+"""
+import base64
+import re
+import zipfile
+from collections import namedtuple
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+from .ubl import read_cdr, zip_document
+
+SunatResponse = namedtuple(
+    'SunatResponse', ['accepted', 'code', 'description', 'cdr', 'ticket'])
+SunatResponse.__new__.__defaults__ = (None, None)
+
+SOAP_ENVELOPE = """<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"
+    xmlns:ser="http://service.sunat.gob.pe"
+    xmlns:wsse="http://docs.oasis-open.org/wss/2004/01/oasis-200401-wss-wssecurity-secext-1.0.xsd">
+  <soapenv:Header>
+    <wsse:Security>
+      <wsse:UsernameToken>
+        <wsse:Username>{username}</wsse:Username>
+        <wsse:Password>{password}</wsse:Password>
+      </wsse:UsernameToken>
+    </wsse:Security>
+  </soapenv:Header>
+  <soapenv:Body>
+    <ser:{operation}>{body}</ser:{operation}>
+  </soapenv:Body>
+</soapenv:Envelope>"""
+
+# Ticket still being processed by SUNAT
+STATUS_IN_PROCESS = '98'
+
+_FAULT_CODE_RE = re.compile(r'(\d{4})')
+
+_transport = None
+
+
+class SunatError(Exception):
+    """Permanent SUNAT error (the document must be fixed before resending)."""
+
+    def __init__(self, code, description):
+        super().__init__(f'{code}: {description}')
+        self.code = code
+        self.description = description
+
+
+class TransientSunatError(Exception):
+    """Temporary failure (network, timeout, SUNAT unavailable); safe to retry."""
+
+
+def is_accepted_code(code):
+    """Code 0 is accepted; 4000+ are accepted with observations."""
+    try:
+        value = int(code)
+    except (TypeError, ValueError):
+        return False
+    return value == 0 or value >= 4000
+
+
+def is_transient_code(code):
+    """SUNAT exception codes 0100-0199 mean the service could not process the request."""
+    try:
+        value = int(code)
+    except (TypeError, ValueError):
+        return False
+    return 100 <= value < 200
+
+
+class BaseTransport:
+    """Interface implemented by SUNAT transports."""
+
+    def send_bill(self, filename, xml_bytes):
+        """Submit a factura/boleta/note and return a SunatResponse with the CDR."""
+        raise NotImplementedError
+
+    def send_summary(self, filename, xml_bytes):
+        """Submit a resumen diario and return a SunatResponse with the ticket."""
+        raise NotImplementedError
+
+    def get_status(self, ticket):
+        """Query an asynchronous ticket; code 98 means still in process."""
+        raise NotImplementedError
+
+
+class HttpTransport(BaseTransport):
+    """SOAP transport over a pooled requests.Session."""
+
+    def __init__(self, url=None, username=None, password=None,
+                 pool_size=None, timeout=None):
+        self.url = url or settings.SUNAT_API_URL
+        self.username = username or f"{settings.SUNAT_RUC}{settings.SUNAT_USERNAME}"
+        self.password = password or settings.SUNAT_PASSWORD
+        self.timeout = timeout or settings.SUNAT_TIMEOUT
+
+        pool_size = pool_size or settings.SUNAT_POOL_SIZE
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Content-Type': 'text/xml; charset=utf-8'})
+
+    def _call(self, operation, body):
+        envelope = SOAP_ENVELOPE.format(
+            username=escape(self.username),
+            password=escape(self.password),
+            operation=operation,
+            body=body
+        )
+        try:
+            response = self.session.post(
+                self.url,
+                data=envelope.encode('utf-8'),
+                headers={'SOAPAction': f'urn:{operation}'},
+                timeout=self.timeout
+            )
+        except requests.RequestException as exc:
+            raise TransientSunatError(str(exc)) from exc
+
+        if response.status_code >= 500 and b'Fault' not in response.content:
+            raise TransientSunatError(f'HTTP {response.status_code}')
+
+        try:
+            tree = ET.fromstring(response.content)
+        except ET.ParseError as exc:
+            # HTML error page or empty body from a gateway in front of SUNAT
+            raise TransientSunatError(
+                f'Unreadable response (HTTP {response.status_code}): {exc}') from exc
+        fault = tree.find('.//{http://schemas.xmlsoap.org/soap/envelope/}Fault')
+        if fault is not None:
+            fault_code = fault.findtext('faultcode', default='')
+            description = fault.findtext('faultstring', default='')
+            match = _FAULT_CODE_RE.search(fault_code) or _FAULT_CODE_RE.search(description)
+            code = match.group(1) if match else fault_code
+            if not match or is_transient_code(code):
+                raise TransientSunatError(f'{code}: {description}')
+            raise SunatError(code, description)
+        return tree
+
+    @staticmethod
+    def _content(filename, xml_bytes):
+        content = base64.b64encode(zip_document(filename, xml_bytes)).decode('ascii')
+        return f'<fileName>{filename}.zip</fileName><contentFile>{content}</contentFile>'
+
+    @staticmethod
+    def _find(tree, tag):
+        for element in tree.iter():
+            if element.tag.rsplit('}', 1)[-1] == tag:
+                return element.text or ''
+        return ''
+
+    def _cdr_response(self, encoded):
+        try:
+            code, description, cdr = read_cdr(base64.b64decode(encoded))
+        except (ValueError, StopIteration, zipfile.BadZipFile, ET.ParseError) as exc:
+            raise TransientSunatError(f'Unreadable CDR: {exc!r}') from exc
+        return SunatResponse(is_accepted_code(code), code, description, cdr)
+
+    def send_bill(self, filename, xml_bytes):
+        tree = self._call('sendBill', self._content(filename, xml_bytes))
+        return self._cdr_response(self._find(tree, 'applicationResponse'))
+
+    def send_summary(self, filename, xml_bytes):
+        tree = self._call('sendSummary', self._content(filename, xml_bytes))
+        ticket = self._find(tree, 'ticket')
+        return SunatResponse(False, STATUS_IN_PROCESS, 'Ticket issued', None, ticket)
+
+    def get_status(self, ticket):
+        tree = self._call('getStatus', f'<ticket>{ticket}</ticket>')
+        status_code = self._find(tree, 'statusCode')
+        if status_code == STATUS_IN_PROCESS:
+            return SunatResponse(False, status_code, 'In process', None, ticket)
+        content = self._find(tree, 'content')
+        if not content:
+            return SunatResponse(False, status_code, 'Processed with errors', None, ticket)
+        response = self._cdr_response(content)
+        return response._replace(ticket=ticket)
+
+
+def get_transport():
+    """Get the process-wide transport configured in settings.SUNAT_TRANSPORT."""
+    global _transport
+    if _transport is None:
+        _transport = import_string(settings.SUNAT_TRANSPORT)()
+    return _transport
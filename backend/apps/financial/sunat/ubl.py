@@ -0,0 +1,232 @@
+"""
+UBL 2.1 XML builders for SUNAT documents.
+"""
+import io
+import zipfile
+from decimal import Decimal
+from xml.etree import ElementTree as ET
+
+from django.conf import settings
+
+NS = {
+    'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
+    'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
+    'ext': 'urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2',
+    'sac': 'urn:sunat:names:specification:ubl:peru:schema:xsd:SunatAggregateComponents-1',
+}
+
+for _prefix, _uri in NS.items():
+    ET.register_namespace(_prefix, _uri)
+
+# Catalog 01: document type codes
+DOCUMENT_TYPE_CODES = {
+    'factura': '01',
+    'boleta': '03',
+    'nota_credito': '07',
+    'nota_debito': '08',
+}
+
+# Catalog 06: identity document type codes
+IDENTITY_TYPE_CODES = {
+    'dni': '1',
+    'ruc': '6',
+    'passport': '7',
+}
+
+# Root element, namespace and line element per document type
+_ROOTS = {
+    'factura': ('Invoice', 'urn:oasis:names:specification:ubl:schema:xsd:Invoice-2',
+                'InvoiceLine', 'InvoicedQuantity'),
+    'boleta': ('Invoice', 'urn:oasis:names:specification:ubl:schema:xsd:Invoice-2',
+               'InvoiceLine', 'InvoicedQuantity'),
+    'nota_credito': ('CreditNote', 'urn:oasis:names:specification:ubl:schema:xsd:CreditNote-2',
+                     'CreditNoteLine', 'CreditedQuantity'),
+    'nota_debito': ('DebitNote', 'urn:oasis:names:specification:ubl:schema:xsd:DebitNote-2',
+                    'DebitNoteLine', 'DebitedQuantity'),
+}
+
+SUMMARY_NS = 'urn:sunat:names:specification:ubl:peru:schema:xsd:SummaryDocuments-1'
+
+# Maximum number of lines SUNAT accepts in one resumen diario
+SUMMARY_MAX_LINES = 500
+
+
+def _q(prefix, tag):
+    return f'{{{NS[prefix]}}}{tag}'
+
+
+def _sub(parent, prefix, tag, text=None, **attrib):
+    element = ET.SubElement(parent, _q(prefix, tag), attrib)
+    if text is not None:
+        element.text = str(text)
+    return element
+
+
+def _amount(parent, tag, value, currency):
+    return _sub(parent, 'cbc', tag, f'{Decimal(value):.2f}', currencyID=currency)
+
+
+def identity_type_code(document_type):
+    """Map a customer document type to SUNAT catalog 06 (0 = other)."""
+    return IDENTITY_TYPE_CODES.get(document_type, '0')
+
+
+def document_filename(invoice):
+    """SUNAT file name: {RUC}-{type code}-{series}-{number}."""
+    code = DOCUMENT_TYPE_CODES[invoice.invoice_type]
+    return f"{settings.SUNAT_RUC}-{code}-{invoice.invoice_number}"
+
+
+def summary_filename(summary):
+    """SUNAT file name for a resumen diario: {RUC}-{identifier}."""
+    return f"{settings.SUNAT_RUC}-{summary.identifier}"
+
+
+def _supplier_party(root):
+    party = _sub(_sub(root, 'cac', 'AccountingSupplierParty'), 'cac', 'Party')
+    _sub(_sub(party, 'cac', 'PartyIdentification'), 'cbc', 'ID',
+         settings.SUNAT_RUC, schemeID='6')
+    _sub(_sub(party, 'cac', 'PartyLegalEntity'), 'cbc', 'RegistrationName',
+         settings.SUNAT_COMPANY_NAME)
+
+
+def _tax_total(parent, base, tax, currency):
+    tax_total = _sub(parent, 'cac', 'TaxTotal')
+    _amount(tax_total, 'TaxAmount', tax, currency)
+    subtotal = _sub(tax_total, 'cac', 'TaxSubtotal')
+    _amount(subtotal, 'TaxableAmount', base, currency)
+    _amount(subtotal, 'TaxAmount', tax, currency)
+    scheme = _sub(_sub(subtotal, 'cac', 'TaxCategory'), 'cac', 'TaxScheme')
+    _sub(scheme, 'cbc', 'ID', '1000')
+    _sub(scheme, 'cbc', 'Name', 'IGV')
+    _sub(scheme, 'cbc', 'TaxTypeCode', 'VAT')
+
+
+def build_invoice_xml(invoice):
+    """
+    Build the UBL document for an invoice, boleta or note.
+
+    The ext:ExtensionContent element is left empty for the XML signature.
+
+    Returns:
+        UTF-8 encoded XML bytes
+    """
+    root_tag, root_ns, line_tag, quantity_tag = _ROOTS[invoice.invoice_type]
+    currency = invoice.currency
+
+    root = ET.Element(f'{{{root_ns}}}{root_tag}')
+    extension = _sub(_sub(root, 'ext', 'UBLExtensions'), 'ext', 'UBLExtension')
+    _sub(extension, 'ext', 'ExtensionContent')
+    _sub(root, 'cbc', 'UBLVersionID', '2.1')
+    _sub(root, 'cbc', 'CustomizationID', '2.0')
+    _sub(root, 'cbc', 'ID', invoice.invoice_number)
+    _sub(root, 'cbc', 'IssueDate', invoice.issue_date.isoformat())
+    if root_tag == 'Invoice':
+        if invoice.due_date:
+            _sub(root, 'cbc', 'DueDate', invoice.due_date.isoformat())
+        _sub(root, 'cbc', 'InvoiceTypeCode',
+             DOCUMENT_TYPE_CODES[invoice.invoice_type], listID='0101')
+    if invoice.notes:
+        _sub(root, 'cbc', 'Note', invoice.notes[:200])
+    _sub(root, 'cbc', 'DocumentCurrencyCode', currency)
+
+    _supplier_party(root)
+
+    customer = _sub(_sub(root, 'cac', 'AccountingCustomerParty'), 'cac', 'Party')
+    _sub(_sub(customer, 'cac', 'PartyIdentification'), 'cbc', 'ID',
+         invoice.customer_document_number,
+         schemeID=identity_type_code(invoice.customer_document_type))
+    _sub(_sub(customer, 'cac', 'PartyLegalEntity'), 'cbc', 'RegistrationName',
+         invoice.customer_name)
+
+    _tax_total(root, invoice.subtotal, invoice.tax_amount, currency)
+
+    totals_tag = 'RequestedMonetaryTotal' if root_tag == 'DebitNote' else 'LegalMonetaryTotal'
+    totals = _sub(root, 'cac', totals_tag)
+    _amount(totals, 'LineExtensionAmount', invoice.subtotal, currency)
+    _amount(totals, 'TaxInclusiveAmount', invoice.total_amount, currency)
+    _amount(totals, 'PayableAmount', invoice.total_amount, currency)
+
+    line = _sub(root, 'cac', line_tag)
+    _sub(line, 'cbc', 'ID', '1')
+    _sub(line, 'cbc', quantity_tag, '1', unitCode='ZZ')
+    _amount(line, 'LineExtensionAmount', invoice.subtotal, currency)
+    pricing = _sub(_sub(line, 'cac', 'PricingReference'), 'cac', 'AlternativeConditionPrice')
+    _amount(pricing, 'PriceAmount', invoice.total_amount, currency)
+    _sub(pricing, 'cbc', 'PriceTypeCode', '01')
+    _tax_total(line, invoice.subtotal, invoice.tax_amount, currency)
+    _sub(_sub(line, 'cac', 'Item'), 'cbc', 'Description',
+         invoice.notes[:250] if invoice.notes else 'Servicios turísticos')
+    _amount(_sub(line, 'cac', 'Price'), 'PriceAmount', invoice.subtotal, currency)
+
+    return ET.tostring(root, encoding='utf-8', xml_declaration=True)
+
+
+def build_summary_xml(summary, invoices):
+    """
+    Build a resumen diario (SummaryDocuments) for a batch of boletas.
+
+    Returns:
+        UTF-8 encoded XML bytes
+    """
+    root = ET.Element(f'{{{SUMMARY_NS}}}SummaryDocuments')
+    extension = _sub(_sub(root, 'ext', 'UBLExtensions'), 'ext', 'UBLExtension')
+    _sub(extension, 'ext', 'ExtensionContent')
+    _sub(root, 'cbc', 'UBLVersionID', '2.0')
+    _sub(root, 'cbc', 'CustomizationID', '1.1')
+    _sub(root, 'cbc', 'ID', summary.identifier)
+    _sub(root, 'cbc', 'ReferenceDate', summary.reference_date.isoformat())
+    _sub(root, 'cbc', 'IssueDate', summary.created_at.date().isoformat())
+
+    supplier = _sub(root, 'cac', 'AccountingSupplierParty')
+    _sub(supplier, 'cbc', 'CustomerAssignedAccountID', settings.SUNAT_RUC)
+    _sub(supplier, 'cbc', 'AdditionalAccountID', '6')
+    _sub(_sub(_sub(supplier, 'cac', 'Party'), 'cac', 'PartyLegalEntity'),
+         'cbc', 'RegistrationName', settings.SUNAT_COMPANY_NAME)
+
+    for line_id, invoice in enumerate(invoices, start=1):
+        line = _sub(root, 'sac', 'SummaryDocumentsLine')
+        _sub(line, 'cbc', 'LineID', line_id)
+        _sub(line, 'cbc', 'DocumentTypeCode', DOCUMENT_TYPE_CODES[invoice.invoice_type])
+        _sub(line, 'cbc', 'ID', invoice.invoice_number)
+        customer = _sub(line, 'cac', 'AccountingCustomerParty')
+        _sub(customer, 'cbc', 'CustomerAssignedAccountID', invoice.customer_document_number)
+        _sub(customer, 'cbc', 'AdditionalAccountID',
+             identity_type_code(invoice.customer_document_type))
+        # Condition 1 = add, 3 = void
+        condition = '3' if invoice.status == 'cancelled' else '1'
+        _sub(_sub(line, 'cac', 'Status'), 'cbc', 'ConditionCode', condition)
+        _sub(line, 'sac', 'TotalAmount', f'{invoice.total_amount:.2f}',
+             currencyID=invoice.currency)
+        payment = _sub(line, 'sac', 'BillingPayment')
+        _amount(payment, 'PaidAmount', invoice.subtotal, invoice.currency)
+        _sub(payment, 'cbc', 'InstructionID', '01')
+        _tax_total(line, invoice.subtotal, invoice.tax_amount, invoice.currency)
+
+    return ET.tostring(root, encoding='utf-8', xml_declaration=True)
+
+
+def zip_document(filename, xml_bytes):
+    """Zip an XML document the way SUNAT expects ({filename}.zip/{filename}.xml)."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(f'{filename}.xml', xml_bytes)
+    return buffer.getvalue()
+
+
+def read_cdr(zip_bytes):
+    """
+    Extract the response code and description from a CDR zip.
+
+    Returns:
+        Tuple of (code, description, cdr_xml_text)
+    """
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as archive:
+        name = next(n for n in archive.namelist() if n.lower().endswith('.xml'))
+        xml_bytes = archive.read(name)
+
+    tree = ET.fromstring(xml_bytes)
+    response = tree.find(f".//{_q('cac', 'DocumentResponse')}/{_q('cac', 'Response')}")
+    code = response.findtext(_q('cbc', 'ResponseCode'), default='') if response is not None else ''
+    description = response.findtext(_q('cbc', 'Description'), default='') if response is not None else ''
+    return code, description, xml_bytes.decode('utf-8')
@@ -0,0 +1,297 @@
+"""
+Celery tasks for financial app.
+"""
+import random
+from itertools import groupby
+
+from celery import group, shared_task
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.common.jobs import JobTask
+from .models import (
+    AdditionalSale, BankDeposit, BankStatement, Commission, GroupCost, Invoice,
+    PayablesRun, SunatSummary
+)
+from .currency import backfill_base_amounts
+from .payables import prepare_run
+from .pdf import render_merged_pdf, save_invoice_pdf
+from .reconciliation import reconcile_statement
+from .sequences import allocate_summary_identifier
+from .sunat.submission import ensure_invoice_xml, resolve_summary, submit_invoice, submit_summary
+from .sunat.throttle import acquire_slot
+from .sunat.transports import STATUS_IN_PROCESS, TransientSunatError, get_transport
+from .sunat.ubl import SUMMARY_MAX_LINES
+
+
+def _backoff(retries):
+    """Exponential backoff with jitter, capped at SUNAT_RETRY_BACKOFF_MAX seconds."""
+    delay = min(settings.SUNAT_RETRY_BACKOFF_MAX, 5 * 2 ** retries)
+    return delay + random.uniform(0, delay / 2)
+
+
+def _requeue_when_throttled(task, *args):
+    """
+    Run the task again shortly if no SUNAT rate-limit slot is free.
+
+    Bounces are re-sent with apply_async rather than retried, so they do
+    not use up SUNAT_MAX_RETRIES or grow the backoff.
+    """
+    if acquire_slot():
+        return False
+    task.apply_async(args=args, countdown=random.uniform(0.5, 2),
+                     retries=task.request.retries)
+    return True
+
+
+def _release_invoice(invoice_id, status, error, attempts):
+    """Move a claimed invoice out of `sent`, recording why."""
+    Invoice.objects.filter(pk=invoice_id, status='sent').update(
+        status=status,
+        sunat_response={
+            'last_error': error,
+            'attempts': attempts,
+            'failed_at': timezone.now().isoformat(),
+        },
+        updated_at=timezone.now(),
+    )
+
+
+@shared_task(bind=True, max_retries=None, acks_late=True)
+def submit_invoice_to_sunat(self, invoice_id):
+    """
+    Submit one queued factura or note to SUNAT.
+
+    The invoice is claimed by moving it to `sent`, and the SOAP call runs
+    outside any transaction. A transient failure puts it back in the queue
+    with the error recorded; once SUNAT_MAX_RETRIES is reached, or on any
+    unexpected error, it becomes `failed` and can be queued again by hand.
+    """
+    if _requeue_when_throttled(self, invoice_id):
+        return None
+
+    claimable = ['queued']
+    if (self.request.delivery_info or {}).get('redelivered'):
+        # The worker that ran the previous delivery died mid-submission
+        claimable.append('sent')
+    claimed = Invoice.objects.filter(
+        pk=invoice_id, status__in=claimable, sunat_summary__isnull=True
+    ).update(status='sent', updated_at=timezone.now())
+    if not claimed:
+        # Already processed or being processed by another worker
+        return None
+
+    invoice = Invoice.objects.get(pk=invoice_id)
+    try:
+        submit_invoice(invoice)
+    except TransientSunatError as exc:
+        retries = self.request.retries
+        exhausted = retries >= settings.SUNAT_MAX_RETRIES
+        _release_invoice(invoice_id, 'failed' if exhausted else 'queued', str(exc), retries + 1)
+        if exhausted:
+            raise
+        raise self.retry(exc=exc, countdown=_backoff(retries))
+    except Exception as exc:
+        _release_invoice(invoice_id, 'failed', repr(exc), self.request.retries + 1)
+        raise
+
+    return invoice.status
+
+
+# Invoices per PDF rendering task when fanning out a batch
+PDF_RENDER_CHUNK = 50
+
+
+@shared_task
+def render_invoice_documents(invoice_ids):
+    """Generate the stored XML and PDF of freshly issued invoices."""
+    rendered = 0
+    for invoice in Invoice.objects.filter(pk__in=invoice_ids):
+        update_fields = ['updated_at']
+        if not invoice.xml_file:
+            ensure_invoice_xml(invoice)
+            update_fields.append('xml_file')
+        if not invoice.pdf_file:
+            save_invoice_pdf(invoice)
+            update_fields.append('pdf_file')
+        invoice.save(update_fields=update_fields)
+        rendered += 1
+    return rendered
+
+
+@shared_task
+def render_invoice_pdfs(invoice_ids):
+    """Render (or re-render) one PDF file per invoice."""
+    for invoice in Invoice.objects.filter(pk__in=invoice_ids):
+        save_invoice_pdf(invoice)
+        invoice.save(update_fields=['pdf_file', 'updated_at'])
+    return len(invoice_ids)
+
+
+def queue_invoice_pdfs(invoice_ids):
+    """Fan per-file rendering out over the worker pool in chunks."""
+    invoice_ids = [str(pk) for pk in invoice_ids]
+    chunks = [
+        invoice_ids[start:start + PDF_RENDER_CHUNK]
+        for start in range(0, len(invoice_ids), PDF_RENDER_CHUNK)
+    ]
+    return group(render_invoice_pdfs.s(chunk) for chunk in chunks).apply_async()
+
+
+@shared_task(bind=True, base=JobTask)
+def render_merged_invoice_pdf(self, job_id, invoice_ids):
+    """Render many invoices into a single PDF result file."""
+    invoices = Invoice.objects.filter(pk__in=invoice_ids).order_by('invoice_number')
+    total = len(invoice_ids)
+    count = render_merged_pdf(
+        invoices.iterator(chunk_size=500),
+        self.save_result_file,
+        progress=lambda done: self.update_progress(done, total, 'Rendering invoices'),
+    )
+    return {'invoices': count}
+
+
+@shared_task
+def send_daily_summaries(reference_date=None):
+    """
+    Batch queued boletas into resúmenes diarios and submit them.
+
+    Without a reference date, every boleta issued before today is included.
+    """
+    boletas = Invoice.objects.filter(
+        invoice_type='boleta', status='queued', sunat_summary__isnull=True
+    )
+    if reference_date:
+        boletas = boletas.filter(issue_date=reference_date)
+    else:
+        boletas = boletas.filter(issue_date__lt=timezone.localdate())
+
+    rows = boletas.order_by('issue_date', 'invoice_number').values_list('pk', 'issue_date')
+    today = timezone.localdate()
+    summary_ids = []
+
+    with transaction.atomic():
+        for issue_date, day_rows in groupby(rows.iterator(), key=lambda row: row[1]):
+            day_ids = [pk for pk, _ in day_rows]
+            for start in range(0, len(day_ids), SUMMARY_MAX_LINES):
+                chunk = day_ids[start:start + SUMMARY_MAX_LINES]
+                summary = SunatSummary.objects.create(
+                    identifier=allocate_summary_identifier(today),
+                    reference_date=issue_date
+                )
+                Invoice.objects.filter(pk__in=chunk).update(
+                    sunat_summary=summary,
+                    status='sent',
+                    updated_at=timezone.now()
+                )
+                summary_ids.append(str(summary.pk))
+
+        transaction.on_commit(lambda: [
+            send_summary_to_sunat.delay(summary_id) for summary_id in summary_ids
+        ])
+
+    return len(summary_ids)
+
+
+def _fail_summary(summary, exc, attempts):
+    """
+    Give up on a summary and release its boletas to the queue, so the next
+    send_daily_summaries run batches them into a new summary.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        released = summary.invoices.filter(status='sent').update(
+            sunat_summary=None, status='queued', updated_at=now)
+        summary.status = 'failed'
+        summary.sunat_response = {
+            'last_error': str(exc),
+            'attempts': attempts,
+            'failed_at': now.isoformat(),
+            'released_invoices': released,
+        }
+        summary.save(update_fields=['status', 'sunat_response', 'updated_at'])
+
+
+@shared_task(bind=True, max_retries=None, acks_late=True)
+def send_summary_to_sunat(self, summary_id):
+    """
+    Submit a resumen diario and schedule polling of its ticket.
+
+    Once SUNAT_MAX_RETRIES is reached the summary becomes `failed` and its
+    boletas go back to the queue.
+    """
+    if _requeue_when_throttled(self, summary_id):
+        return None
+
+    summary = SunatSummary.objects.get(pk=summary_id)
+    if summary.status != 'pending':
+        return summary.status
+
+    try:
+        submit_summary(summary)
+    except TransientSunatError as exc:
+        if self.request.retries >= settings.SUNAT_MAX_RETRIES:
+            _fail_summary(summary, exc, self.request.retries + 1)
+            raise
+        raise self.retry(exc=exc, countdown=_backoff(self.request.retries))
+
+    if summary.status == 'sent':
+        poll_summary_status.apply_async(args=[summary_id], countdown=30)
+    return summary.status
+
+
+@shared_task(bind=True, max_retries=None, acks_late=True)
+def poll_summary_status(self, summary_id):
+    """Poll SUNAT for a summary ticket until it is processed."""
+    summary = SunatSummary.objects.get(pk=summary_id)
+    if summary.status != 'sent':
+        return summary.status
+
+    try:
+        response = get_transport().get_status(summary.ticket)
+    except TransientSunatError as exc:
+        raise self.retry(exc=exc, countdown=_backoff(min(self.request.retries, 6)))
+
+    if response.code == STATUS_IN_PROCESS:
+        raise self.retry(countdown=60)
+
+    resolve_summary(summary, response)
+    return summary.status
+
+
+@shared_task(bind=True, base=JobTask)
+def reconcile_bank_statement(self, job_id, statement_id):
+    """Reconcile an uploaded bank statement against pending deposits."""
+    statement = BankStatement.objects.get(pk=statement_id)
+    try:
+        return reconcile_statement(
+            statement,
+            user=self.job.created_by,
+            progress=lambda done, total: self.update_progress(done, total, 'Matching lines'),
+        )
+    except Exception:
+        BankStatement.objects.filter(pk=statement_id).update(
+            status='failed', updated_at=timezone.now())
+        raise
+
+
+@shared_task(bind=True, base=JobTask)
+def prepare_payables_run(self, job_id, run_id):
+    """Claim the due supplier costs of a run and write its payment file."""
+    run = PayablesRun.objects.get(pk=run_id)
+    try:
+        return prepare_run(run)
+    except Exception:
+        PayablesRun.objects.filter(pk=run_id).update(
+            status='failed', updated_at=timezone.now())
+        raise
+
+
+@shared_task
+def backfill_missing_base_amounts(currency):
+    """Convert rows that were written before a rate for `currency` existed."""
+    results = {}
+    for model in (GroupCost, AdditionalSale, Commission, Invoice, BankDeposit):
+        results[model._meta.model_name] = backfill_base_amounts(model, currency=currency)[0]
+    return results
@@ -8,7 +8,12 @@ from .views import (
     AdditionalSaleViewSet,
     CommissionViewSet,
     InvoiceViewSet,
-    BankDepositViewSet
+    InvoiceSeriesViewSet,
+    BankDepositViewSet,
+    BankStatementViewSet,
+    LedgerEntryViewSet,
+    PayablesRunViewSet,
+    AnalyticsView
 )
 
 router = DefaultRouter()
@@ -17,8 +22,15 @@ router.register(r'additional-sales', AdditionalSaleViewSet,
                 basename='additionalsale')
 router.register(r'commissions', CommissionViewSet, basename='commission')
 router.register(r'invoices', InvoiceViewSet, basename='invoice')
+router.register(r'invoice-series', InvoiceSeriesViewSet,
+                basename='invoiceseries')
 router.register(r'bank-deposits', BankDepositViewSet, basename='bankdeposit')
+router.register(r'bank-statements', BankStatementViewSet,
+                basename='bankstatement')
+router.register(r'ledger', LedgerEntryViewSet, basename='ledger')
+router.register(r'payables-runs', PayablesRunViewSet, basename='payablesrun')
 
 urlpatterns = [
+    path('analytics/', AnalyticsView.as_view(), name='financial-analytics'),
     path('', include(router.urls)),
 ]
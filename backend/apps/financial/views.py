@@ -1,24 +1,58 @@
 """
 Financial views.
 """
+import uuid
+
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.db import transaction
 from django.db.models import Sum, Q
 
+from core.common.jobs import enqueue_job, job_accepted_response
 from core.common.permissions import IsFinanceManager
-from .models import GroupCost, AdditionalSale, Commission, Invoice, BankDeposit
+from .models import (
+    GroupCost, AdditionalSale, Commission, Invoice, InvoiceSeries,
+    BankDeposit, BankStatement, LedgerEntry, GroupBalance,
+    PayablesRun
+)
 from .serializers import (
     GroupCostSerializer,
     AdditionalSaleSerializer,
     CommissionSerializer,
     InvoiceSerializer,
     InvoiceCreateSerializer,
-    BankDepositSerializer
+    GroupInvoicingSerializer,
+    RenderPdfsSerializer,
+    ReceivablesFilterSerializer,
+    InvoiceSeriesSerializer,
+    BankDepositSerializer,
+    BankStatementSerializer,
+    BankStatementLineSerializer,
+    LedgerEntrySerializer,
+    GroupBalanceSerializer,
+    PayablesRunSerializer,
+    AnalyticsSerializer
+)
+from .billing import invoice_group
+from .ledger import receivables_aging
+from .payables import (
+    aggregate_by_due_date, aggregate_by_supplier, mark_run_paid, release_run, unpaid_costs
+)
+from .rollups import series
+from .tasks import (
+    prepare_payables_run, queue_invoice_pdfs, reconcile_bank_statement,
+    render_merged_invoice_pdf, submit_invoice_to_sunat
 )
 
+# Invoices that can be (re)queued for SUNAT
+SUNAT_QUEUEABLE_STATUSES = ['issued', 'failed']
+
 
 class GroupCostViewSet(viewsets.ModelViewSet):
     """GroupCost ViewSet."""
@@ -28,7 +62,7 @@ class GroupCostViewSet(viewsets.ModelViewSet):
     permission_classes = [IsFinanceManager]
     filter_backends = [DjangoFilterBackend,
                        filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['group', 'supplier', 'cost_type', 'paid', 'currency']
+    filterset_fields = ['group', 'supplier', 'cost_type', 'paid', 'currency', 'payables_run']
     search_fields = ['description', 'invoice_number', 'group__code']
     ordering_fields = ['created_at', 'total_amount', 'payment_date']
     ordering = ['-created_at']
@@ -49,8 +83,12 @@ class GroupCostViewSet(viewsets.ModelViewSet):
         summary = queryset.aggregate(
             total_costs=Sum('total_amount'),
             paid_costs=Sum('total_amount', filter=Q(paid=True)),
-            pending_costs=Sum('total_amount', filter=Q(paid=False))
+            pending_costs=Sum('total_amount', filter=Q(paid=False)),
+            total_costs_base=Sum('base_currency_amount'),
+            paid_costs_base=Sum('base_currency_amount', filter=Q(paid=True)),
+            pending_costs_base=Sum('base_currency_amount', filter=Q(paid=False))
         )
+        summary['base_currency'] = settings.BASE_CURRENCY
 
         return Response(summary)
 
@@ -85,8 +123,12 @@ class AdditionalSaleViewSet(viewsets.ModelViewSet):
         summary = queryset.aggregate(
             total_sales=Sum('total_amount'),
             paid_sales=Sum('total_amount', filter=Q(paid=True)),
-            pending_sales=Sum('total_amount', filter=Q(paid=False))
+            pending_sales=Sum('total_amount', filter=Q(paid=False)),
+            total_sales_base=Sum('base_currency_amount'),
+            paid_sales_base=Sum('base_currency_amount', filter=Q(paid=True)),
+            pending_sales_base=Sum('base_currency_amount', filter=Q(paid=False))
         )
+        summary['base_currency'] = settings.BASE_CURRENCY
 
         return Response(summary)
 
@@ -148,31 +190,119 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             return InvoiceCreateSerializer
         return InvoiceSerializer
 
+    def _queue_for_sunat(self, queryset):
+        """
+        Move issued invoices (or ones whose submission failed) to the SUNAT
+        queue.
+
+        Facturas and notes are submitted individually by the sunat worker;
+        boletas wait for the nightly resumen diario.
+        """
+        with transaction.atomic():
+            invoices = list(
+                queryset.select_for_update()
+                .filter(status__in=SUNAT_QUEUEABLE_STATUSES)
+                .values_list('pk', 'invoice_type')
+            )
+            Invoice.objects.filter(pk__in=[pk for pk, _ in invoices]).update(
+                status='queued',
+                updated_at=timezone.now()
+            )
+            individual = [str(pk) for pk, invoice_type in invoices if invoice_type != 'boleta']
+            transaction.on_commit(lambda: [
+                submit_invoice_to_sunat.delay(invoice_id) for invoice_id in individual
+            ])
+        return len(invoices)
+
     @action(detail=True, methods=['post'])
     def send_to_sunat(self, request, pk=None):
-        """Send invoice to SUNAT (placeholder for integration)."""
+        """Queue an invoice for asynchronous submission to SUNAT."""
         invoice = self.get_object()
 
-        if invoice.status != 'issued':
+        if invoice.status not in SUNAT_QUEUEABLE_STATUSES:
             return Response(
-                {'error': 'Invoice must be in issued status to send to SUNAT'},
+                {'error': 'Invoice must be issued, or its submission failed, to send to SUNAT'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # TODO: Implement actual SUNAT integration
-        # For now, just update status
-        invoice.status = 'sent'
-        invoice.sunat_response = {
-            'sent_at': timezone.now().isoformat(),
-            'status': 'pending',
-            'message': 'Sent to SUNAT - awaiting response'
-        }
-        invoice.save()
+        self._queue_for_sunat(Invoice.objects.filter(pk=invoice.pk))
+        invoice.refresh_from_db()
 
         return Response({
-            'message': 'Invoice sent to SUNAT',
+            'message': 'Invoice queued for SUNAT',
             'invoice': InvoiceSerializer(invoice).data
-        })
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'])
+    def send_batch_to_sunat(self, request):
+        """Queue several issued invoices (or all of them) for SUNAT."""
+        invoice_ids = request.data.get('invoice_ids')
+        queryset = Invoice.objects.all()
+
+        if invoice_ids is not None:
+            try:
+                if not isinstance(invoice_ids, list):
+                    raise ValueError
+                invoice_ids = [uuid.UUID(str(invoice_id)) for invoice_id in invoice_ids]
+            except ValueError:
+                return Response(
+                    {'error': 'invoice_ids must be a list of invoice ids'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(pk__in=invoice_ids)
+
+        queued = self._queue_for_sunat(queryset)
+
+        return Response({
+            'message': f'{queued} invoices queued for SUNAT',
+            'queued': queued
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'])
+    def generate_for_group(self, request):
+        """Issue invoices for every confirmed passenger of a group."""
+        serializer = GroupInvoicingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = invoice_group(**serializer.validated_data)
+        invoices = result['invoices']
+
+        return Response({
+            'message': f'{len(invoices)} invoices issued',
+            'created': len(invoices),
+            'skipped': result['skipped'],
+            'invoice_numbers': [invoice.invoice_number for invoice in invoices]
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def render_pdfs(self, request):
+        """
+        Render invoice PDFs in the background.
+
+        With merge=true a single PDF is produced as a job result file;
+        otherwise each invoice gets its own pdf_file.
+        """
+        serializer = RenderPdfsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        invoice_ids = [
+            str(pk) for pk in self.get_queryset().filter(
+                pk__in=params['invoice_ids']).values_list('pk', flat=True)
+        ]
+
+        if params['merge']:
+            job = enqueue_job(
+                render_merged_invoice_pdf, 'render_invoice_pdf',
+                user=request.user, params={'invoice_ids': invoice_ids}
+            )
+            return job_accepted_response(job)
+
+        transaction.on_commit(lambda: queue_invoice_pdfs(invoice_ids))
+        return Response({
+            'message': f'{len(invoice_ids)} invoices queued for rendering',
+            'queued': len(invoice_ids)
+        }, status=status.HTTP_202_ACCEPTED)
 
     @action(detail=True, methods=['post'])
     def mark_paid(self, request, pk=None):
@@ -196,6 +326,18 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         return Response(InvoiceSerializer(invoice).data)
 
 
+class InvoiceSeriesViewSet(viewsets.ModelViewSet):
+    """InvoiceSeries ViewSet."""
+
+    queryset = InvoiceSeries.objects.all()
+    serializer_class = InvoiceSeriesSerializer
+    permission_classes = [IsFinanceManager]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['invoice_type', 'is_active']
+    ordering = ['series']
+    http_method_names = ['get', 'post', 'patch', 'head', 'options']
+
+
 class BankDepositViewSet(viewsets.ModelViewSet):
     """BankDeposit ViewSet."""
 
@@ -253,7 +395,267 @@ class BankDepositViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def pending(self, request):
-        """Get all pending deposits."""
-        queryset = self.get_queryset().filter(status='pending')
+        """Get pending deposits (paginated)."""
+        queryset = self.filter_queryset(self.get_queryset()).filter(status='pending')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
+
+
+class BankStatementViewSet(viewsets.ModelViewSet):
+    """
+    Bank statement imports.
+
+    Uploading a statement starts a reconciliation job; poll the returned job
+    and review the lines that were only suggested.
+    """
+
+    queryset = BankStatement.objects.select_related('uploaded_by').all()
+    serializer_class = BankStatementSerializer
+    permission_classes = [IsFinanceManager]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['status', 'file_format', 'bank_name']
+    ordering = ['-created_at']
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+
+    def create(self, request, *args, **kwargs):
+        """Upload a statement and reconcile it in the background."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        statement = serializer.save(uploaded_by=request.user, status='processing')
+
+        job = enqueue_job(
+            reconcile_bank_statement, 'reconcile_bank_statement',
+            user=request.user, params={'statement_id': str(statement.pk)}
+        )
+        return job_accepted_response(job, {'statement': serializer.data})
+
+    @action(detail=True, methods=['post'])
+    def reconcile(self, request, pk=None):
+        """Run reconciliation again (e.g. after registering missing deposits)."""
+        statement = self.get_object()
+
+        if statement.status == 'processing':
+            return Response(
+                {'error': 'Statement is already being reconciled'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        statement.status = 'processing'
+        statement.save(update_fields=['status', 'updated_at'])
+        job = enqueue_job(
+            reconcile_bank_statement, 'reconcile_bank_statement',
+            user=request.user, params={'statement_id': str(statement.pk)}
+        )
+        return job_accepted_response(job)
+
+    @action(detail=True, methods=['get'])
+    def lines(self, request, pk=None):
+        """Get statement lines, optionally filtered by match_status."""
+        statement = self.get_object()
+        queryset = statement.lines.select_related('deposit', 'invoice', 'passenger')
+
+        match_status = request.query_params.get('match_status')
+        if match_status:
+            queryset = queryset.filter(match_status=match_status)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = BankStatementLineSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = BankStatementLineSerializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class LedgerEntryViewSet(viewsets.ReadOnlyModelViewSet):
+    """Receivables ledger (read-only, append-only)."""
+
+    queryset = LedgerEntry.objects.all()
+    serializer_class = LedgerEntrySerializer
+    permission_classes = [IsFinanceManager]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['group', 'passenger', 'currency', 'entry_type', 'source_type']
+    ordering_fields = ['id', 'entry_date']
+    ordering = ['-id']
+
+    @action(detail=False, methods=['get'])
+    def aging(self, request):
+        """Receivables aging computed from the ledger."""
+        serializer = ReceivablesFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        report = receivables_aging(
+            as_of=params.get('as_of'),
+            group=params.get('group'),
+            currency=params.get('currency')
+        )
+        return Response(report)
+
+    @action(detail=False, methods=['get'])
+    def group_balances(self, request):
+        """Materialized balances per group and currency."""
+        serializer = ReceivablesFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        queryset = GroupBalance.objects.select_related('group').order_by('group__code', 'currency')
+        if params.get('group'):
+            queryset = queryset.filter(group_id=params['group'])
+        if params.get('currency'):
+            queryset = queryset.filter(currency=params['currency'])
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = GroupBalanceSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = GroupBalanceSerializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class PayablesRunViewSet(viewsets.ModelViewSet):
+    """
+    Supplier payables runs.
+
+    Creating a run claims the unpaid costs due by `due_through` and writes
+    the bank payment file in the background; once the bank has executed
+    the transfers, mark_paid settles every claimed cost at once.
+    """
+
+    queryset = PayablesRun.objects.select_related('created_by').all()
+    serializer_class = PayablesRunSerializer
+    permission_classes = [IsFinanceManager]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['status', 'currency']
+    ordering_fields = ['created_at', 'payment_date', 'total_amount']
+    ordering = ['-created_at']
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def create(self, request, *args, **kwargs):
+        """Start a run and prepare it in the background."""
+        data = request.data.copy()
+        today = timezone.localdate().isoformat()
+        data.setdefault('currency', settings.BASE_CURRENCY)
+        data.setdefault('due_through', today)
+        data.setdefault('payment_date', today)
+
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        run = serializer.save(created_by=request.user)
+
+        job = enqueue_job(
+            prepare_payables_run, 'prepare_payables_run',
+            user=request.user, params={'run_id': str(run.pk)}
+        )
+        return job_accepted_response(job, {'run': serializer.data})
+
+    @action(detail=False, methods=['get'])
+    def due(self, request):
+        """Unclaimed unpaid costs per supplier and due date."""
+        due_through = request.query_params.get('due_through')
+        if due_through and not parse_date(due_through):
+            return Response(
+                {'error': 'Invalid due_through date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = aggregate_by_due_date(unpaid_costs(
+            currency=request.query_params.get('currency'),
+            due_through=parse_date(due_through) if due_through else None,
+        ))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
+
+    @action(detail=True, methods=['get'])
+    def suppliers(self, request, pk=None):
+        """Transfers of a run, one per supplier."""
+        rows = aggregate_by_supplier(self.get_object())
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
+
+    @action(detail=True, methods=['post'])
+    def mark_paid(self, request, pk=None):
+        """Mark every cost of a prepared run as paid."""
+        run = self.get_object()
+
+        if run.status != 'ready':
+            return Response(
+                {'error': 'Only prepared runs can be marked as paid'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        payment_date = request.data.get('payment_date')
+        if payment_date and not parse_date(payment_date):
+            return Response(
+                {'error': 'Invalid payment_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        updated = mark_run_paid(run, parse_date(payment_date) if payment_date else None)
+        return Response({
+            'costs_paid': updated,
+            'run': self.get_serializer(run).data
+        })
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Cancel an unpaid run, releasing its costs for a later run."""
+        run = self.get_object()
+
+        if run.status in ('paid', 'cancelled', 'preparing'):
+            return Response(
+                {'error': f'Cannot cancel a {run.status} run'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        released = release_run(run)
+        return Response({
+            'costs_released': released,
+            'run': self.get_serializer(run).data
+        })
+
+
+class AnalyticsView(APIView):
+    """
+    Revenue and cost time series served from the daily rollups.
+
+    Query params:
+        metric: revenue (additional sales) or cost (group costs)
+        interval: day, week or month (default month)
+        start, end: Date range (default: last 12 months)
+        currency: Reporting currency (default USD)
+        group_by: program, category or currency (optional)
+        program, category, source_currency: Filters (optional)
+    """
+
+    permission_classes = [IsFinanceManager]
+
+    def get(self, request):
+        params = AnalyticsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        result = series(
+            data['metric'], data['interval'], data['start'], data['end'], data['currency'],
+            group_by=data.get('group_by'),
+            program=data.get('program'),
+            category=data.get('category'),
+            currency=data.get('source_currency'),
+        )
+
+        return Response({
+            'metric': data['metric'],
+            'interval': data['interval'],
+            'start': data['start'],
+            'end': data['end'],
+            'currency': data['currency'],
+            'group_by': data.get('group_by'),
+            **result
+        })
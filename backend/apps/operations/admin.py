@@ -2,14 +2,25 @@
 Admin configuration for operations app.
 """
 from django.contrib import admin
-from .models import Hotel, Transportation, Accommodation, SpecialService, Staff, StaffAssignment
+from .models import (
+    Hotel, Transportation, Accommodation, AccommodationOccupant, SpecialService, Staff,
+    StaffAssignment
+)
 
 
 class AccommodationInline(admin.TabularInline):
     """Inline accommodations for hotel admin."""
     model = Accommodation
     extra = 0
-    fields = ['room_number', 'room_type', 'passengers']
+    fields = ['room_number', 'room_type']
+    show_change_link = True
+
+
+class AccommodationOccupantInline(admin.TabularInline):
+    """Inline occupants for accommodation admin."""
+    model = AccommodationOccupant
+    extra = 0
+    raw_id_fields = ['passenger']
 
 
 @admin.register(Hotel)
@@ -47,6 +58,7 @@ class AccommodationAdmin(admin.ModelAdmin):
     list_filter = ['room_type']
     search_fields = ['hotel__hotel_name', 'room_number']
     ordering = ['hotel', 'room_number']
+    inlines = [AccommodationOccupantInline]
 
 
 @admin.register(SpecialService)
@@ -0,0 +1,41 @@
+"""
+Staff availability search.
+
+Busy staff are found through the GiST index of the
+staff_assignments_no_overlap exclusion constraint: the NOT EXISTS probe
+repeats its (staff, daterange) expression and its partial-index condition
+(cancelled assignments excluded) so Postgres can use it.
+"""
+from django.db.backends.postgresql.psycopg_any import DateRange as DateRangeValue
+from django.db.models import Exists, OuterRef
+
+from .models import Staff, StaffAssignment, assignment_period
+
+
+def busy_assignments(start_date, end_date):
+    """Non-cancelled assignments overlapping [start_date, end_date]."""
+    return StaffAssignment.objects.exclude(payment_status='cancelled').annotate(
+        period=assignment_period()
+    ).filter(period__overlap=DateRangeValue(start_date, end_date, '[]'))
+
+
+def available_staff(start_date, end_date, staff_type=None, languages=None, min_rating=None):
+    """
+    Active staff free for the whole window.
+
+    Args:
+        start_date, end_date: Inclusive window
+        staff_type: Optional staff type
+        languages: Language codes the staff member must all speak
+        min_rating: Optional minimum rating
+    """
+    queryset = Staff.objects.filter(status='active').exclude(
+        Exists(busy_assignments(start_date, end_date).filter(staff=OuterRef('pk')))
+    )
+    if staff_type:
+        queryset = queryset.filter(staff_type=staff_type)
+    if languages:
+        queryset = queryset.filter(languages__contains=list(languages))
+    if min_rating is not None:
+        queryset = queryset.filter(rating__gte=min_rating)
+    return queryset
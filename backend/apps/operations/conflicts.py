@@ -0,0 +1,195 @@
+"""
+Booking conflict and capacity checker.
+
+A season of groups is checked in bulk: each rule reads one table for every
+group at once. Rules that compare a row with its group (bus capacity,
+itinerary dates) are pure SQL filters; rules that compare rows with each
+other (overlapping hotel stays, pickups scheduled before the flight lands)
+read rows ordered by (group, time) and run an interval sweep in Python.
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import timedelta
+from itertools import groupby
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.circuits.models import Flight, Group, Itinerary, Passenger
+from .models import Hotel, Transportation
+
+# Time needed between landing and an airport pickup (baggage, immigration)
+MIN_CONNECTION = timedelta(minutes=45)
+# Pickups further than this from an arrival do not serve that flight
+ARRIVAL_WINDOW = timedelta(hours=3)
+AIRPORT_WORDS = ('airport', 'aeropuerto', 'aeroport')
+
+CHECKS = ['capacity', 'hotel_overlap', 'itinerary_dates', 'pickup_before_arrival']
+
+
+def _conflict(check, group_id, obj, pk, message, severity='error', **extra):
+    return {'check': check, 'severity': severity, 'group_id': str(group_id),
+            'object': obj, 'id': str(pk), 'message': message, **extra}
+
+
+def capacity_conflicts(group_ids):
+    """Transfers whose vehicle holds fewer seats than the group's passengers."""
+    passengers = Passenger.objects.filter(group=OuterRef('group')).exclude(
+        status='cancelled').order_by().values('group').annotate(
+        count=Count('pk')).values('count')
+    rows = Transportation.objects.filter(group_id__in=group_ids).exclude(
+        status='cancelled').annotate(
+        passengers=Coalesce(Subquery(passengers, output_field=IntegerField()), 0)
+    ).filter(capacity__lt=F('passengers')).values(
+        'pk', 'group_id', 'capacity', 'passengers', 'origin', 'destination', 'pickup_datetime')
+    for row in rows.iterator(chunk_size=1000):
+        yield _conflict(
+            'capacity', row['group_id'], 'transportation', row['pk'],
+            f"{row['capacity']} seats for {row['passengers']} passengers "
+            f"({row['origin']} to {row['destination']})",
+            at=timezone.localtime(row['pickup_datetime']).isoformat(),
+            missing_seats=row['passengers'] - row['capacity'])
+
+
+def itinerary_conflicts(group_ids):
+    """Itinerary days outside the group's start and end dates."""
+    rows = Itinerary.objects.filter(group_id__in=group_ids).filter(
+        Q(date__lt=F('group__start_date')) | Q(date__gt=F('group__end_date'))
+    ).values('pk', 'group_id', 'day_number', 'date', 'group__start_date', 'group__end_date')
+    for row in rows.iterator(chunk_size=1000):
+        yield _conflict(
+            'itinerary_dates', row['group_id'], 'itinerary', row['pk'],
+            f"Day {row['day_number']} ({row['date']}) is outside the group dates "
+            f"{row['group__start_date']} - {row['group__end_date']}",
+            severity='warning', at=row['date'].isoformat())
+
+
+def hotel_overlaps(group_ids):
+    """
+    Hotel bookings of a group whose [check-in, check-out) intervals overlap.
+
+    Bookings sharing city and check-in date are one stay split over several
+    bookings (see rooming) and are not reported against each other.
+    """
+    rows = Hotel.objects.filter(group_id__in=group_ids).exclude(status='cancelled').values(
+        'pk', 'group_id', 'hotel_name', 'city', 'check_in_date', 'check_out_date'
+    ).order_by('group_id', 'check_in_date', 'check_out_date')
+    for group_id, hotels in groupby(rows.iterator(chunk_size=1000), key=lambda row: row['group_id']):
+        active = []  # heap of (check_out_date, index, booking)
+        for index, hotel in enumerate(hotels):
+            while active and active[0][0] <= hotel['check_in_date']:
+                heapq.heappop(active)
+            for _, _, other in active:
+                if (other['city'], other['check_in_date']) == (hotel['city'], hotel['check_in_date']):
+                    continue
+                yield _conflict(
+                    'hotel_overlap', group_id, 'hotel', hotel['pk'],
+                    f"{hotel['hotel_name']} ({hotel['check_in_date']} - {hotel['check_out_date']}) "
+                    f"overlaps {other['hotel_name']} "
+                    f"({other['check_in_date']} - {other['check_out_date']})",
+                    at=hotel['check_in_date'].isoformat(), related_id=str(other['pk']))
+            heapq.heappush(active, (hotel['check_out_date'], index, hotel))
+
+
+def _serves(origin, flight):
+    """Whether a pickup origin is the arrival airport of a flight."""
+    origin = origin.lower()
+    airport = flight['arrival_airport'].lower()
+    if airport and airport in origin:
+        return True
+    return flight['arrival_city'].lower() in origin and any(
+        word in origin for word in AIRPORT_WORDS)
+
+
+def pickup_conflicts(group_ids):
+    """
+    Airport pickups scheduled before the flight they meet has landed.
+
+    Arrivals and pickups of a group are both read in time order; for each
+    pickup only arrivals at its airport within ARRIVAL_WINDOW are considered.
+    A pickup is fine when one of them has landed MIN_CONNECTION before it.
+    """
+    flights = Flight.objects.filter(group_id__in=group_ids).values(
+        'pk', 'group_id', 'airline', 'flight_number', 'arrival_airport', 'arrival_city',
+        'arrival_datetime'
+    ).order_by('group_id', 'arrival_datetime')
+    arrivals = {
+        group_id: list(rows)
+        for group_id, rows in groupby(flights.iterator(chunk_size=1000),
+                                      key=lambda row: row['group_id'])
+    }
+
+    pickups = Transportation.objects.filter(
+        group_id__in=list(arrivals)).exclude(status='cancelled').values(
+        'pk', 'group_id', 'origin', 'pickup_datetime'
+    ).order_by('group_id', 'pickup_datetime')
+    for group_id, rows in groupby(pickups.iterator(chunk_size=1000),
+                                  key=lambda row: row['group_id']):
+        group_arrivals = arrivals[group_id]
+        times = [flight['arrival_datetime'] for flight in group_arrivals]
+        for pickup in rows:
+            at = pickup['pickup_datetime']
+            window = group_arrivals[bisect_left(times, at - ARRIVAL_WINDOW):
+                                    bisect_right(times, at + ARRIVAL_WINDOW)]
+            candidates = [flight for flight in window if _serves(pickup['origin'], flight)]
+            if not candidates:
+                continue
+            if any(flight['arrival_datetime'] + MIN_CONNECTION <= at for flight in candidates):
+                continue
+            flight = candidates[0]
+            landed = timezone.localtime(flight['arrival_datetime'])
+            yield _conflict(
+                'pickup_before_arrival', group_id, 'transportation', pickup['pk'],
+                f"Pickup at {timezone.localtime(at):%Y-%m-%d %H:%M} but "
+                f"{flight['airline']} {flight['flight_number']} lands at "
+                f"{landed:%Y-%m-%d %H:%M}",
+                at=timezone.localtime(at).isoformat(), related_id=str(flight['pk']))
+
+
+RULES = {
+    'capacity': capacity_conflicts,
+    'hotel_overlap': hotel_overlaps,
+    'itinerary_dates': itinerary_conflicts,
+    'pickup_before_arrival': pickup_conflicts,
+}
+
+
+def season_groups(start_date, end_date, group_ids=None):
+    """Codes of non-cancelled groups running during [start_date, end_date], by id."""
+    groups = Group.objects.exclude(status='cancelled').filter(
+        start_date__lte=end_date, end_date__gte=start_date)
+    if group_ids:
+        groups = groups.filter(pk__in=group_ids)
+    return {str(pk): code for pk, code in groups.values_list('pk', 'code')}
+
+
+def find_conflicts(start_date, end_date, group_ids=None, checks=None):
+    """
+    Run the conflict rules over a season.
+
+    Args:
+        start_date, end_date: Inclusive window; groups overlapping it are checked
+        group_ids: Optional subset of groups
+        checks: Rule names (default: every rule in CHECKS)
+
+    Returns:
+        Dict with counts per rule and the conflicts ordered by group and time
+    """
+    codes = season_groups(start_date, end_date, group_ids)
+    conflicts = []
+    if codes:
+        for check in checks or CHECKS:
+            conflicts.extend(RULES[check](list(codes)))
+
+    for conflict in conflicts:
+        conflict['group_code'] = codes[conflict['group_id']]
+    conflicts.sort(key=lambda conflict: (conflict['group_code'], conflict['at']))
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'groups': len(codes),
+        'counts': dict(Counter(conflict['check'] for conflict in conflicts)),
+        'conflicts': conflicts,
+    }
@@ -0,0 +1,94 @@
+"""
+Payroll engine benchmark on a synthetic roster.
+"""
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.circuits.models import Group
+from apps.financial.currency import lookup_rate
+from apps.operations.models import Staff, StaffAssignment
+from apps.operations.payroll import compute_payroll, iter_months
+from apps.suppliers.models import ExchangeRate
+
+
+class Command(BaseCommand):
+    help = 'Compute monthly payroll over a synthetic roster (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--staff', type=int, default=2000)
+        parser.add_argument('--months', type=int, default=12)
+        parser.add_argument('--start', type=date.fromisoformat, default=date(2025, 1, 1),
+                            help='First payroll month (YYYY-MM-DD)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('The benchmark needs PostgreSQL')
+
+        groups = list(Group.objects.values_list('pk', flat=True)[:50])
+        if not groups:
+            raise CommandError('Create at least one group to attach assignments to')
+
+        rng = random.Random(options['seed'])
+        months = list(iter_months(options['start'], options['months']))
+        period_end = months[-1][1]
+
+        base = settings.BASE_CURRENCY
+        currencies = [base, base, base, 'USD'] if base != 'USD' else [base]
+
+        with transaction.atomic():
+            if lookup_rate('USD', base, options['start']) is None:
+                ExchangeRate.objects.create(
+                    from_currency='USD', to_currency=base,
+                    rate=Decimal('3.75'), date=options['start'])
+
+            started = time.perf_counter()
+            staff = Staff.objects.bulk_create([
+                Staff(
+                    first_name=f'Bench{index}', last_name='Payroll',
+                    staff_type=rng.choice(['guide', 'driver']),
+                    phone=f'9{index:08d}', rate_per_day=Decimal(rng.randint(80, 250)),
+                    currency=rng.choice(currencies),
+                )
+                for index in range(options['staff'])
+            ], batch_size=1000)
+
+            assignments = []
+            for member in staff:
+                day = options['start'] + timedelta(days=rng.randint(0, 3))
+                while day <= period_end:
+                    length = rng.randint(2, 8)
+                    end = day + timedelta(days=length - 1)
+                    assignments.append(StaffAssignment(
+                        group_id=rng.choice(groups), staff=member,
+                        start_date=day, end_date=end, role='Benchmark',
+                        daily_rate=member.rate_per_day,
+                        total_payment=member.rate_per_day * length,
+                        currency=member.currency,
+                    ))
+                    day = end + timedelta(days=rng.randint(1, 4))
+            StaffAssignment.objects.bulk_create(assignments, batch_size=5000)
+            setup = time.perf_counter() - started
+            self.stdout.write(
+                f'Seeded {len(staff)} staff, {len(assignments)} assignments in {setup:.1f}s')
+
+            timings = []
+            for first, last in months:
+                started = time.perf_counter()
+                rows = list(compute_payroll(first, last))
+                timings.append(time.perf_counter() - started)
+                self.stdout.write(
+                    f'{first:%Y-%m}: {len(rows)} staff, {timings[-1] * 1000:.0f} ms')
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'Median month:       {statistics.median(timings) * 1000:.0f} ms')
+        self.stdout.write(f'Slowest month:      {max(timings) * 1000:.0f} ms')
+        self.stdout.write(self.style.SUCCESS('Synthetic roster rolled back'))
@@ -0,0 +1,183 @@
+"""
+Daily operations manifest across all running groups.
+
+Every source table is queried once for the window, restricted to the ids of
+confirmed and in-progress groups so the (group, date) indexes apply. Each
+query is ordered by (city, supplier, time); the streams are merged with a
+k-way merge and grouped on the fly, so the response can be streamed as
+JSON or CSV without building it in memory.
+"""
+import csv
+import heapq
+import io
+import json
+from datetime import datetime, time, timedelta
+from itertools import groupby
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Collate
+from django.utils import timezone
+
+from apps.circuits.models import Flight, Group
+from .models import Hotel, SpecialService, Transportation
+
+ACTIVE_GROUP_STATUSES = ['confirmed', 'in_progress']
+TRANSPORT_TYPES = dict(Transportation.TRANSPORT_TYPE_CHOICES)
+
+CSV_FIELDS = [
+    'city', 'supplier', 'at', 'type', 'group_code', 'group_name', 'passengers',
+    'title', 'reference', 'notes',
+]
+
+
+def _window(start_date, days):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    return start, start + timedelta(days=days)
+
+
+def _ordered(field):
+    """SQL sort expression matching Python str ordering (NULL as '')."""
+    return Collate(Coalesce(F(field), Value('')), 'C')
+
+
+def _sort_key(entry):
+    return (entry['city'], entry['supplier'], entry['at'])
+
+
+def _entries(queryset, build):
+    for row in queryset.iterator(chunk_size=500):
+        yield build(row)
+
+
+def _streams(group_ids, start_date, days):
+    """One (city, supplier, time)-ordered entry iterator per source."""
+    start, end = _window(start_date, days)
+    last_date = start_date + timedelta(days=days - 1)
+    common = ('group__code', 'group__name', 'group__current_passengers')
+
+    def base(row, city, supplier, at, kind, title, reference='', notes=''):
+        return {
+            'city': city or '', 'supplier': supplier or '', 'at': at, 'type': kind,
+            'group_code': row['group__code'], 'group_name': row['group__name'],
+            'passengers': row['group__current_passengers'], 'title': title,
+            'reference': reference or '', 'notes': notes or '',
+        }
+
+    pickups = Transportation.objects.filter(
+        group_id__in=group_ids, pickup_datetime__gte=start, pickup_datetime__lt=end
+    ).exclude(status='cancelled').values(
+        *common, 'origin', 'destination', 'pickup_datetime', 'transport_type',
+        'vehicle_description', 'driver_name', 'driver_phone', 'booking_reference',
+        supplier_name=F('supplier__name'),
+    ).order_by(_ordered('origin'), _ordered('supplier__name'), 'pickup_datetime')
+    yield _entries(pickups, lambda row: base(
+        row, row['origin'], row['supplier_name'], row['pickup_datetime'], 'pickup',
+        f"{TRANSPORT_TYPES.get(row['transport_type'], row['transport_type'])} to "
+        f"{row['destination']}", row['booking_reference'],
+        ' '.join(filter(None, [row['vehicle_description'], row['driver_name'],
+                               row['driver_phone']]))))
+
+    departures = Flight.objects.filter(
+        group_id__in=group_ids, departure_datetime__gte=start, departure_datetime__lt=end
+    ).values(
+        *common, 'departure_city', 'airline', 'flight_number', 'departure_airport',
+        'arrival_city', 'departure_datetime', 'booking_reference',
+    ).order_by(_ordered('departure_city'), _ordered('airline'), 'departure_datetime')
+    yield _entries(departures, lambda row: base(
+        row, row['departure_city'], row['airline'], row['departure_datetime'],
+        'flight_departure', f"{row['flight_number']} to {row['arrival_city']}",
+        row['booking_reference'], row['departure_airport']))
+
+    arrivals = Flight.objects.filter(
+        group_id__in=group_ids, arrival_datetime__gte=start, arrival_datetime__lt=end
+    ).values(
+        *common, 'arrival_city', 'airline', 'flight_number', 'arrival_airport',
+        'departure_city', 'arrival_datetime', 'booking_reference',
+    ).order_by(_ordered('arrival_city'), _ordered('airline'), 'arrival_datetime')
+    yield _entries(arrivals, lambda row: base(
+        row, row['arrival_city'], row['airline'], row['arrival_datetime'],
+        'flight_arrival', f"{row['flight_number']} from {row['departure_city']}",
+        row['booking_reference'], row['arrival_airport']))
+
+    check_ins = Hotel.objects.filter(
+        group_id__in=group_ids, check_in_date__gte=start_date, check_in_date__lte=last_date
+    ).exclude(status='cancelled').values(
+        *common, 'city', 'hotel_name', 'check_in_date', 'nights', 'number_of_rooms',
+        'booking_reference',
+    ).order_by(_ordered('city'), _ordered('hotel_name'), 'check_in_date')
+    yield _entries(check_ins, lambda row: base(
+        row, row['city'], row['hotel_name'],
+        timezone.make_aware(datetime.combine(row['check_in_date'], time.min)),
+        'hotel_check_in', f"{row['number_of_rooms']} rooms, {row['nights']} nights",
+        row['booking_reference']))
+
+    services = SpecialService.objects.filter(
+        group_id__in=group_ids, service_date__gte=start_date, service_date__lte=last_date
+    ).exclude(status='cancelled').values(
+        *common, 'location', 'name', 'service_date', 'start_time', 'number_of_people',
+        'booking_reference', supplier_name=F('supplier__name'),
+    ).order_by(_ordered('location'), _ordered('supplier__name'), 'service_date',
+               F('start_time').asc(nulls_first=True))
+    yield _entries(services, lambda row: base(
+        row, row['location'], row['supplier_name'],
+        timezone.make_aware(datetime.combine(row['service_date'], row['start_time'] or time.min)),
+        'service', f"{row['name']} ({row['number_of_people']} pax)",
+        row['booking_reference']))
+
+
+def manifest_sections(start_date, days=2):
+    """
+    Yield (city, supplier, entries) sections of the manifest.
+
+    Args:
+        start_date: First local day
+        days: Number of days covered (default: today and tomorrow)
+    """
+    group_ids = list(Group.objects.filter(
+        status__in=ACTIVE_GROUP_STATUSES,
+        start_date__lte=start_date + timedelta(days=days), end_date__gte=start_date,
+    ).values_list('pk', flat=True))
+    if not group_ids:
+        return
+
+    entries = heapq.merge(*_streams(group_ids, start_date, days), key=_sort_key)
+    for (city, supplier), section in groupby(
+        entries, key=lambda entry: (entry['city'], entry['supplier'])
+    ):
+        yield city, supplier, list(section)
+
+
+def _localize(entry):
+    return {**entry, 'at': timezone.localtime(entry['at']).isoformat()}
+
+
+def iter_manifest_json(start_date, days=2):
+    """Manifest as chunks of a JSON document."""
+    yield json.dumps({'start_date': start_date, 'days': days}, cls=DjangoJSONEncoder)[:-1]
+    yield ', "sections": ['
+    for index, (city, supplier, entries) in enumerate(manifest_sections(start_date, days)):
+        section = {'city': city, 'supplier': supplier,
+                   'entries': [_localize(entry) for entry in entries]}
+        yield (',' if index else '') + json.dumps(section, cls=DjangoJSONEncoder)
+    yield ']}'
+
+
+def iter_manifest_csv(start_date, days=2):
+    """Manifest as CSV lines, one row per entry."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writeheader()
+    yield flush()
+    for _, _, entries in manifest_sections(start_date, days):
+        for entry in entries:
+            writer.writerow(_localize(entry))
+        yield flush()
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='staffassignment',
+            name='paid_through',
+            field=models.DateField(blank=True, help_text='Last day already paid by payroll', null=True),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:00
+
+import apps.operations.models
+import django.contrib.postgres.constraints
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Q
+
+
+def resolve_overlaps(apps, schema_editor):
+    """
+    Clear the overlaps the exclusion constraint would reject.
+
+    Per staff member, assignments that are paid or partly paid are kept
+    first, then the others by creation date. An unpaid assignment that
+    overlaps a kept one is cancelled with a note; if two paid ones overlap,
+    the migration stops and lists them so they can be fixed by hand.
+    """
+    StaffAssignment = apps.get_model('operations', 'StaffAssignment')
+    active = StaffAssignment.objects.exclude(payment_status='cancelled')
+    overlapping = active.annotate(overlaps=Exists(active.filter(
+        staff=OuterRef('staff'),
+        start_date__lte=OuterRef('end_date'),
+        end_date__gte=OuterRef('start_date'),
+    ).exclude(pk=OuterRef('pk')))).filter(overlaps=True).select_related('group')
+
+    by_staff = {}
+    for assignment in overlapping.order_by('staff_id', 'created_at', 'pk'):
+        by_staff.setdefault(assignment.staff_id, []).append(assignment)
+
+    cancelled = []
+    conflicts = []
+    for assignments in by_staff.values():
+        kept = []
+        assignments.sort(key=lambda item: item.payment_status != 'paid' and item.paid_through is None)
+        for assignment in assignments:
+            clash = next((other for other in kept
+                          if other.start_date <= assignment.end_date
+                          and other.end_date >= assignment.start_date), None)
+            if clash is None:
+                kept.append(assignment)
+            elif assignment.payment_status == 'paid' or assignment.paid_through is not None:
+                conflicts.append((assignment, clash))
+            else:
+                assignment.payment_status = 'cancelled'
+                assignment.notes = '\n'.join(filter(None, [
+                    assignment.notes,
+                    f'Cancelled when overlapping assignments were disallowed: '
+                    f'overlaps {clash.group.code} ({clash.start_date} - {clash.end_date}).',
+                ]))
+                cancelled.append(assignment)
+
+    if conflicts:
+        raise RuntimeError(
+            'Overlapping paid staff assignments must be fixed before migrating:\n' + '\n'.join(
+                f'  staff {assignment.staff_id}: {assignment.pk} {assignment.group.code} '
+                f'({assignment.start_date} - {assignment.end_date}) overlaps {clash.pk} '
+                f'{clash.group.code} ({clash.start_date} - {clash.end_date})'
+                for assignment, clash in conflicts))
+    StaffAssignment.objects.bulk_update(cancelled, ['payment_status', 'notes'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circuits', '0002_passenger_search_vector'),
+        ('operations', '0002_staff_assignment_paid_through'),
+    ]
+
+    operations = [
+        # Needed to combine the staff uuid (=) with the range (&&) in one GiST index
+        BtreeGistExtension(),
+        migrations.AddIndex(
+            model_name='staff',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['languages'], name='staff_languages_gin'),
+        ),
+        migrations.RunPython(resolve_overlaps, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='staffassignment',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('payment_status', 'cancelled'), _negated=True), expressions=[('staff', '='), (apps.operations.models.DateRange('start_date', 'end_date', models.Value('[]')), '&&')], name='staff_assignments_no_overlap', violation_error_message='Staff member already has an assignment in this period.'),
+        ),
+    ]
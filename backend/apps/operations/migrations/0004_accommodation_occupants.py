@@ -0,0 +1,105 @@
+# Generated by Django 5.0.14 on 2026-10-19 19:04
+
+import uuid
+from itertools import groupby
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def _as_uuid(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def json_to_occupants(apps, schema_editor):
+    """Copy Accommodation.passengers JSON arrays into AccommodationOccupant."""
+    Accommodation = apps.get_model('operations', 'Accommodation')
+    AccommodationOccupant = apps.get_model('operations', 'AccommodationOccupant')
+    Passenger = apps.get_model('circuits', 'Passenger')
+
+    def flush(pairs):
+        known = set(Passenger.objects.filter(
+            pk__in={passenger_id for _, passenger_id in pairs}
+        ).values_list('pk', flat=True))
+        # Ids of deleted passengers are dropped
+        AccommodationOccupant.objects.bulk_create(
+            [AccommodationOccupant(accommodation_id=accommodation_id, passenger_id=passenger_id)
+             for accommodation_id, passenger_id in pairs if passenger_id in known],
+            ignore_conflicts=True,
+        )
+
+    pairs = []
+    rows = Accommodation.objects.exclude(passengers=[]).values_list('pk', 'passengers')
+    for accommodation_id, passengers in rows.iterator(chunk_size=BATCH_SIZE):
+        for value in passengers or []:
+            passenger_id = _as_uuid(value)
+            if passenger_id:
+                pairs.append((accommodation_id, passenger_id))
+        if len(pairs) >= BATCH_SIZE:
+            flush(pairs)
+            pairs = []
+    if pairs:
+        flush(pairs)
+
+
+def occupants_to_json(apps, schema_editor):
+    """Rebuild the JSON arrays from AccommodationOccupant."""
+    Accommodation = apps.get_model('operations', 'Accommodation')
+    AccommodationOccupant = apps.get_model('operations', 'AccommodationOccupant')
+
+    rows = AccommodationOccupant.objects.order_by('accommodation_id', 'id').values_list(
+        'accommodation_id', 'passenger_id')
+    batch = []
+    for accommodation_id, occupants in groupby(rows.iterator(chunk_size=BATCH_SIZE),
+                                               key=lambda row: row[0]):
+        batch.append(Accommodation(
+            pk=accommodation_id,
+            passengers=[str(passenger_id) for _, passenger_id in occupants]))
+        if len(batch) >= BATCH_SIZE:
+            Accommodation.objects.bulk_update(batch, ['passengers'])
+            batch = []
+    if batch:
+        Accommodation.objects.bulk_update(batch, ['passengers'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('circuits', '0002_passenger_search_vector'),
+        ('operations', '0003_staff_availability'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccommodationOccupant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('accommodation', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='occupants', to='operations.accommodation')),
+                ('passenger', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='room_assignments', to='circuits.passenger')),
+            ],
+            options={
+                'verbose_name': 'Accommodation Occupant',
+                'verbose_name_plural': 'Accommodation Occupants',
+                'db_table': 'accommodation_occupants',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='accommodationoccupant',
+            constraint=models.UniqueConstraint(fields=('accommodation', 'passenger'), name='accommodation_occupants_unique'),
+        ),
+        migrations.RunPython(json_to_occupants, occupants_to_json),
+        migrations.RemoveField(
+            model_name='accommodation',
+            name='passengers',
+        ),
+        migrations.AddField(
+            model_name='accommodation',
+            name='passengers',
+            field=models.ManyToManyField(blank=True, related_name='accommodations', through='operations.AccommodationOccupant', to='circuits.passenger'),
+        ),
+    ]
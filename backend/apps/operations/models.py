@@ -1,14 +1,30 @@
 """
-Operations models: Hotel, Transportation, Accommodation, SpecialService, Staff, StaffAssignment.
+Operations models: Hotel, Transportation, Accommodation, AccommodationOccupant,
+SpecialService, Staff, StaffAssignment.
 """
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.core.validators import MinValueValidator
 from core.common.models import TimeStampedModel
-from apps.circuits.models import Group
+from apps.circuits.models import Group, Passenger
 from apps.suppliers.models import Supplier
 from apps.authentication.models import User
 
 
+class DateRange(models.Func):
+    """daterange(lower, upper, bounds) constructor."""
+
+    function = 'daterange'
+    output_field = DateRangeField()
+
+
+def assignment_period(start='start_date', end='end_date'):
+    """Inclusive date range of an assignment (matches the exclusion index)."""
+    return DateRange(start, end, models.Value('[]'))
+
+
 class Hotel(TimeStampedModel):
     """Hotel bookings for groups."""
 
@@ -155,9 +171,13 @@ class Accommodation(TimeStampedModel):
     room_number = models.CharField(max_length=20, blank=True)
     room_type = models.CharField(max_length=20, choices=ROOM_TYPE_CHOICES)
 
-    # Passengers (JSON array of passenger IDs)
-    passengers = models.JSONField(
-        default=list, help_text='Array of passenger IDs')
+    # Occupants
+    passengers = models.ManyToManyField(
+        Passenger,
+        through='AccommodationOccupant',
+        related_name='accommodations',
+        blank=True
+    )
 
     # Special requests
     special_requests = models.TextField(blank=True)
@@ -176,6 +196,33 @@ class Accommodation(TimeStampedModel):
         return f"{self.hotel.hotel_name} - Room {self.room_number or 'TBA'}"
 
 
+class AccommodationOccupant(models.Model):
+    """Passenger sleeping in an accommodation (room)."""
+
+    accommodation = models.ForeignKey(
+        Accommodation,
+        on_delete=models.CASCADE,
+        related_name='occupants',
+        # Covered by the unique (accommodation, passenger) index
+        db_index=False
+    )
+    passenger = models.ForeignKey(
+        Passenger, on_delete=models.CASCADE, related_name='room_assignments')
+
+    class Meta:
+        db_table = 'accommodation_occupants'
+        verbose_name = 'Accommodation Occupant'
+        verbose_name_plural = 'Accommodation Occupants'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['accommodation', 'passenger'],
+                name='accommodation_occupants_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.passenger_id} in {self.accommodation_id}"
+
+
 class SpecialService(TimeStampedModel):
     """Special services/activities for groups."""
 
@@ -308,6 +355,7 @@ class Staff(TimeStampedModel):
         indexes = [
             models.Index(fields=['staff_type', 'status']),
             models.Index(fields=['phone']),
+            GinIndex(fields=['languages'], name='staff_languages_gin'),
         ]
 
     def __str__(self):
@@ -348,6 +396,8 @@ class StaffAssignment(TimeStampedModel):
         ],
         default='pending'
     )
+    paid_through = models.DateField(
+        null=True, blank=True, help_text='Last day already paid by payroll')
 
     # Notes
     notes = models.TextField(blank=True)
@@ -362,6 +412,19 @@ class StaffAssignment(TimeStampedModel):
             models.Index(fields=['staff', 'start_date']),
             models.Index(fields=['payment_status']),
         ]
+        constraints = [
+            # A staff member cannot work two groups on the same day; the
+            # GiST index behind it also serves availability searches
+            ExclusionConstraint(
+                name='staff_assignments_no_overlap',
+                expressions=[
+                    ('staff', RangeOperators.EQUAL),
+                    (assignment_period(), RangeOperators.OVERLAPS),
+                ],
+                condition=~models.Q(payment_status='cancelled'),
+                violation_error_message='Staff member already has an assignment in this period.',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.staff.full_name} - {self.group.code}"
@@ -0,0 +1,176 @@
+"""
+Staff payroll over StaffAssignment.
+
+An assignment is paid for the days it overlaps the payroll period, pro-rated
+from its total_payment (total_payment * days in period / assignment days),
+so assignments spanning two months are split between both payrolls.
+paid_through records the last day already paid, which makes closing a
+period idempotent; periods must therefore be closed in order, and closing
+one is refused while an assignment it covers still has unpaid days before
+it. Amounts are converted to the payroll currency with one
+rate per currency (latest ExchangeRate on or before the period end). The
+whole roster is computed by a single aggregated query.
+"""
+import calendar
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case, CharField, Count, DateField, DecimalField, ExpressionWrapper, F, Func,
+    IntegerField, Min, Sum, Value, When
+)
+from django.db.models.functions import Coalesce, Greatest, Least, Round
+from django.utils import timezone
+
+from apps.financial.currency import lookup_rate
+from .models import StaffAssignment
+
+PAYROLL_STAFF_TYPES = ['guide', 'driver']
+
+EXPORT_FIELDS = [
+    'staff_id', 'last_name', 'first_name', 'staff_type',
+    'assignments', 'days', 'amount', 'currency',
+]
+
+
+class MissingExchangeRate(Exception):
+    """No rate is known to convert an assignment currency."""
+
+
+class EarlierPeriodUnpaid(Exception):
+    """An earlier period has to be closed first."""
+
+
+class InclusiveDays(Func):
+    """Days from the second date to the first, both included (date - date + 1)."""
+
+    arg_joiner = ' - '
+    template = '(%(expressions)s + 1)'
+    output_field = IntegerField()
+
+
+def month_period(value):
+    """First and last day of a 'YYYY-MM' month."""
+    year, month = (int(part) for part in value.split('-'))
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def payable_assignments(period_start, period_end, staff_types=None):
+    """
+    Pending assignments overlapping a period, annotated with their first
+    unpaid day and the days and amount (in the assignment currency) that
+    fall in the period.
+    """
+    first_unpaid = Coalesce(
+        ExpressionWrapper(F('paid_through') + 1, output_field=DateField()),
+        F('start_date'),
+    )
+    lower = Greatest(F('start_date'), Value(period_start), first_unpaid)
+    upper = Least(F('end_date'), Value(period_end))
+
+    return StaffAssignment.objects.filter(
+        payment_status='pending',
+        staff__staff_type__in=staff_types or PAYROLL_STAFF_TYPES,
+        start_date__lte=period_end,
+        end_date__gte=period_start,
+    ).annotate(
+        first_unpaid=first_unpaid,
+        period_first=lower,
+        period_last=upper,
+    ).filter(
+        period_first__lte=F('period_last'),
+    ).annotate(
+        days=InclusiveDays(F('period_last'), F('period_first')),
+        period_amount=ExpressionWrapper(
+            F('total_payment') * InclusiveDays(F('period_last'), F('period_first'))
+            / InclusiveDays(F('end_date'), F('start_date')),
+            output_field=DecimalField(max_digits=14, decimal_places=4),
+        ),
+    )
+
+
+def conversion_rates(queryset, currency, on_date):
+    """Rate of every assignment currency in a queryset to `currency`."""
+    rates = {}
+    missing = []
+    for assignment_currency in queryset.order_by().values_list('currency', flat=True).distinct():
+        rate = lookup_rate(assignment_currency, currency, on_date)
+        if rate is None:
+            missing.append(assignment_currency)
+        rates[assignment_currency] = rate
+    if missing:
+        raise MissingExchangeRate(
+            f"No exchange rate to {currency} on {on_date} for: {', '.join(missing)}")
+    return rates
+
+
+def compute_payroll(period_start, period_end, staff_types=None, currency=None):
+    """
+    Payroll of the whole roster for a period, one row per staff member.
+
+    Returns:
+        Values queryset with staff_id, last_name, first_name, staff_type,
+        assignments, days and amount (in `currency`)
+    """
+    currency = currency or settings.BASE_CURRENCY
+    assignments = payable_assignments(period_start, period_end, staff_types)
+    rates = conversion_rates(assignments, currency, min(period_end, timezone.localdate()))
+
+    rate = Case(
+        *[When(currency=code, then=Value(value)) for code, value in rates.items()],
+        output_field=DecimalField(max_digits=12, decimal_places=6),
+    )
+    return assignments.order_by().values('staff_id').annotate(
+        last_name=F('staff__last_name'),
+        first_name=F('staff__first_name'),
+        staff_type=F('staff__staff_type'),
+        assignments=Count('id'),
+        days=Sum('days'),
+        amount=Round(Sum(F('period_amount') * rate), 2),
+        currency=Value(currency, output_field=CharField()),
+    ).order_by('last_name', 'first_name')
+
+
+def close_payroll(period_start, period_end, staff_types=None):
+    """
+    Mark the paid part of every payable assignment with one bulk UPDATE.
+
+    Assignments ending within the period become `paid`; the others keep
+    `pending` with paid_through at the period end.
+
+    Raises:
+        EarlierPeriodUnpaid: an assignment has unpaid days before the
+            period, which moving paid_through past them would skip
+
+    Returns:
+        Number of assignments updated
+    """
+    selection = payable_assignments(period_start, period_end, staff_types)
+    with transaction.atomic():
+        # Lock first so a concurrent close of the earlier period is seen
+        list(StaffAssignment.objects.select_for_update().filter(
+            pk__in=selection.values('pk')).values_list('pk', flat=True))
+        backlog = selection.filter(first_unpaid__lt=period_start).aggregate(
+            count=Count('id'), earliest=Min('first_unpaid'))
+        if backlog['count']:
+            raise EarlierPeriodUnpaid(
+                f"{backlog['count']} assignment(s) have unpaid days from "
+                f"{backlog['earliest']}; close the earlier period first")
+        return StaffAssignment.objects.filter(pk__in=selection.values('pk')).update(
+            paid_through=Least(F('end_date'), Value(period_end)),
+            payment_status=Case(
+                When(end_date__lte=period_end, then=Value('paid')),
+                default=Value('pending'),
+            ),
+            updated_at=timezone.now(),
+        )
+
+
+def iter_months(start, count):
+    """(first, last) day of `count` consecutive months from `start`'s month."""
+    first = start.replace(day=1)
+    for _ in range(count):
+        last = first.replace(day=calendar.monthrange(first.year, first.month)[1])
+        yield first, last
+        first = last + timedelta(days=1)
@@ -0,0 +1,323 @@
+"""
+Rooming list engine.
+
+Passengers are first grouped into parties: travellers sharing an email,
+phone or emergency contact (and minors with an adult of the same last
+name) always room together. Parties are split into triples and doubles,
+each room holding a minor also holding one of the party's adults;
+solo travellers are paired with someone of the same gender in twins (minors
+only with other minors), and an odd traveller joins a triple instead of
+paying a single supplement.
+The group leader and anyone asking for a single room ("single",
+"individual" in special_requirements) get a single. The same room plan is
+used for every stay (hotel bookings sharing check-in date and city) and
+spread over that stay's bookings within their number_of_rooms.
+"""
+import re
+from collections import defaultdict, namedtuple
+from itertools import groupby
+
+from django.db import transaction
+
+from apps.circuits.models import Passenger
+from .models import Accommodation, AccommodationOccupant, Hotel
+
+SINGLE_REQUEST_RE = re.compile(r'\b(single|individual|sgl)\b', re.IGNORECASE)
+ADULT_AGE = 18
+# Hints shared by more travellers (an agency phone...) do not define a party;
+# family hints are only given to one adult and their minors, so never capped
+MAX_PARTY_SIZE = 6
+FAMILY_HINT = 'family'
+
+Traveller = namedtuple(
+    'Traveller', ['id', 'gender', 'is_leader', 'last_name', 'minor', 'wants_single', 'requirements'])
+Room = namedtuple('Room', ['room_type', 'occupants'])
+
+
+class RoomingError(Exception):
+    """The bookings cannot hold the room plan."""
+
+
+def _find(parents, item):
+    while parents[item] != item:
+        parents[item] = parents[parents[item]]
+        item = parents[item]
+    return item
+
+
+def build_parties(travellers, hints):
+    """
+    Union travellers sharing a hint into parties.
+
+    Args:
+        travellers: List of Traveller
+        hints: traveller id -> iterable of hashable hints (email, phone...)
+    """
+    shared = defaultdict(int)
+    for traveller in travellers:
+        for hint in set(hints.get(traveller.id, ())):
+            shared[hint] += 1
+
+    parents = {traveller.id: traveller.id for traveller in travellers}
+    owners = {}
+    for traveller in travellers:
+        for hint in set(hints.get(traveller.id, ())):
+            if shared[hint] > MAX_PARTY_SIZE and hint[0] != FAMILY_HINT:
+                continue
+            if hint in owners:
+                parents[_find(parents, traveller.id)] = _find(parents, owners[hint])
+            else:
+                owners[hint] = traveller.id
+
+    parties = defaultdict(list)
+    for traveller in travellers:
+        parties[_find(parents, traveller.id)].append(traveller)
+    return list(parties.values())
+
+
+def _party_rooms(party):
+    """
+    Triples and doubles for a party of two or more.
+
+    Minors fill as few rooms as possible, each with one of the party's
+    adults; only when the party has too few adults do minors share a room
+    without one.
+    """
+    members = sorted(party, key=lambda traveller: traveller.gender)
+    adults = [traveller for traveller in members if not traveller.minor]
+    minors = [traveller for traveller in members if traveller.minor]
+
+    sizes = [3] * (len(party) // 3)
+    remainder = len(party) % 3
+    if remainder == 2:
+        sizes.append(2)
+    elif remainder == 1:
+        # 4 = 2 + 2 rather than 3 + 1
+        sizes[-1:] = [2, 2]
+
+    # Triples come first, so they take the minors two at a time
+    minor_rooms = []
+    unplaced = len(minors)
+    for index, size in enumerate(sizes):
+        if unplaced <= 0:
+            break
+        minor_rooms.append(index)
+        unplaced -= size - 1
+
+    occupants = [[] for _ in sizes]
+    for index in minor_rooms:
+        if adults:
+            occupants[index].append(adults.pop(0))
+    for index in minor_rooms:
+        free = sizes[index] - len(occupants[index])
+        occupants[index].extend(minors[:free])
+        minors = minors[free:]
+    rest = adults + minors
+    for index, size in enumerate(sizes):
+        free = size - len(occupants[index])
+        occupants[index].extend(rest[:free])
+        rest = rest[free:]
+
+    rooms = []
+    for room_occupants in occupants:
+        if len(room_occupants) == 3:
+            room_type = 'triple'
+        elif len({traveller.gender for traveller in room_occupants}) > 1 \
+                and not any(traveller.minor for traveller in room_occupants):
+            room_type = 'double'
+        else:
+            room_type = 'twin'
+        rooms.append(Room(room_type, room_occupants))
+    return rooms
+
+
+def _solo_key(traveller):
+    return traveller.minor, traveller.gender
+
+
+def _solo_rooms(solos, prefer_triples=False):
+    """
+    Same-gender twins (or triples), a triple absorbing an odd traveller.
+    Minors travelling without family never share with an adult.
+    """
+    rooms = []
+    size = 3 if prefer_triples else 2
+    for _, members in groupby(sorted(solos, key=_solo_key), key=_solo_key):
+        members = list(members)
+        gender_rooms = [members[start:start + size] for start in range(0, len(members), size)]
+        if len(gender_rooms) > 1 and len(gender_rooms[-1]) == 1:
+            # Never leave one traveller alone: 2 + 1 -> 3, 3 + 1 -> 2 + 2
+            combined = gender_rooms.pop(-2) + gender_rooms.pop()
+            gender_rooms.extend([combined] if len(combined) == 3 else [combined[:2], combined[2:]])
+        rooms.extend(
+            Room({1: 'single', 2: 'twin', 3: 'triple'}[len(occupants)], occupants)
+            for occupants in gender_rooms
+        )
+    return rooms
+
+
+def plan_rooms(travellers, hints=None, prefer_triples=False):
+    """
+    Room plan for a list of travellers.
+
+    Returns:
+        List of Room, singles requested by the leader or travellers first
+    """
+    singles = [traveller for traveller in travellers
+               if traveller.is_leader or traveller.wants_single]
+    single_ids = {traveller.id for traveller in singles}
+    others = [traveller for traveller in travellers if traveller.id not in single_ids]
+
+    rooms = [Room('single', [traveller]) for traveller in singles]
+    solos = []
+    for party in build_parties(others, hints or {}):
+        if len(party) == 1:
+            solos.append(party[0])
+        else:
+            rooms.extend(_party_rooms(party))
+    rooms.extend(_solo_rooms(solos, prefer_triples))
+    return rooms
+
+
+def load_travellers(group):
+    """Travellers of a group with their party hints."""
+    travellers = []
+    hints = {}
+    rows = Passenger.objects.filter(group=group).exclude(status='cancelled').values_list(
+        'id', 'gender', 'is_leader', 'last_name', 'date_of_birth', 'email', 'phone',
+        'emergency_contact_phone', 'special_requirements'
+    ).order_by('last_name', 'first_name')
+    for (pk, gender, is_leader, last_name, birth, email, phone,
+         emergency_phone, requirements) in rows:
+        age = (group.start_date - birth).days // 365 if birth else ADULT_AGE
+        traveller = Traveller(
+            pk, gender, is_leader, last_name.strip().lower(), age < ADULT_AGE,
+            bool(SINGLE_REQUEST_RE.search(requirements or '')), requirements or '')
+        travellers.append(traveller)
+        keys = [('email', email.lower()) if email else None,
+                ('phone', phone) if phone else None,
+                ('contact', emergency_phone) if emergency_phone else None]
+        hints[pk] = [key for key in keys if key]
+
+    # Minors room with an adult family member of the same last name
+    adults_by_name = {traveller.last_name: traveller.id
+                      for traveller in travellers if not traveller.minor}
+    for traveller in travellers:
+        if traveller.minor and traveller.last_name in adults_by_name:
+            hint = (FAMILY_HINT, traveller.last_name)
+            hints[traveller.id].append(hint)
+            adult_hints = hints[adults_by_name[traveller.last_name]]
+            if hint not in adult_hints:
+                adult_hints.append(hint)
+    return travellers, hints
+
+
+def distribute(rooms, hotels):
+    """
+    Spread rooms over the bookings of one stay in plan order.
+
+    Returns:
+        List of (hotel, Room)
+    """
+    capacity = {hotel.pk: hotel.number_of_rooms for hotel in hotels}
+    if len(rooms) > sum(capacity.values()):
+        raise RoomingError(
+            f"{len(rooms)} rooms needed but the bookings of "
+            f"{hotels[0].check_in_date} hold {sum(capacity.values())}")
+
+    placed = []
+    hotel_iter = iter(hotels)
+    hotel = next(hotel_iter)
+    # Singles come first, so the leader stays in the first booking
+    for room in rooms:
+        while capacity[hotel.pk] == 0:
+            hotel = next(hotel_iter)
+        placed.append((hotel, room))
+        capacity[hotel.pk] -= 1
+    return placed
+
+
+def generate_rooming(group, hotels=None, prefer_triples=False, replace=False, dry_run=False):
+    """
+    Build the rooming list of a group and bulk-create its Accommodation rows.
+
+    Args:
+        group: Group
+        hotels: Hotel bookings to fill (default: every non-cancelled booking)
+        prefer_triples: Pack solo travellers in triples to save rooms
+        replace: Delete existing room assignments of the bookings first
+        dry_run: Only return the plan
+
+    Returns:
+        Dict with the plan summary (and created Accommodation rows)
+    """
+    if hotels is None:
+        hotels = hotels_for(group)
+    hotels = sorted(hotels, key=lambda hotel: (hotel.check_in_date, hotel.city, hotel.created_at))
+    if not hotels:
+        raise RoomingError('The group has no hotel bookings')
+    if not replace and not dry_run and Accommodation.objects.filter(hotel__in=hotels).exists():
+        raise RoomingError('Rooms are already assigned; pass replace to rebuild them')
+
+    travellers, hints = load_travellers(group)
+    rooms = plan_rooms(travellers, hints, prefer_triples)
+
+    placements = []
+    for _, stay in groupby(hotels, key=lambda hotel: (hotel.check_in_date, hotel.city)):
+        stay = list(stay)
+        try:
+            placements.extend(distribute(rooms, stay))
+        except RoomingError:
+            if prefer_triples:
+                raise
+            # Fall back to triples before giving up on this stay
+            placements.extend(distribute(plan_rooms(travellers, hints, True), stay))
+
+    counts = defaultdict(int)
+    for _, room in placements:
+        counts[room.room_type] += 1
+    summary = {
+        'passengers': len(travellers),
+        'rooms': len(placements),
+        'room_types': dict(counts),
+        'singles': counts['single'],
+    }
+    if dry_run:
+        summary['plan'] = [
+            {
+                'hotel': str(hotel.pk),
+                'room_type': room.room_type,
+                'passengers': [str(traveller.id) for traveller in room.occupants],
+            }
+            for hotel, room in placements
+        ]
+        return summary
+
+    rows = [
+        Accommodation(
+            hotel=hotel,
+            room_type=room.room_type,
+            special_requests='\n'.join(
+                traveller.requirements for traveller in room.occupants if traveller.requirements),
+        )
+        for hotel, room in placements
+    ]
+    with transaction.atomic():
+        if replace:
+            Accommodation.objects.filter(hotel__in=hotels).delete()
+        Accommodation.objects.bulk_create(rows, batch_size=500)
+        AccommodationOccupant.objects.bulk_create([
+            AccommodationOccupant(accommodation=accommodation, passenger_id=traveller.id)
+            for accommodation, (_, room) in zip(rows, placements)
+            for traveller in room.occupants
+        ], batch_size=1000)
+    summary['accommodations'] = rows
+    return summary
+
+
+def hotels_for(group, hotel_ids=None):
+    """Non-cancelled bookings of a group, optionally restricted to some ids."""
+    hotels = Hotel.objects.filter(group=group).exclude(status='cancelled')
+    if hotel_ids:
+        hotels = hotels.filter(pk__in=hotel_ids)
+    return list(hotels)
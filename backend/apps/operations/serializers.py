@@ -2,7 +2,14 @@
 Serializers for operations app.
 """
 from rest_framework import serializers
-from .models import Hotel, Transportation, Accommodation, SpecialService, Staff, StaffAssignment
+from apps.circuits.models import Group, Passenger
+from .models import (
+    Hotel, Transportation, Accommodation, AccommodationOccupant, SpecialService, Staff,
+    StaffAssignment
+)
+from .availability import busy_assignments
+from .conflicts import CHECKS
+from .payroll import month_period
 
 
 class HotelSerializer(serializers.ModelSerializer):
@@ -60,6 +67,8 @@ class AccommodationSerializer(serializers.ModelSerializer):
 
     hotel_name = serializers.CharField(
         source='hotel.hotel_name', read_only=True)
+    passengers = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Passenger.objects.all(), required=False)
 
     class Meta:
         model = Accommodation
@@ -70,6 +79,35 @@ class AccommodationSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def validate(self, attrs):
+        """Validate occupants travel with the hotel's group."""
+        hotel = attrs.get('hotel', getattr(self.instance, 'hotel', None))
+        passengers = attrs.get('passengers') or []
+        if hotel and any(passenger.group_id != hotel.group_id for passenger in passengers):
+            raise serializers.ValidationError({
+                'passengers': 'Passengers must belong to the hotel booking group'
+            })
+        return attrs
+
+
+class RoomingListSerializer(serializers.ModelSerializer):
+    """One passenger line of a hotel rooming list."""
+
+    room_number = serializers.CharField(source='accommodation.room_number', read_only=True)
+    room_type = serializers.CharField(source='accommodation.room_type', read_only=True)
+    passenger_name = serializers.CharField(source='passenger.full_name', read_only=True)
+    gender = serializers.CharField(source='passenger.gender', read_only=True)
+    special_requests = serializers.CharField(
+        source='accommodation.special_requests', read_only=True)
+
+    class Meta:
+        model = AccommodationOccupant
+        fields = [
+            'accommodation', 'room_number', 'room_type', 'passenger',
+            'passenger_name', 'gender', 'special_requests'
+        ]
+        read_only_fields = fields
+
 
 class SpecialServiceSerializer(serializers.ModelSerializer):
     """Special service serializer."""
@@ -120,16 +158,140 @@ class StaffAssignmentSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'group', 'group_code', 'staff', 'staff_name',
             'start_date', 'end_date', 'role', 'daily_rate',
-            'total_payment', 'currency', 'payment_status', 'notes',
-            'created_at', 'updated_at'
+            'total_payment', 'currency', 'payment_status', 'paid_through',
+            'notes', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'paid_through', 'created_at', 'updated_at']
 
     def validate(self, attrs):
-        """Validate dates."""
+        """Validate dates and that the staff member is free."""
         if 'start_date' in attrs and 'end_date' in attrs:
             if attrs['start_date'] > attrs['end_date']:
                 raise serializers.ValidationError({
                     'end_date': 'End date must be after or equal to start date'
                 })
+
+        # Friendly error for what staff_assignments_no_overlap enforces
+        current = {
+            field: attrs.get(field, getattr(self.instance, field, None))
+            for field in ('staff', 'start_date', 'end_date', 'payment_status')
+        }
+        if current['staff'] and current['start_date'] and current['end_date'] \
+                and current['payment_status'] != 'cancelled':
+            overlapping = busy_assignments(
+                current['start_date'], current['end_date']
+            ).filter(staff=current['staff'])
+            if self.instance is not None:
+                overlapping = overlapping.exclude(pk=self.instance.pk)
+            if overlapping.exists():
+                raise serializers.ValidationError({
+                    'staff': 'Staff member already has an assignment in this period.'
+                })
+        return attrs
+
+
+class StaffAvailabilitySerializer(serializers.Serializer):
+    """Availability search window and filters."""
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    staff_type = serializers.ChoiceField(
+        choices=Staff.STAFF_TYPE_CHOICES, required=False)
+    languages = serializers.CharField(
+        required=False, help_text='Comma-separated language codes')
+    min_rating = serializers.DecimalField(
+        max_digits=3, decimal_places=2, required=False)
+
+    def validate_languages(self, value):
+        """Split the language list."""
+        return [code.strip() for code in value.split(',') if code.strip()]
+
+    def validate(self, attrs):
+        """Validate the window."""
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError({
+                'end_date': 'End date must be after or equal to start date'
+            })
+        return attrs
+
+
+class PayrollPeriodSerializer(serializers.Serializer):
+    """Payroll period: a month (YYYY-MM) or an explicit date range."""
+
+    month = serializers.RegexField(r'^\d{4}-(0[1-9]|1[0-2])$', required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    staff_type = serializers.MultipleChoiceField(
+        choices=Staff.STAFF_TYPE_CHOICES, required=False)
+    currency = serializers.CharField(max_length=3, required=False)
+
+    def validate(self, attrs):
+        """Resolve the period bounds."""
+        if attrs.get('month'):
+            attrs['start_date'], attrs['end_date'] = month_period(attrs['month'])
+        elif not attrs.get('start_date') or not attrs.get('end_date'):
+            raise serializers.ValidationError(
+                'Provide month or both start_date and end_date')
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError({
+                'end_date': 'End date must be after or equal to start date'
+            })
+        attrs['staff_type'] = sorted(attrs.get('staff_type') or []) or None
+        return attrs
+
+
+class AutoAssignSerializer(serializers.Serializer):
+    """Input for automatic guide/driver assignment."""
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    staff_type = serializers.MultipleChoiceField(
+        choices=[('guide', 'Tour Guide'), ('driver', 'Driver')], required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        """Validate the window."""
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError({
+                'end_date': 'End date must be after or equal to start date'
+            })
+        attrs['staff_type'] = sorted(attrs.get('staff_type') or []) or None
+        return attrs
+
+
+class RoomingSerializer(serializers.Serializer):
+    """Input for generating a group's rooming list."""
+
+    group = serializers.PrimaryKeyRelatedField(queryset=Group.objects.all())
+    hotels = serializers.ListField(
+        child=serializers.UUIDField(), required=False,
+        help_text='Hotel bookings to fill (default: all of the group)')
+    prefer_triples = serializers.BooleanField(default=False)
+    replace = serializers.BooleanField(default=False)
+    dry_run = serializers.BooleanField(default=False)
+
+
+class ManifestSerializer(serializers.Serializer):
+    """Query parameters of the daily operations manifest."""
+
+    date = serializers.DateField(required=False)
+    days = serializers.IntegerField(min_value=1, max_value=7, default=2)
+    output = serializers.ChoiceField(choices=['json', 'csv'], default='json')
+
+
+class ConflictCheckSerializer(serializers.Serializer):
+    """Input for the season conflict check."""
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    groups = serializers.ListField(child=serializers.UUIDField(), required=False)
+    checks = serializers.MultipleChoiceField(choices=CHECKS, required=False)
+
+    def validate(self, attrs):
+        """Validate the season window."""
+        if attrs['start_date'] > attrs['end_date']:
+            raise serializers.ValidationError({
+                'end_date': 'End date must be after or equal to start date'
+            })
+        attrs['checks'] = [check for check in CHECKS if check in (attrs.get('checks') or CHECKS)]
         return attrs
@@ -0,0 +1,401 @@
+"""
+Automatic guide and driver assignment.
+
+Every group departing in a window needs one guide and one driver unless it
+already has one. Guides must speak the main language of the group, derived
+from passenger nationalities. The solver works on plain data: a greedy pass
+fills the most constrained slots first with the cheapest free candidate,
+then local search moves slots to cheaper staff, swaps staff between slots
+and frees a candidate for unfilled slots by moving one of its groups.
+Cost is the pay in BASE_CURRENCY, weighted up for lower ratings; staff
+whose currency has no exchange rate cannot be costed and are reported as
+skipped.
+"""
+import time
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+
+from apps.circuits.models import Group, Passenger
+from apps.financial.currency import RateCache
+from .availability import busy_assignments
+from .models import Staff, StaffAssignment
+
+NATIONALITY_LANGUAGES = {
+    'PER': 'es', 'ARG': 'es', 'BOL': 'es', 'CHL': 'es', 'COL': 'es',
+    'ECU': 'es', 'ESP': 'es', 'MEX': 'es', 'URY': 'es', 'VEN': 'es',
+    'USA': 'en', 'GBR': 'en', 'CAN': 'en', 'AUS': 'en', 'NZL': 'en', 'IRL': 'en',
+    'FRA': 'fr', 'BEL': 'fr', 'DEU': 'de', 'AUT': 'de', 'CHE': 'de',
+    'ITA': 'it', 'BRA': 'pt', 'PRT': 'pt', 'NLD': 'nl', 'JPN': 'ja',
+    'CHN': 'zh', 'KOR': 'ko', 'ISR': 'he', 'RUS': 'ru',
+}
+DEFAULT_LANGUAGE = 'en'
+
+# staff_type -> StaffAssignment.role
+ROLES = {
+    'guide': 'Main Guide',
+    'driver': 'Driver',
+}
+LANGUAGE_ROLES = {'guide'}
+
+# Extra cost per rating point below 5 (unrated staff count as 3)
+RATING_PENALTY = 0.05
+DEFAULT_RATING = 3
+TIME_LIMIT_SECONDS = 5.0
+
+Slot = namedtuple('Slot', ['group_id', 'group_code', 'staff_type', 'start', 'end', 'language'])
+Candidate = namedtuple(
+    'Candidate', ['staff_id', 'name', 'staff_type', 'languages', 'rate', 'currency', 'rating'])
+
+
+class Schedule:
+    """Sorted, non-overlapping (start, end) intervals of one staff member."""
+
+    def __init__(self, intervals=()):
+        self.intervals = sorted(intervals)
+
+    def is_free(self, start, end):
+        position = bisect_left(self.intervals, (start, end))
+        if position and self.intervals[position - 1][1] >= start:
+            return False
+        return position == len(self.intervals) or self.intervals[position][0] > end
+
+    def add(self, start, end):
+        insort(self.intervals, (start, end))
+
+    def remove(self, start, end):
+        self.intervals.remove((start, end))
+
+
+class StaffingSolver:
+    """
+    Conflict-free slot -> staff assignment minimizing cost.
+
+    Args:
+        slots: List of Slot
+        candidates: List of Candidate with rates already in the base currency
+        busy: staff_id -> iterable of (start, end) already committed
+        skipped: Candidate left out of the plan (no exchange rate)
+    """
+
+    def __init__(self, slots, candidates, busy=None, time_limit=TIME_LIMIT_SECONDS,
+                 skipped=()):
+        self.slots = slots
+        self.skipped = list(skipped)
+        self.candidates = {candidate.staff_id: candidate for candidate in candidates}
+        self.schedules = {
+            staff_id: Schedule((busy or {}).get(staff_id, ()))
+            for staff_id in self.candidates
+        }
+        self.time_limit = time_limit
+        self.assigned = {}
+        self.slots_by_staff = defaultdict(set)
+
+        # slot index -> [(cost, staff_id)] cheapest first
+        self.eligible = [
+            sorted(
+                (self.cost(candidate, slot), candidate.staff_id)
+                for candidate in candidates if self.can_work(candidate, slot)
+            )
+            for slot in slots
+        ]
+        self.costs = [dict((staff_id, cost) for cost, staff_id in options)
+                      for options in self.eligible]
+
+    @staticmethod
+    def can_work(candidate, slot):
+        if candidate.staff_type != slot.staff_type:
+            return False
+        return slot.staff_type not in LANGUAGE_ROLES or slot.language in candidate.languages
+
+    @staticmethod
+    def cost(candidate, slot):
+        days = (slot.end - slot.start).days + 1
+        rating = float(candidate.rating) if candidate.rating is not None else DEFAULT_RATING
+        return float(candidate.rate) * days * (1 + RATING_PENALTY * (5 - rating))
+
+    def _assign(self, index, staff_id):
+        slot = self.slots[index]
+        self.schedules[staff_id].add(slot.start, slot.end)
+        self.assigned[index] = staff_id
+        self.slots_by_staff[staff_id].add(index)
+
+    def _unassign(self, index):
+        slot = self.slots[index]
+        staff_id = self.assigned.pop(index)
+        self.schedules[staff_id].remove(slot.start, slot.end)
+        self.slots_by_staff[staff_id].discard(index)
+        return staff_id
+
+    def _free(self, index, staff_id):
+        slot = self.slots[index]
+        return self.schedules[staff_id].is_free(slot.start, slot.end)
+
+    def solve(self):
+        """Run greedy construction and local search; return self."""
+        deadline = time.monotonic() + self.time_limit
+        order = sorted(range(len(self.slots)),
+                       key=lambda index: (len(self.eligible[index]), self.slots[index].start))
+        for index in order:
+            for _, staff_id in self.eligible[index]:
+                if self._free(index, staff_id):
+                    self._assign(index, staff_id)
+                    break
+
+        improved = True
+        while improved and time.monotonic() < deadline:
+            improved = self._fill_unassigned()
+            improved = self._move_to_cheaper() or improved
+            improved = self._swap_pairs(deadline) or improved
+        return self
+
+    def _move_to_cheaper(self):
+        improved = False
+        for index, current in list(self.assigned.items()):
+            current_cost = self.costs[index][current]
+            for cost, staff_id in self.eligible[index]:
+                if cost >= current_cost:
+                    break
+                if self._free(index, staff_id):
+                    self._unassign(index)
+                    self._assign(index, staff_id)
+                    improved = True
+                    break
+        return improved
+
+    def _fill_unassigned(self):
+        """Free a candidate for an unfilled slot by moving one blocking slot."""
+        improved = False
+        for index in range(len(self.slots)):
+            if index in self.assigned:
+                continue
+            slot = self.slots[index]
+            for _, staff_id in self.eligible[index]:
+                blockers = [
+                    other for other in self.slots_by_staff[staff_id]
+                    if self.slots[other].start <= slot.end and self.slots[other].end >= slot.start
+                ]
+                if len(blockers) != 1:
+                    continue
+                blocker = blockers[0]
+                self._unassign(blocker)
+                if not self._free(index, staff_id):
+                    # Also blocked by pre-existing assignments
+                    self._assign(blocker, staff_id)
+                    continue
+                replacement = next(
+                    (other_id for _, other_id in self.eligible[blocker]
+                     if other_id != staff_id and self._free(blocker, other_id)), None)
+                if replacement is None:
+                    self._assign(blocker, staff_id)
+                    continue
+                self._assign(blocker, replacement)
+                self._assign(index, staff_id)
+                improved = True
+                break
+        return improved
+
+    def _swap_pairs(self, deadline):
+        improved = False
+        by_type = defaultdict(list)
+        for index in self.assigned:
+            by_type[self.slots[index].staff_type].append(index)
+
+        for indexes in by_type.values():
+            for position, first in enumerate(indexes):
+                if time.monotonic() >= deadline:
+                    return improved
+                for second in indexes[position + 1:]:
+                    staff_a, staff_b = self.assigned[first], self.assigned[second]
+                    cost_a = self.costs[second].get(staff_a)
+                    cost_b = self.costs[first].get(staff_b)
+                    if cost_a is None or cost_b is None:
+                        continue
+                    delta = (cost_a + cost_b) - (
+                        self.costs[first][staff_a] + self.costs[second][staff_b])
+                    if delta >= -0.01:
+                        continue
+                    self._unassign(first)
+                    self._unassign(second)
+                    if self._free(second, staff_a) and self._free(first, staff_b):
+                        self._assign(first, staff_b)
+                        self._assign(second, staff_a)
+                        improved = True
+                    else:
+                        self._assign(first, staff_a)
+                        self._assign(second, staff_b)
+        return improved
+
+    def total_cost(self):
+        return sum(self.costs[index][staff_id] for index, staff_id in self.assigned.items())
+
+    def unfilled(self):
+        return [slot for index, slot in enumerate(self.slots) if index not in self.assigned]
+
+
+def group_languages(group_ids):
+    """Main language of each group from its passengers' nationalities."""
+    counts = defaultdict(Counter)
+    rows = Passenger.objects.filter(group_id__in=group_ids).exclude(
+        status='cancelled'
+    ).order_by().values_list('group_id', 'nationality').annotate(total=Count('id'))
+    for group_id, nationality, total in rows:
+        counts[group_id][NATIONALITY_LANGUAGES.get(nationality, DEFAULT_LANGUAGE)] += total
+    return {
+        group_id: min(counter.items(), key=lambda item: (-item[1], item[0]))[0]
+        for group_id, counter in counts.items()
+    }
+
+
+def build_problem(start_date, end_date, staff_types=None):
+    """
+    Load the slots, candidates and existing commitments of a window.
+
+    Returns:
+        (slots, candidates, busy, skipped), skipped being the staff left
+        out because their currency has no exchange rate
+    """
+    staff_types = staff_types or list(ROLES)
+    groups = list(Group.objects.filter(
+        start_date__lte=end_date, end_date__gte=start_date
+    ).exclude(status__in=['cancelled', 'completed']).values_list(
+        'id', 'code', 'start_date', 'end_date'))
+    group_ids = [group[0] for group in groups]
+    languages = group_languages(group_ids)
+
+    staffed = set(StaffAssignment.objects.filter(group_id__in=group_ids).exclude(
+        payment_status='cancelled'
+    ).values_list('group_id', 'staff__staff_type'))
+
+    slots = [
+        Slot(group_id, code, staff_type, start, end, languages.get(group_id, DEFAULT_LANGUAGE))
+        for group_id, code, start, end in groups
+        for staff_type in staff_types
+        if (group_id, staff_type) not in staffed
+    ]
+    if not slots:
+        return slots, [], {}, []
+
+    window_start = min(slot.start for slot in slots)
+    window_end = max(slot.end for slot in slots)
+    rates = RateCache()
+    candidates = []
+    skipped = []
+    for staff_id, first, last, staff_type, spoken, rate, currency, rating in Staff.objects.filter(
+        status='active', staff_type__in=staff_types
+    ).values_list('id', 'first_name', 'last_name', 'staff_type', 'languages',
+                  'rate_per_day', 'currency', 'rating'):
+        base_rate = rates.rate(currency, window_start)
+        if base_rate is None:
+            skipped.append(Candidate(
+                staff_id, f'{first} {last}', staff_type, frozenset(spoken or ()),
+                rate, currency, rating))
+            continue
+        candidates.append(Candidate(
+            staff_id, f'{first} {last}', staff_type, frozenset(spoken or ()),
+            rate * base_rate, currency, rating))
+
+    busy = defaultdict(list)
+    for staff_id, start, end in busy_assignments(window_start, window_end).filter(
+        staff__staff_type__in=staff_types
+    ).values_list('staff_id', 'start_date', 'end_date'):
+        busy[staff_id].append((start, end))
+    return slots, candidates, busy, skipped
+
+
+def plan_staffing(start_date, end_date, staff_types=None, time_limit=TIME_LIMIT_SECONDS):
+    """Solve the staffing of a window without writing anything."""
+    slots, candidates, busy, skipped = build_problem(start_date, end_date, staff_types)
+    return StaffingSolver(
+        slots, candidates, busy, time_limit=time_limit, skipped=skipped).solve()
+
+
+def apply_staffing(solver):
+    """
+    Bulk-create the StaffAssignment rows of a solved plan.
+
+    If a slot's staff member was booked elsewhere after the plan was solved,
+    staff_assignments_no_overlap rejects the batch; the rows are then
+    inserted one by one and the slots that still conflict are left out.
+
+    Returns:
+        (created assignments, conflicting slots in the describe() format)
+    """
+    staff = Staff.objects.in_bulk(set(solver.assigned.values()))
+    indexes = []
+    rows = []
+    for index, staff_id in solver.assigned.items():
+        slot = solver.slots[index]
+        member = staff[staff_id]
+        days = (slot.end - slot.start).days + 1
+        indexes.append(index)
+        rows.append(StaffAssignment(
+            group_id=slot.group_id, staff=member,
+            start_date=slot.start, end_date=slot.end,
+            role=ROLES[slot.staff_type], daily_rate=member.rate_per_day,
+            total_payment=member.rate_per_day * days, currency=member.currency,
+        ))
+    try:
+        with transaction.atomic():
+            return StaffAssignment.objects.bulk_create(rows, batch_size=500), []
+    except IntegrityError:
+        pass
+
+    created = []
+    conflicts = []
+    for index, row in zip(indexes, rows):
+        try:
+            with transaction.atomic():
+                StaffAssignment.objects.bulk_create([row])
+        except IntegrityError:
+            conflicts.append(_assignment_summary(solver, index, solver.assigned[index]))
+        else:
+            created.append(row)
+    return created, conflicts
+
+
+def _assignment_summary(solver, index, staff_id):
+    slot = solver.slots[index]
+    return {
+        'group': str(slot.group_id),
+        'group_code': slot.group_code,
+        'staff_type': slot.staff_type,
+        'staff': str(staff_id),
+        'staff_name': solver.candidates[staff_id].name,
+    }
+
+
+def describe(solver):
+    """JSON-serializable summary of a plan."""
+    return {
+        'slots': len(solver.slots),
+        'assigned': len(solver.assigned),
+        'total_cost': str(Decimal(solver.total_cost()).quantize(Decimal('0.01'))),
+        'assignments': [
+            _assignment_summary(solver, index, staff_id)
+            for index, staff_id in sorted(
+                solver.assigned.items(), key=lambda item: solver.slots[item[0]].start)
+        ],
+        'unfilled': [
+            {
+                'group': str(slot.group_id),
+                'group_code': slot.group_code,
+                'staff_type': slot.staff_type,
+                'language': slot.language,
+            }
+            for slot in solver.unfilled()
+        ],
+        'skipped_staff': [
+            {
+                'staff': str(candidate.staff_id),
+                'staff_name': candidate.name,
+                'staff_type': candidate.staff_type,
+                'currency': candidate.currency,
+                'reason': 'no exchange rate',
+            }
+            for candidate in solver.skipped
+        ],
+    }
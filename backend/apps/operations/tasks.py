@@ -0,0 +1,64 @@
+"""
+Celery tasks for operations app.
+"""
+import csv
+import io
+import tempfile
+from datetime import date
+
+from celery import shared_task
+from django.core.files import File
+
+from core.common.jobs import JobTask
+from .conflicts import find_conflicts
+from .payroll import EXPORT_FIELDS, compute_payroll
+from .staffing import apply_staffing, describe, plan_staffing
+
+
+@shared_task(bind=True, base=JobTask)
+def export_payroll_csv(self, job_id, start_date, end_date, staff_types=None, currency=None):
+    """Stream the payroll of a period to a CSV result file."""
+    period_start = date.fromisoformat(start_date)
+    period_end = date.fromisoformat(end_date)
+    rows = compute_payroll(period_start, period_end, staff_types, currency)
+    total = rows.count()
+
+    count = 0
+    with tempfile.SpooledTemporaryFile(max_size=5 * 1024 * 1024) as tmp:
+        text = io.TextIOWrapper(tmp, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        writer.writerow(EXPORT_FIELDS)
+        for count, row in enumerate(rows.iterator(chunk_size=1000), start=1):
+            writer.writerow([row[field] for field in EXPORT_FIELDS])
+            if count % 500 == 0:
+                self.update_progress(count, total, 'Exporting payroll')
+        text.flush()
+        text.detach()
+        tmp.seek(0)
+        self.save_result_file(f'payroll-{start_date}-{end_date}.csv', File(tmp))
+
+    return {'start_date': start_date, 'end_date': end_date, 'rows': count}
+
+
+@shared_task(bind=True, base=JobTask)
+def auto_assign_staff(self, job_id, start_date, end_date, staff_types=None, dry_run=False):
+    """Solve guide/driver staffing of a window and optionally write it."""
+    self.update_progress(10, None, 'Loading groups and staff')
+    solver = plan_staffing(
+        date.fromisoformat(start_date), date.fromisoformat(end_date), staff_types)
+    result = describe(solver)
+
+    if not dry_run:
+        self.update_progress(80, None, 'Creating assignments')
+        created, conflicts = apply_staffing(solver)
+        result['created'] = len(created)
+        result['conflicts'] = conflicts
+    return result
+
+
+@shared_task(bind=True, base=JobTask)
+def check_conflicts(self, job_id, start_date, end_date, groups=None, checks=None):
+    """Run the booking conflict rules over a season."""
+    self.update_progress(10, None, 'Checking bookings')
+    return find_conflicts(
+        date.fromisoformat(start_date), date.fromisoformat(end_date), groups, checks)
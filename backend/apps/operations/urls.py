@@ -5,7 +5,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     HotelViewSet, TransportationViewSet, AccommodationViewSet,
-    SpecialServiceViewSet, StaffViewSet, StaffAssignmentViewSet
+    SpecialServiceViewSet, StaffViewSet, StaffAssignmentViewSet, ManifestView,
+    ConflictCheckView
 )
 
 router = DefaultRouter()
@@ -20,4 +21,8 @@ router.register(r'staff', StaffViewSet, basename='staff')
 router.register(r'staff-assignments', StaffAssignmentViewSet,
                 basename='staff-assignments')
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('manifest/', ManifestView.as_view(), name='operations-manifest'),
+    path('conflicts/', ConflictCheckView.as_view(), name='operations-conflicts'),
+    path('', include(router.urls)),
+]
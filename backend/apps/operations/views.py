@@ -5,14 +5,31 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
-from .models import Hotel, Transportation, Accommodation, SpecialService, Staff, StaffAssignment
+from apps.circuits.serializers import PassengerSerializer
+from .models import (
+    Hotel, Transportation, Accommodation, AccommodationOccupant, SpecialService, Staff,
+    StaffAssignment
+)
+from .availability import available_staff
+from .conflicts import find_conflicts
+from .manifest import iter_manifest_csv, iter_manifest_json
+from .payroll import EarlierPeriodUnpaid, MissingExchangeRate, close_payroll, compute_payroll
+from .rooming import RoomingError, generate_rooming, hotels_for
 from .serializers import (
     HotelSerializer, TransportationSerializer, AccommodationSerializer,
-    SpecialServiceSerializer, StaffSerializer, StaffAssignmentSerializer
+    SpecialServiceSerializer, StaffSerializer, StaffAssignmentSerializer,
+    StaffAvailabilitySerializer, PayrollPeriodSerializer, AutoAssignSerializer,
+    RoomingSerializer, RoomingListSerializer, ManifestSerializer, ConflictCheckSerializer
 )
+from .tasks import auto_assign_staff, check_conflicts, export_payroll_csv
+from core.common.jobs import enqueue_job, job_accepted_response
 from core.common.permissions import IsOperationsManager
 from core.common.pagination import StandardPagination
 
@@ -30,6 +47,39 @@ class HotelViewSet(viewsets.ModelViewSet):
     ordering_fields = ['check_in_date', 'total_price']
     ordering = ['group', 'check_in_date']
 
+    @action(detail=True, methods=['get'])
+    def rooming_list(self, request, pk=None):
+        """Passengers of a booking by room."""
+        hotel = self.get_object()
+        occupants = AccommodationOccupant.objects.filter(
+            accommodation__hotel=hotel
+        ).select_related('accommodation', 'passenger').order_by(
+            'accommodation__room_number', 'accommodation_id', 'passenger__last_name')
+
+        page = self.paginate_queryset(occupants)
+        if page is not None:
+            serializer = RoomingListSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = RoomingListSerializer(occupants, many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def unassigned(self, request, pk=None):
+        """Group passengers without a room in this booking."""
+        hotel = self.get_object()
+        passengers = hotel.group.passengers.exclude(status='cancelled').exclude(
+            room_assignments__accommodation__hotel=hotel
+        ).order_by('last_name', 'first_name')
+
+        page = self.paginate_queryset(passengers)
+        if page is not None:
+            serializer = PassengerSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = PassengerSerializer(passengers, many=True)
+        return Response(serializer.data)
+
 
 class TransportationViewSet(viewsets.ModelViewSet):
     """Transportation booking CRUD endpoints."""
@@ -49,14 +99,39 @@ class TransportationViewSet(viewsets.ModelViewSet):
 class AccommodationViewSet(viewsets.ModelViewSet):
     """Accommodation assignment CRUD endpoints."""
 
-    queryset = Accommodation.objects.select_related('hotel').all()
+    queryset = Accommodation.objects.select_related('hotel').prefetch_related('passengers')
     serializer_class = AccommodationSerializer
     permission_classes = [IsAuthenticated, IsOperationsManager]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
-    filterset_fields = ['hotel', 'room_type']
+    filterset_fields = ['hotel', 'room_type', 'passengers']
     ordering_fields = ['room_number']
     ordering = ['hotel', 'room_number']
 
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        """Build a group's rooming list over its hotel bookings."""
+        serializer = RoomingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        try:
+            result = generate_rooming(
+                params['group'],
+                hotels=hotels_for(params['group'], params.get('hotels')),
+                prefer_triples=params['prefer_triples'],
+                replace=params['replace'],
+                dry_run=params['dry_run'],
+            )
+        except RoomingError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        accommodations = result.pop('accommodations', None)
+        if accommodations is not None:
+            created = self.get_queryset().filter(pk__in=[row.pk for row in accommodations])
+            result['accommodations'] = self.get_serializer(created, many=True).data
+            return Response(result, status=status.HTTP_201_CREATED)
+        return Response(result)
+
 
 class SpecialServiceViewSet(viewsets.ModelViewSet):
     """Special service CRUD endpoints."""
@@ -99,6 +174,83 @@ class StaffViewSet(viewsets.ModelViewSet):
         serializer = StaffAssignmentSerializer(assignments, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def available(self, request):
+        """Active staff free for a whole date window, best rated first."""
+        search = StaffAvailabilitySerializer(data=request.query_params)
+        search.is_valid(raise_exception=True)
+        params = search.validated_data
+
+        staff = available_staff(
+            params['start_date'], params['end_date'],
+            staff_type=params.get('staff_type'),
+            languages=params.get('languages'),
+            min_rating=params.get('min_rating'),
+        ).order_by(F('rating').desc(nulls_last=True), 'last_name', 'first_name')
+
+        page = self.paginate_queryset(staff)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(staff, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def payroll(self, request):
+        """Payroll of a period for the whole roster (month=YYYY-MM)."""
+        period = PayrollPeriodSerializer(data=request.query_params)
+        period.is_valid(raise_exception=True)
+        params = period.validated_data
+
+        try:
+            rows = compute_payroll(
+                params['start_date'], params['end_date'],
+                params['staff_type'], params.get('currency'))
+            page = self.paginate_queryset(rows)
+        except MissingExchangeRate as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if page is not None:
+            return self.get_paginated_response(page)
+        return Response(rows)
+
+    @action(detail=False, methods=['post'], url_path='payroll/export')
+    def payroll_export(self, request):
+        """Export a period's payroll to CSV in the background."""
+        period = PayrollPeriodSerializer(data=request.data)
+        period.is_valid(raise_exception=True)
+        params = period.validated_data
+
+        job = enqueue_job(
+            export_payroll_csv, 'export_payroll_csv', user=request.user,
+            params={
+                'start_date': params['start_date'].isoformat(),
+                'end_date': params['end_date'].isoformat(),
+                'staff_types': params['staff_type'],
+                'currency': params.get('currency'),
+            }
+        )
+        return job_accepted_response(job)
+
+    @action(detail=False, methods=['post'], url_path='payroll/close')
+    def payroll_close(self, request):
+        """Mark the period's payable assignments as paid."""
+        period = PayrollPeriodSerializer(data=request.data)
+        period.is_valid(raise_exception=True)
+        params = period.validated_data
+
+        try:
+            updated = close_payroll(
+                params['start_date'], params['end_date'], params['staff_type'])
+        except EarlierPeriodUnpaid as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'start_date': params['start_date'],
+            'end_date': params['end_date'],
+            'assignments_updated': updated,
+        })
+
 
 class StaffAssignmentViewSet(viewsets.ModelViewSet):
     """Staff assignment CRUD endpoints."""
@@ -109,5 +261,92 @@ class StaffAssignmentViewSet(viewsets.ModelViewSet):
     pagination_class = StandardPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['group', 'staff', 'payment_status']
-    ordering_fields = ['start_date', 'total_payment']
+    ordering_fields = ['start_date', 'total_payment', 'paid_through']
     ordering = ['group', 'start_date']
+
+    @action(detail=False, methods=['post'])
+    def auto_assign(self, request):
+        """
+        Assign guides and drivers to the groups of a window at minimum cost.
+
+        With dry_run the plan is only returned in the job result.
+        """
+        serializer = AutoAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        job = enqueue_job(
+            auto_assign_staff, 'auto_assign_staff', user=request.user,
+            params={
+                'start_date': params['start_date'].isoformat(),
+                'end_date': params['end_date'].isoformat(),
+                'staff_types': params['staff_type'],
+                'dry_run': params['dry_run'],
+            }
+        )
+        return job_accepted_response(job)
+
+
+class ManifestView(APIView):
+    """
+    Daily operations manifest of every confirmed or running group.
+
+    Pickups, flights, hotel check-ins and special services of the window,
+    grouped by city and supplier, streamed as JSON or CSV (output=csv).
+    """
+
+    permission_classes = [IsAuthenticated, IsOperationsManager]
+
+    def get(self, request):
+        params = ManifestSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        start_date = params.validated_data.get('date') or timezone.localdate()
+        days = params.validated_data['days']
+
+        if params.validated_data['output'] == 'csv':
+            response = StreamingHttpResponse(
+                iter_manifest_csv(start_date, days), content_type='text/csv')
+            response['Content-Disposition'] = (
+                f'attachment; filename="manifest_{start_date.isoformat()}.csv"')
+            return response
+        return StreamingHttpResponse(
+            iter_manifest_json(start_date, days), content_type='application/json')
+
+
+class ConflictCheckView(APIView):
+    """
+    Booking conflicts of a season: undersized vehicles, overlapping hotel
+    stays, itinerary days outside the group dates and airport pickups
+    scheduled before the flight lands.
+
+    GET runs the check for the query window; POST runs it in the background.
+    """
+
+    permission_classes = [IsAuthenticated, IsOperationsManager]
+
+    def get(self, request):
+        params = ConflictCheckSerializer(data={
+            **request.query_params.dict(),
+            'groups': request.query_params.getlist('groups'),
+            'checks': request.query_params.getlist('checks'),
+        })
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        return Response(find_conflicts(
+            data['start_date'], data['end_date'], data.get('groups'), data['checks']))
+
+    def post(self, request):
+        params = ConflictCheckSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        job = enqueue_job(
+            check_conflicts, 'check_conflicts', user=request.user,
+            params={
+                'start_date': data['start_date'].isoformat(),
+                'end_date': data['end_date'].isoformat(),
+                'groups': [str(pk) for pk in data.get('groups') or []] or None,
+                'checks': data['checks'],
+            }
+        )
+        return job_accepted_response(job)
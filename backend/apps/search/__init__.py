@@ -0,0 +1,2 @@
+# Search app
+default_app_config = 'apps.search.apps.SearchConfig'
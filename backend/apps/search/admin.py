@@ -0,0 +1,15 @@
+"""
+Search admin configuration.
+"""
+from django.contrib import admin
+from .models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    """SearchDocument admin."""
+
+    list_display = ['object_type', 'identifier', 'title', 'subtitle', 'updated_at']
+    list_filter = ['object_type']
+    search_fields = ['identifier', 'title']
+    readonly_fields = ['object_type', 'object_id', 'created_at', 'updated_at']
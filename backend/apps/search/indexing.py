@@ -0,0 +1,156 @@
+"""
+Builders that project domain objects into SearchDocument rows.
+"""
+from apps.circuits.models import Group, Passenger, Flight
+from apps.financial.models import Invoice
+from apps.operations.models import Hotel, Transportation
+from apps.suppliers.models import Supplier
+from .models import SearchDocument
+
+UPSERT_FIELDS = ['identifier', 'title', 'subtitle', 'keywords', 'updated_at']
+
+
+def _join(*values):
+    return ' '.join(str(value) for value in values if value)
+
+
+def _passenger(obj):
+    return {
+        'identifier': obj.document_number,
+        'title': obj.full_name,
+        'subtitle': _join(obj.group.code, obj.get_document_type_display()),
+        'keywords': _join(obj.email, obj.phone, obj.nationality),
+    }
+
+
+def _group(obj):
+    return {
+        'identifier': obj.code,
+        'title': obj.name,
+        'subtitle': _join(obj.program.name, obj.start_date),
+        'keywords': obj.program.code,
+    }
+
+
+def _supplier(obj):
+    return {
+        'identifier': obj.tax_id or obj.code,
+        'title': obj.name,
+        'subtitle': _join(obj.get_supplier_type_display(), obj.city),
+        'keywords': _join(obj.code, obj.tax_id, obj.contact_name, obj.email),
+    }
+
+
+def _invoice(obj):
+    return {
+        'identifier': obj.invoice_number,
+        'title': obj.customer_name,
+        'subtitle': _join(obj.get_invoice_type_display(), obj.issue_date),
+        'keywords': obj.customer_document_number,
+    }
+
+
+def _hotel(obj):
+    return {
+        'identifier': obj.booking_reference,
+        'title': obj.hotel_name,
+        'subtitle': _join(obj.group.code, obj.city, obj.check_in_date),
+        'keywords': obj.supplier.name,
+    }
+
+
+def _flight(obj):
+    return {
+        'identifier': obj.booking_reference,
+        'title': f"{obj.airline} {obj.flight_number}",
+        'subtitle': _join(obj.group.code, obj.departure_city, obj.arrival_city),
+        'keywords': obj.flight_number,
+    }
+
+
+def _transportation(obj):
+    return {
+        'identifier': obj.booking_reference,
+        'title': f"{obj.origin} - {obj.destination}",
+        'subtitle': _join(obj.group.code, obj.get_transport_type_display()),
+        'keywords': _join(obj.supplier.name, obj.driver_name),
+    }
+
+
+# object_type -> (model, select_related, builder)
+REGISTRY = {
+    'passenger': (Passenger, ['group'], _passenger),
+    'group': (Group, ['program'], _group),
+    'supplier': (Supplier, [], _supplier),
+    'invoice': (Invoice, [], _invoice),
+    'hotel': (Hotel, ['group', 'supplier'], _hotel),
+    'flight': (Flight, ['group'], _flight),
+    'transportation': (Transportation, ['group', 'supplier'], _transportation),
+}
+
+MODEL_TYPES = {model: object_type for object_type, (model, _, _) in REGISTRY.items()}
+
+
+def build_document(object_type, obj):
+    """Build an unsaved SearchDocument for a domain object."""
+    _, _, builder = REGISTRY[object_type]
+    fields = builder(obj)
+    fields['identifier'] = (fields['identifier'] or '').upper()[:100]
+    fields['title'] = fields['title'][:255]
+    fields['subtitle'] = fields['subtitle'][:255]
+    return SearchDocument(object_type=object_type, object_id=obj.pk, **fields)
+
+
+def upsert_documents(documents):
+    """Insert or refresh SearchDocument rows in a single statement."""
+    return SearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['object_type', 'object_id'],
+        update_fields=UPSERT_FIELDS,
+    )
+
+
+def index_object(object_type, pk):
+    """Re-index one object, or drop its document if it no longer exists."""
+    model, related, _ = REGISTRY[object_type]
+    obj = model.objects.select_related(*related).filter(pk=pk).first()
+    if obj is None:
+        remove_object(object_type, pk)
+        return
+    upsert_documents([build_document(object_type, obj)])
+
+
+def remove_object(object_type, pk):
+    """Delete the SearchDocument for an object."""
+    SearchDocument.objects.filter(object_type=object_type, object_id=pk).delete()
+
+
+def rebuild(object_type, batch_size=2000):
+    """
+    Re-index every object of a type in batches.
+
+    Returns:
+        Number of indexed objects
+    """
+    model, related, _ = REGISTRY[object_type]
+    queryset = model.objects.select_related(*related).order_by()
+
+    total = 0
+    batch = []
+    for obj in queryset.iterator(chunk_size=batch_size):
+        batch.append(build_document(object_type, obj))
+        if len(batch) >= batch_size:
+            upsert_documents(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        upsert_documents(batch)
+        total += len(batch)
+
+    # Drop documents whose source rows were removed outside of signals
+    SearchDocument.objects.filter(object_type=object_type).exclude(
+        object_id__in=model.objects.values('pk')
+    ).delete()
+
+    return total
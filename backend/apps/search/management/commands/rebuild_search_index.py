@@ -0,0 +1,22 @@
+"""
+Rebuild the global search index.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.search.indexing import REGISTRY, rebuild
+
+
+class Command(BaseCommand):
+    help = 'Rebuild SearchDocument rows from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type', action='append', dest='types', choices=list(REGISTRY),
+            help='Object type to rebuild (repeatable, default: all)')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        for object_type in options['types'] or REGISTRY:
+            total = rebuild(object_type, batch_size=options['batch_size'])
+            self.stdout.write(f'{object_type}: {total} documents indexed')
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
@@ -0,0 +1,64 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:37
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('common', '0001_search_configuration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('object_type', models.CharField(choices=[('passenger', 'Passenger'), ('group', 'Group'), ('supplier', 'Supplier'), ('invoice', 'Invoice'), ('hotel', 'Hotel Booking'), ('flight', 'Flight'), ('transportation', 'Transportation')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('identifier', models.CharField(blank=True, help_text='Upper-cased key (passport, code, RUC, number, booking ref)', max_length=100)),
+                ('title', models.CharField(max_length=255)),
+                ('subtitle', models.CharField(blank=True, max_length=255)),
+                ('keywords', models.TextField(blank=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'db_table': 'search_documents',
+                'ordering': ['object_type', 'title'],
+                'indexes': [models.Index(fields=['object_type', 'identifier'], name='search_doc_identifier_prefix', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']), django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='search_doc_vector_gin')],
+                'unique_together': {('object_type', 'object_id')},
+            },
+        ),
+        migrations.RunSQL(
+            sql="""
+                CREATE FUNCTION search_documents_vector_update() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector :=
+                        setweight(to_tsvector('simple', coalesce(NEW.identifier, '')), 'A') ||
+                        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.title, '')), 'A') ||
+                        setweight(to_tsvector('simple', coalesce(NEW.keywords, '')), 'B') ||
+                        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.subtitle, '')), 'C');
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql;
+
+                CREATE TRIGGER search_documents_vector_trigger
+                    BEFORE INSERT OR UPDATE OF identifier, title, subtitle, keywords
+                    ON search_documents FOR EACH ROW
+                    EXECUTE FUNCTION search_documents_vector_update();
+            """,
+            reverse_sql="""
+                DROP TRIGGER IF EXISTS search_documents_vector_trigger ON search_documents;
+                DROP FUNCTION IF EXISTS search_documents_vector_update();
+            """,
+        ),
+    ]
@@ -0,0 +1,53 @@
+"""
+Search models: denormalized SearchDocument index.
+"""
+from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from core.common.models import TimeStampedModel
+
+
+class SearchDocument(TimeStampedModel):
+    """One searchable row per domain object, kept current by signals."""
+
+    OBJECT_TYPE_CHOICES = [
+        ('passenger', 'Passenger'),
+        ('group', 'Group'),
+        ('supplier', 'Supplier'),
+        ('invoice', 'Invoice'),
+        ('hotel', 'Hotel Booking'),
+        ('flight', 'Flight'),
+        ('transportation', 'Transportation'),
+    ]
+
+    object_type = models.CharField(max_length=20, choices=OBJECT_TYPE_CHOICES)
+    object_id = models.UUIDField()
+
+    # Display
+    identifier = models.CharField(
+        max_length=100, blank=True,
+        help_text='Upper-cased key (passport, code, RUC, number, booking ref)')
+    title = models.CharField(max_length=255)
+    subtitle = models.CharField(max_length=255, blank=True)
+
+    # Search
+    keywords = models.TextField(blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        db_table = 'search_documents'
+        verbose_name = 'Search Document'
+        verbose_name_plural = 'Search Documents'
+        ordering = ['object_type', 'title']
+        indexes = [
+            models.Index(
+                fields=['object_type', 'identifier'],
+                name='search_doc_identifier_prefix',
+                opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']
+            ),
+            GinIndex(fields=['search_vector'], name='search_doc_vector_gin'),
+        ]
+        unique_together = ['object_type', 'object_id']
+
+    def __str__(self):
+        return f"{self.object_type}: {self.title}"
@@ -0,0 +1,31 @@
+"""
+Search serializers.
+"""
+from rest_framework import serializers
+from .models import SearchDocument
+
+MIN_QUERY_LENGTH = 2
+DEFAULT_LIMIT = 5
+MAX_LIMIT = 20
+
+
+class SearchDocumentSerializer(serializers.ModelSerializer):
+    """Search hit serializer."""
+
+    class Meta:
+        model = SearchDocument
+        fields = ['object_type', 'object_id', 'identifier', 'title', 'subtitle']
+        read_only_fields = fields
+
+
+class GlobalSearchSerializer(serializers.Serializer):
+    """Query parameters of the global search."""
+
+    q = serializers.CharField(min_length=MIN_QUERY_LENGTH)
+    types = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_LIMIT, default=DEFAULT_LIMIT)
+
+    def validate_types(self, value):
+        """Known object types of a comma-separated list; unknown ones are ignored."""
+        valid_types = dict(SearchDocument.OBJECT_TYPE_CHOICES)
+        return [object_type for object_type in value.split(',') if object_type in valid_types]
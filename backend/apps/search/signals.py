@@ -0,0 +1,27 @@
+"""
+Signal handlers that keep SearchDocument rows in sync with their sources.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .indexing import MODEL_TYPES, index_object, remove_object
+
+
+def _on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    object_type = MODEL_TYPES[sender]
+    transaction.on_commit(lambda: index_object(object_type, instance.pk))
+
+
+def _on_delete(sender, instance, **kwargs):
+    object_type = MODEL_TYPES[sender]
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_object(object_type, pk))
+
+
+for model in MODEL_TYPES:
+    post_save.connect(_on_save, sender=model,
+                      dispatch_uid=f'search_index_{model._meta.label}')
+    post_delete.connect(_on_delete, sender=model,
+                        dispatch_uid=f'search_remove_{model._meta.label}')
@@ -0,0 +1,77 @@
+"""
+Search views.
+"""
+from django.contrib.postgres.search import SearchRank
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.common.permissions import IsFinanceManager
+from core.common.search import build_prefix_query
+from .models import SearchDocument
+from .serializers import GlobalSearchSerializer, SearchDocumentSerializer
+
+
+class GlobalSearchView(APIView):
+    """
+    Type-ahead search across passengers, groups, suppliers, invoices and bookings.
+
+    Query params:
+        q: Search text (passport, group code, RUC, invoice number, name...)
+        types: Comma-separated object types to include (default: all)
+        limit: Max results per type (default 5, max 20)
+    """
+
+    permission_classes = [IsFinanceManager]
+
+    def get(self, request):
+        params = GlobalSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        term = params.validated_data['q']
+        limit = params.validated_data['limit']
+        types = params.validated_data.get('types')
+        if types is None:
+            types = [object_type for object_type, _ in SearchDocument.OBJECT_TYPE_CHOICES]
+
+        results = {object_type: [] for object_type in types}
+        queryset = self.search_queryset(term, types, limit)
+        if queryset is not None:
+            for document in queryset:
+                results[document.object_type].append(
+                    SearchDocumentSerializer(document).data)
+
+        return Response({'query': term, 'results': results})
+
+    def search_queryset(self, term, types, limit):
+        """
+        One UNION ALL query with a LIMIT per object type, so each branch is
+        served by the (object_type, identifier) prefix index or the GIN index
+        and stops after `limit` rows.
+        """
+        identifier = term.upper()
+        query = build_prefix_query([term])
+
+        condition = Q(identifier__startswith=identifier)
+        rank = Value(0.0)
+        if query is not None:
+            condition |= Q(search_vector=query)
+            rank = SearchRank(F('search_vector'), query)
+
+        base = SearchDocument.objects.filter(condition).annotate(
+            exact=Case(
+                When(identifier=identifier, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField()
+            ),
+            rank=rank,
+        ).only('object_type', 'object_id', 'identifier', 'title', 'subtitle')
+
+        branches = [
+            base.filter(object_type=object_type).order_by('-exact', '-rank', 'title')[:limit]
+            for object_type in types
+        ]
+        if not branches:
+            return None
+        if len(branches) == 1:
+            return branches[0]
+        return branches[0].union(*branches[1:], all=True)
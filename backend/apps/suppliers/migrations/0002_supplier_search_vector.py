@@ -0,0 +1,55 @@
+# Generated by Django 5.0.14 on 2026-10-19 18:35
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0001_search_configuration'),
+        ('suppliers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='supplier',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='supplier',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='suppliers_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='supplier',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tax_id'], name='suppliers_tax_id_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunSQL(
+            sql="""
+                CREATE FUNCTION suppliers_search_vector_update() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector :=
+                        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.name, '')), 'A') ||
+                        setweight(to_tsvector('simple', coalesce(NEW.code, '')), 'A') ||
+                        setweight(to_tsvector('simple', coalesce(NEW.tax_id, '')), 'A') ||
+                        setweight(to_tsvector('spanish_unaccent', coalesce(NEW.contact_name, '')), 'B') ||
+                        setweight(to_tsvector('simple', coalesce(NEW.email, '')), 'C');
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql;
+
+                CREATE TRIGGER suppliers_search_vector_trigger
+                    BEFORE INSERT OR UPDATE OF name, code, tax_id, contact_name, email
+                    ON suppliers FOR EACH ROW
+                    EXECUTE FUNCTION suppliers_search_vector_update();
+
+                UPDATE suppliers SET name = name;
+            """,
+            reverse_sql="""
+                DROP TRIGGER IF EXISTS suppliers_search_vector_trigger ON suppliers;
+                DROP FUNCTION IF EXISTS suppliers_search_vector_update();
+            """,
+        ),
+    ]
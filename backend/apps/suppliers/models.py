@@ -2,6 +2,8 @@
 Suppliers models: Supplier, SupplierService, PricePeriod, ExchangeRate.
 """
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
 from core.common.models import TimeStampedModel
 
@@ -59,6 +61,9 @@ class Supplier(TimeStampedModel):
     )
     notes = models.TextField(blank=True)
 
+    # Full-text search (maintained by a database trigger)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         db_table = 'suppliers'
         verbose_name = 'Supplier'
@@ -68,6 +73,12 @@ class Supplier(TimeStampedModel):
             models.Index(fields=['code']),
             models.Index(fields=['supplier_type', 'status']),
             models.Index(fields=['country', 'city']),
+            GinIndex(fields=['search_vector'], name='suppliers_search_gin'),
+            GinIndex(
+                fields=['tax_id'],
+                name='suppliers_tax_id_trgm',
+                opclasses=['gin_trgm_ops']
+            ),
         ]
 
     def __str__(self):
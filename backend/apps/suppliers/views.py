@@ -17,6 +17,7 @@ from .serializers import (
 )
 from core.common.permissions import IsOperationsManager
 from core.common.pagination import StandardPagination
+from core.common.search import FullTextSearchFilter
 
 
 class SupplierViewSet(viewsets.ModelViewSet):
@@ -26,9 +27,11 @@ class SupplierViewSet(viewsets.ModelViewSet):
     serializer_class = SupplierSerializer
     permission_classes = [IsAuthenticated, IsOperationsManager]
     pagination_class = StandardPagination
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['supplier_type', 'status', 'country', 'city']
     search_fields = ['code', 'name', 'contact_name', 'email', 'tax_id']
+    search_vector_field = 'search_vector'
+    search_prefix_fields = ['tax_id', 'code']
     ordering_fields = ['code', 'name', 'rating', 'created_at']
     ordering = ['name']
 
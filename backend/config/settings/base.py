@@ -4,6 +4,7 @@ Base settings for TravesIA project.
 from pathlib import Path
 from decouple import config, Csv
 from datetime import timedelta
+from celery.schedules import crontab
 
 # Build paths inside the project
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -25,6 +26,7 @@ DJANGO_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 THIRD_PARTY_APPS = [
@@ -43,6 +45,8 @@ LOCAL_APPS = [
     'apps.financial',
     'apps.documents',
     'apps.authentication',
+    'apps.search',
+    'apps.dashboard',
     'core.common',
 ]
 
@@ -197,7 +201,12 @@ if USE_S3:
     AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY')
     AWS_STORAGE_BUCKET_NAME = config('AWS_STORAGE_BUCKET_NAME')
     AWS_S3_REGION_NAME = config('AWS_S3_REGION_NAME', default='us-east-1')
-    AWS_S3_CUSTOM_DOMAIN = f'{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com'
+    AWS_S3_CUSTOM_DOMAIN = config('AWS_S3_CUSTOM_DOMAIN',
+                                  default=f'{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com')
+    # S3-compatible server (MinIO) for development
+    AWS_S3_ENDPOINT_URL = config('AWS_S3_ENDPOINT_URL', default=None)
+    # 'path' for servers without per-bucket hostnames (MinIO)
+    AWS_S3_ADDRESSING_STYLE = config('AWS_S3_ADDRESSING_STYLE', default=None)
     AWS_S3_OBJECT_PARAMETERS = {
         'CacheControl': 'max-age=86400',
     }
@@ -217,6 +226,52 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_ROUTES = {
+    'apps.financial.tasks.submit_invoice_to_sunat': {'queue': 'sunat'},
+    'apps.financial.tasks.send_summary_to_sunat': {'queue': 'sunat'},
+    'apps.financial.tasks.poll_summary_status': {'queue': 'sunat'},
+    'apps.documents.tasks.generate_document_previews': {'queue': 'media'},
+}
+CELERY_BEAT_SCHEDULE = {
+    'sunat-daily-summaries': {
+        'task': 'apps.financial.tasks.send_daily_summaries',
+        'schedule': crontab(hour=1, minute=0),
+    },
+    'documents-purge-expired-uploads': {
+        'task': 'apps.documents.tasks.purge_expired_uploads',
+        'schedule': crontab(minute=15),
+    },
+    'documents-scan-expiries': {
+        'task': 'apps.documents.tasks.scan_document_expiries',
+        'schedule': crontab(hour=2, minute=30),
+    },
+    'documents-alert-digests': {
+        'task': 'apps.documents.tasks.send_document_alert_digests',
+        'schedule': crontab(hour=7, minute=0),
+    },
+    'dashboard-kpis': {
+        'task': 'apps.dashboard.tasks.refresh_dashboard_kpis',
+        'schedule': crontab(minute='*/5'),
+    },
+}
+
+# Currency all financial rows are normalized to (see BaseCurrencyModel)
+BASE_CURRENCY = config('BASE_CURRENCY', default='PEN')
+
+# SUNAT (Peru Electronic Invoicing)
+SUNAT_RUC = config('SUNAT_RUC', default='20000000001')
+SUNAT_COMPANY_NAME = config('SUNAT_COMPANY_NAME', default='TravesIA')
+SUNAT_API_URL = config(
+    'SUNAT_API_URL', default='https://e-beta.sunat.gob.pe/ol-ti-itcpfegem-beta/billService')
+SUNAT_USERNAME = config('SUNAT_USERNAME', default='MODDATOS')
+SUNAT_PASSWORD = config('SUNAT_PASSWORD', default='moddatos')
+SUNAT_TRANSPORT = config(
+    'SUNAT_TRANSPORT', default='apps.financial.sunat.transports.HttpTransport')
+SUNAT_TIMEOUT = config('SUNAT_TIMEOUT', default=30, cast=int)
+SUNAT_POOL_SIZE = config('SUNAT_POOL_SIZE', default=10, cast=int)
+SUNAT_RATE_LIMIT = config('SUNAT_RATE_LIMIT', default=10, cast=int)
+SUNAT_MAX_RETRIES = config('SUNAT_MAX_RETRIES', default=8, cast=int)
+SUNAT_RETRY_BACKOFF_MAX = config('SUNAT_RETRY_BACKOFF_MAX', default=600, cast=int)
 
 # Cache
 CACHES = {
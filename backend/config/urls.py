@@ -22,6 +22,9 @@ urlpatterns = [
     path('api/v1/operations/', include('apps.operations.urls')),
     path('api/v1/financial/', include('apps.financial.urls')),
     path('api/v1/documents/', include('apps.documents.urls')),
+    path('api/v1/search/', include('apps.search.urls')),
+    path('api/v1/dashboard/', include('apps.dashboard.urls')),
+    path('api/v1/jobs/', include('core.common.urls')),
 
     # API Documentation
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
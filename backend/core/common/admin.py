@@ -0,0 +1,21 @@
+"""
+Common admin configuration.
+"""
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Job admin."""
+
+    list_display = [
+        'job_type', 'status', 'progress', 'created_by',
+        'started_at', 'finished_at', 'created_at'
+    ]
+    list_filter = ['status', 'job_type']
+    search_fields = ['job_type', 'task_id']
+    readonly_fields = [
+        'task_id', 'started_at', 'finished_at', 'created_at', 'updated_at'
+    ]
+    date_hierarchy = 'created_at'
@@ -0,0 +1,159 @@
+"""
+Background job framework built on Celery.
+
+Usage:
+    @shared_task(bind=True, base=JobTask)
+    def export_passengers(self, job_id, group_id):
+        ...
+        self.update_progress(done, total, 'Exporting passengers')
+        return {'rows': total}
+
+    job = enqueue_job(export_passengers, 'export_passengers',
+                      user=request.user, params={'group_id': str(group.pk)})
+    return job_accepted_response(job)
+"""
+from celery import Task
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Job
+
+PROGRESS_CACHE_KEY = 'jobs:progress:{}'
+PROGRESS_TIMEOUT = 60 * 60 * 24
+
+
+def get_live_progress(job_id):
+    """Get the latest progress published by a running job, if any."""
+    return cache.get(PROGRESS_CACHE_KEY.format(job_id))
+
+
+class JobTask(Task):
+    """
+    Celery base task bound to a Job row.
+
+    Tasks must accept `job_id` as a keyword argument. The row is moved to
+    `running` when the task starts and to `succeeded`/`failed` when it ends;
+    the task's return value (a JSON-serializable dict) becomes `Job.result`.
+    """
+
+    abstract = True
+    _job = None
+
+    @property
+    def job(self):
+        """Job row for the current execution."""
+        return self._job
+
+    def __call__(self, *args, **kwargs):
+        self._job = None
+        job_id = kwargs.get('job_id')
+        if job_id:
+            self._job = Job.objects.get(pk=job_id)
+            Job.objects.filter(pk=job_id).update(
+                status='running',
+                task_id=self.request.id or '',
+                started_at=timezone.now(),
+                updated_at=timezone.now()
+            )
+        return super().__call__(*args, **kwargs)
+
+    def update_progress(self, current, total=None, message=''):
+        """
+        Publish progress to the cache (Redis) without touching the database.
+
+        Args:
+            current: Units done (or a percentage when total is None)
+            total: Total units
+            message: Short human-readable status
+        """
+        if total:
+            percent = int(current * 100 / total)
+        else:
+            percent = int(current)
+        percent = max(0, min(percent, 100))
+
+        cache.set(
+            PROGRESS_CACHE_KEY.format(self.job.pk),
+            {'progress': percent, 'message': message[:255]},
+            PROGRESS_TIMEOUT
+        )
+
+    def save_result_file(self, name, content):
+        """Store a result file (django File) on the job."""
+        self.job.result_file.save(name, content, save=False)
+        Job.objects.filter(pk=self.job.pk).update(
+            result_file=self.job.result_file.name)
+
+    def on_success(self, retval, task_id, args, kwargs):
+        job_id = kwargs.get('job_id')
+        if job_id:
+            Job.objects.filter(pk=job_id).update(
+                status='succeeded',
+                progress=100,
+                result=retval if isinstance(retval, dict) else {'value': retval},
+                finished_at=timezone.now(),
+                updated_at=timezone.now()
+            )
+            cache.delete(PROGRESS_CACHE_KEY.format(job_id))
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        job_id = kwargs.get('job_id')
+        if job_id:
+            live = get_live_progress(job_id) or {}
+            Job.objects.filter(pk=job_id).update(
+                status='failed',
+                progress=live.get('progress', 0),
+                error=f"{type(exc).__name__}: {exc}",
+                finished_at=timezone.now(),
+                updated_at=timezone.now()
+            )
+            cache.delete(PROGRESS_CACHE_KEY.format(job_id))
+
+
+def enqueue_job(task, job_type, user=None, params=None, **options):
+    """
+    Create a Job row and schedule its task once the transaction commits.
+
+    Args:
+        task: Celery task declared with base=JobTask
+        job_type: Short job identifier (e.g. 'export_passengers')
+        user: Requesting user
+        params: JSON-serializable keyword arguments for the task
+        options: Extra apply_async options (queue, countdown...)
+
+    Returns:
+        The pending Job
+    """
+    params = params or {}
+    job = Job.objects.create(
+        job_type=job_type,
+        params=params,
+        created_by=user if user and user.is_authenticated else None
+    )
+    job.task_id = str(job.pk)
+    job.save(update_fields=['task_id'])
+
+    transaction.on_commit(lambda: task.apply_async(
+        kwargs={'job_id': str(job.pk), **params},
+        task_id=job.task_id,
+        **options
+    ))
+    return job
+
+
+def job_accepted_response(job, data=None):
+    """Build a 202 Accepted response pointing at the job polling endpoint."""
+    from .serializers import JobSerializer
+
+    payload = {'job': JobSerializer(job).data}
+    if data:
+        payload.update(data)
+    return Response(
+        payload,
+        status=status.HTTP_202_ACCEPTED,
+        headers={'Location': reverse('jobs-detail', args=[job.pk])}
+    )
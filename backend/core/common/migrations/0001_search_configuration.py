@@ -0,0 +1,22 @@
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        UnaccentExtension(),
+        TrigramExtension(),
+        migrations.RunSQL(
+            sql="""
+                CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+                ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+            """,
+            reverse_sql='DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent;',
+        ),
+    ]
@@ -0,0 +1,74 @@
+"""
+PostgreSQL full-text search helpers.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+# Text search configuration created by core.common migration 0001:
+# the Spanish stemmer with accents stripped (José == jose).
+SEARCH_CONFIG = 'spanish_unaccent'
+
+_TOKEN_RE = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def build_prefix_query(terms, config=SEARCH_CONFIG):
+    """
+    Build a type-ahead tsquery where every term matches as a prefix.
+
+    Args:
+        terms: Iterable of raw search terms
+        config: Text search configuration name
+
+    Returns:
+        SearchQuery or None if no usable terms remain
+    """
+    tokens = []
+    for term in terms:
+        tokens.extend(token for token in _TOKEN_RE.split(term) if token)
+
+    if not tokens:
+        return None
+
+    raw = ' & '.join(f'{token}:*' for token in tokens)
+    return SearchQuery(raw, config=config, search_type='raw')
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    Drop-in replacement for SearchFilter backed by a search_vector column.
+
+    Views opt in by declaring `search_vector_field` (a SearchVectorField kept
+    current by a database trigger). `search_prefix_fields` lists identifier
+    columns (document numbers, RUC) matched by prefix through a trigram
+    index. Results are ranked unless the client requested an ordering, so
+    list this backend after OrderingFilter. Views without
+    `search_vector_field` fall back to the ILIKE search.
+    """
+
+    rank_annotation = 'search_rank'
+
+    def filter_queryset(self, request, queryset, view):
+        vector_field = getattr(view, 'search_vector_field', None)
+        if not vector_field:
+            return super().filter_queryset(request, queryset, view)
+
+        search_terms = self.get_search_terms(request)
+        query = build_prefix_query(search_terms)
+        if query is None:
+            return queryset
+
+        condition = Q(**{vector_field: query})
+        prefix = ''.join(search_terms).upper()
+        for field in getattr(view, 'search_prefix_fields', []):
+            condition |= Q(**{f'{field}__startswith': prefix})
+
+        queryset = queryset.annotate(**{
+            self.rank_annotation: SearchRank(F(vector_field), query)
+        }).filter(condition)
+
+        if OrderingFilter.ordering_param in request.query_params:
+            return queryset
+        return queryset.order_by(f'-{self.rank_annotation}', *queryset.query.order_by)
@@ -0,0 +1,47 @@
+"""
+Common serializers.
+"""
+from rest_framework import serializers
+from .jobs import get_live_progress
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Job serializer with live progress for running jobs."""
+
+    progress = serializers.SerializerMethodField()
+    message = serializers.SerializerMethodField()
+    result_file_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'job_type', 'status', 'progress', 'message',
+            'params', 'result', 'result_file_url', 'error',
+            'started_at', 'finished_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+    def _live(self, obj):
+        if obj.is_finished:
+            return None
+        return get_live_progress(obj.pk)
+
+    def get_progress(self, obj):
+        """Get progress percentage (0-100)."""
+        live = self._live(obj)
+        return live['progress'] if live else obj.progress
+
+    def get_message(self, obj):
+        """Get latest progress message."""
+        live = self._live(obj)
+        return live['message'] if live else obj.message
+
+    def get_result_file_url(self, obj):
+        """Get result file URL."""
+        if obj.result_file:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.result_file.url)
+            return obj.result_file.url
+        return None
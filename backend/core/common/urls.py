@@ -0,0 +1,10 @@
+"""
+Common URL configuration.
+"""
+from rest_framework.routers import DefaultRouter
+from .views import JobViewSet
+
+router = DefaultRouter()
+router.register(r'', JobViewSet, basename='jobs')
+
+urlpatterns = router.urls
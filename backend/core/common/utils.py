@@ -5,6 +5,9 @@ import re
 from decimal import Decimal
 from typing import Optional
 
+IGV_RATE = Decimal('0.18')
+CENT = Decimal('0.01')
+
 
 def format_document_number(doc_type: str, number: str) -> str:
     """
@@ -70,23 +73,21 @@ def calculate_igv(amount: Decimal, include_igv: bool = False) -> dict:
     Returns:
         Dict with base_amount, igv_amount, and total_amount
     """
-    IGV_RATE = Decimal('0.18')
-
     if include_igv:
-        # Amount includes IGV, extract it
-        base_amount = amount / (1 + IGV_RATE)
-        igv_amount = amount - base_amount
-        total_amount = amount
+        # Amount includes IGV, extract it (the parts add up to the amount)
+        total_amount = amount.quantize(CENT)
+        base_amount = (amount / (1 + IGV_RATE)).quantize(CENT)
+        igv_amount = total_amount - base_amount
     else:
         # Amount doesn't include IGV, add it
-        base_amount = amount
-        igv_amount = amount * IGV_RATE
-        total_amount = amount + igv_amount
+        base_amount = amount.quantize(CENT)
+        igv_amount = (amount * IGV_RATE).quantize(CENT)
+        total_amount = base_amount + igv_amount
 
     return {
-        'base_amount': base_amount.quantize(Decimal('0.01')),
-        'igv_amount': igv_amount.quantize(Decimal('0.01')),
-        'total_amount': total_amount.quantize(Decimal('0.01'))
+        'base_amount': base_amount,
+        'igv_amount': igv_amount,
+        'total_amount': total_amount
     }
 
 